@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Author: Michal Szymanski <misiektoja-github@rm-rf.ninja>
+v1.8.2
+
+SQLite match database shared by lol_monitor (SQLITE_FILE / --sqlite-file) and tools/lol_import_csv_to_sqlite.py:
+https://github.com/misiektoja/lol_monitor/
+
+Uses only the Python standard library.
+"""
+
+import json
+import sqlite3
+from typing import Optional, Any, List, TypedDict
+
+
+# Finished match as saved to CSV file / Parquet dataset / SQLite database, None means the value is not available
+class MatchRecord(TypedDict):
+    match_id: Optional[str]
+    riot_id: str
+    start_ts: int
+    stop_ts: int
+    duration: int
+    game_mode: Optional[str]
+    victory: Optional[bool]
+    kills: Optional[int]
+    deaths: Optional[int]
+    assists: Optional[int]
+    champion: Optional[str]
+    level: Optional[int]
+    role: Optional[str]
+    lane: Optional[str]
+    team1: List[str]
+    team2: List[str]
+
+
+# SQLite store of finished matches, one row per match and monitored player (Riot ID)
+# Matches without ID (custom games captured from spectator data, rows imported from CSV files)
+# are keyed by Riot ID and their start timestamp; saving the same match again is an idempotent upsert
+# A match is also unique by Riot ID and start time, so a match imported from CSV and saved by the monitor is stored once
+class MatchStore(object):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS matches (
+            match_key TEXT NOT NULL,
+            riot_id TEXT NOT NULL,
+            match_id TEXT,
+            match_start INTEGER,
+            match_stop INTEGER,
+            duration INTEGER,
+            game_mode TEXT,
+            victory INTEGER,
+            kills INTEGER,
+            deaths INTEGER,
+            assists INTEGER,
+            champion TEXT,
+            level INTEGER,
+            role TEXT,
+            lane TEXT,
+            raw_json TEXT,
+            PRIMARY KEY (match_key, riot_id)
+        );
+        CREATE TABLE IF NOT EXISTS participants (
+            match_key TEXT NOT NULL,
+            riot_id TEXT NOT NULL,
+            team INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            PRIMARY KEY (match_key, riot_id, team, position)
+        );
+    """
+
+    INDEXES = """
+        CREATE UNIQUE INDEX IF NOT EXISTS matches_riot_id_start_idx ON matches (riot_id, match_start) WHERE match_start > 0;
+        CREATE INDEX IF NOT EXISTS matches_start_idx ON matches (match_start);
+        CREATE INDEX IF NOT EXISTS matches_champion_idx ON matches (champion);
+        CREATE INDEX IF NOT EXISTS matches_game_mode_idx ON matches (game_mode);
+        CREATE INDEX IF NOT EXISTS participants_name_idx ON participants (name);
+    """
+
+    # Known values are never replaced with unknown ones, so importing a CSV file (without match IDs and raw JSON)
+    # over matches saved by the monitor keeps their details
+    UPSERT_MATCH = """
+        INSERT INTO matches (match_key, riot_id, match_id, match_start, match_stop, duration, game_mode, victory, kills, deaths, assists, champion, level, role, lane, raw_json)
+        VALUES (:match_key, :riot_id, :match_id, :start_ts, :stop_ts, :duration, :game_mode, :victory, :kills, :deaths, :assists, :champion, :level, :role, :lane, :raw_json)
+        ON CONFLICT (match_key, riot_id) DO UPDATE SET
+            match_id = COALESCE(excluded.match_id, matches.match_id),
+            match_start = excluded.match_start,
+            match_stop = COALESCE(excluded.match_stop, matches.match_stop),
+            duration = COALESCE(excluded.duration, matches.duration),
+            game_mode = COALESCE(excluded.game_mode, matches.game_mode),
+            victory = COALESCE(excluded.victory, matches.victory),
+            kills = COALESCE(excluded.kills, matches.kills),
+            deaths = COALESCE(excluded.deaths, matches.deaths),
+            assists = COALESCE(excluded.assists, matches.assists),
+            champion = COALESCE(excluded.champion, matches.champion),
+            level = COALESCE(excluded.level, matches.level),
+            role = COALESCE(excluded.role, matches.role),
+            lane = COALESCE(excluded.lane, matches.lane),
+            raw_json = COALESCE(excluded.raw_json, matches.raw_json)
+    """
+
+    # Databases created by older versions: participants without Riot ID and the same match stored twice
+    # (once under its match ID, once under Riot ID and start time when imported from CSV)
+    MIGRATE_PARTICIPANTS = """
+        ALTER TABLE participants RENAME TO participants_old;
+        CREATE TABLE participants (
+            match_key TEXT NOT NULL,
+            riot_id TEXT NOT NULL,
+            team INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            PRIMARY KEY (match_key, riot_id, team, position)
+        );
+        INSERT OR IGNORE INTO participants (match_key, riot_id, team, position, name)
+            SELECT p.match_key, m.riot_id, p.team, p.position, p.name FROM participants_old p JOIN matches m ON m.match_key = p.match_key;
+        DROP TABLE participants_old;
+    """
+
+    DUPLICATE_MATCHES = """
+        SELECT match_key, riot_id FROM (
+            SELECT match_key, riot_id, ROW_NUMBER() OVER (PARTITION BY riot_id, match_start ORDER BY match_id IS NULL, rowid DESC) AS copy
+            FROM matches WHERE match_start > 0
+        ) WHERE copy > 1
+    """
+
+    def __init__(self):
+        self.db_file = ""
+        self.store_raw_json = False
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def configure(self, db_file: str, store_raw_json: bool = False):
+        self.db_file = db_file
+        self.store_raw_json = store_raw_json
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.db_file)
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            connection = sqlite3.connect(self.db_file)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(self.SCHEMA)
+            self.migrate(connection)
+            connection.executescript(self.INDEXES)
+            self.connection = connection
+        return self.connection
+
+    def migrate(self, connection: sqlite3.Connection):
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(participants)")]
+        if "riot_id" not in columns:
+            connection.executescript("BEGIN;" + self.MIGRATE_PARTICIPANTS + "COMMIT;")
+        with connection:
+            for match_key, riot_id in connection.execute(self.DUPLICATE_MATCHES).fetchall():
+                self.delete(connection, match_key, riot_id)
+
+    @staticmethod
+    def delete(connection: sqlite3.Connection, match_key: str, riot_id: str):
+        connection.execute("DELETE FROM matches WHERE match_key = ? AND riot_id = ?", (match_key, riot_id))
+        connection.execute("DELETE FROM participants WHERE match_key = ? AND riot_id = ?", (match_key, riot_id))
+
+    @staticmethod
+    def get_match_key(record: MatchRecord) -> str:
+        return record["match_id"] or f"{record['riot_id']}:{record['start_ts']}"
+
+    # Saves the record without committing, so imports can write many records in a single transaction
+    # Matches are unique by Riot ID and start time, so the same match saved under another key is updated (without
+    # match ID) or replaced (with match ID, which becomes its key)
+    def upsert(self, record: MatchRecord, raw_match: Optional[Any] = None):
+        connection = self.connect()
+        match_key = self.get_match_key(record)
+        riot_id = record["riot_id"]
+
+        if record["start_ts"]:
+            row = connection.execute("SELECT match_key FROM matches WHERE riot_id = ? AND match_start = ?", (riot_id, record["start_ts"])).fetchone()
+            if row and row[0] != match_key:
+                if record["match_id"]:
+                    self.delete(connection, row[0], riot_id)
+                else:
+                    match_key = row[0]
+
+        params = dict(record, match_key=match_key, raw_json=None)
+        if record["victory"] is not None:
+            params["victory"] = int(record["victory"])
+        if self.store_raw_json and raw_match is not None:
+            params["raw_json"] = json.dumps(raw_match, separators=(",", ":"))
+        connection.execute(self.UPSERT_MATCH, params)
+
+        connection.execute("DELETE FROM participants WHERE match_key = ? AND riot_id = ?", (match_key, riot_id))
+        connection.executemany(
+            "INSERT INTO participants (match_key, riot_id, team, position, name) VALUES (?, ?, ?, ?, ?)",
+            [(match_key, riot_id, team, position, name) for team, members in ((1, record["team1"]), (2, record["team2"])) for position, name in enumerate(members)]
+        )
+
+    def save_record(self, record: MatchRecord, raw_match: Optional[Any] = None):
+        connection = self.connect()
+        with connection:
+            self.upsert(record, raw_match)
+
+    def close(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.commit()
+            connection.close()
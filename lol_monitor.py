@@ -9,6 +9,7 @@ https://github.com/misiektoja/lol_monitor/
 Python pip3 requirements:
 
 pulsefire
+aiohttp
 requests
 python-dateutil
 python-dotenv (optional)
@@ -59,6 +60,30 @@ STATUS_NOTIFICATION = False
 # Can also be disabled via the -e flag
 ERROR_NOTIFICATION = True
 
+# Emails are delivered in the background, so polling does not wait for the mail server
+# Failed deliveries are retried up to EMAIL_MAX_RETRIES times, waiting EMAIL_RETRY_DELAY seconds before
+# the first retry and twice as long before each next one
+EMAIL_MAX_RETRIES = 5
+EMAIL_RETRY_DELAY = 30  # seconds
+
+# SMTP connection is reused for consecutive emails and closed after being idle for this long; in seconds
+EMAIL_IDLE_TIMEOUT = 60
+
+# Notifications queued within this many seconds after the previous email are merged into one digest email
+# sent when the window is over (the first email of a burst is still sent right away); 0 disables digests
+# (e.g. 60 merges bursts of notifications found after downtime)
+# Can also be set using the --email-digest-window flag
+EMAIL_DIGEST_WINDOW = 0  # seconds
+
+# Maximum number of emails sent to a recipient per hour; notifications over the limit are held and sent as one digest
+# 0 means no limit
+EMAIL_MAX_PER_HOUR = 0
+
+# Directory where queued emails are also stored until they are delivered, so they survive restarts
+# Empty value keeps the queue in memory only
+# Can also be set using the --email-spool-dir flag
+EMAIL_SPOOL_DIR = ""
+
 # How often to check for player activity when the user is NOT in a game; in seconds
 # Can also be set using the -c flag
 LOL_CHECK_INTERVAL = 150  # 2,5 min
@@ -67,11 +92,58 @@ LOL_CHECK_INTERVAL = 150  # 2,5 min
 # Can also be set using the -k flag
 LOL_ACTIVE_CHECK_INTERVAL = 45  # 45 seconds
 
+# Whether to adapt the polling interval when the user is NOT in a game to the user's play history
+# Hours of the week in which the user usually starts games are learnt from the CSV file and the SQLite database
+# (at least 20 matches are needed, LOL_CHECK_INTERVAL is used until then); busy hours are checked more often,
+# while checks in dead hours back off exponentially up to ADAPTIVE_POLL_MAX_INTERVAL
+# Can also be enabled using the --adaptive-polling flag
+ADAPTIVE_POLLING = False
+
+# Maximum number of Riot API requests per hour spent on checks when the user is NOT in a game (per monitored user)
+# Can also be set using the --poll-budget flag
+ADAPTIVE_POLL_BUDGET = 60
+
+# Longest interval between checks in dead hours with adaptive polling; in seconds
+ADAPTIVE_POLL_MAX_INTERVAL = 7200  # 2 hours
+
+# Whether to predict the end of the user's game from its start time and durations of past matches in the same game mode
+# (learnt from the CSV file and the SQLite database); the game is then checked rarely mid-game and often (with back-off)
+# around the time the finished match is expected in the match history; LOL_ACTIVE_CHECK_INTERVAL is used when unsure
+# Can also be enabled using the --predict-game-end flag
+GAME_END_PREDICTION = False
+
 # Whether to include forbidden matches (requiring OAuth (RSO) access-token) in the output
 # Forbidden matches are skipped silently when False or shown with a notice when True
 # Can also be set using the -f flag
 INCLUDE_FORBIDDEN_MATCHES = False
 
+# How many match details to fetch in parallel when listing / saving match history (-l)
+# Matches are still printed and saved to CSV in strict oldest-to-newest order
+# Requests still go through the shared Riot API rate limit governor
+# Can also be set using the --fetch-concurrency flag
+MATCH_FETCH_CONCURRENCY = 10
+
+# Timeout for each of the Riot API calls made at startup (summoner details, ranked info, champion mastery,
+# recent match IDs and the last match); in seconds
+# They run in parallel, so the time before the first check is bounded by the slowest call
+# Set to 0 to disable
+STARTUP_FETCH_TIMEOUT = 30
+
+# Directory used to cache data fetched from Riot API which does not change, so it is not downloaded again
+# (e.g. details of finished matches are saved to the matches/ subdirectory as compressed JSON files,
+# champion names from Data Dragon to champions.json and PUUIDs of monitored Riot IDs to puuids.json)
+# Empty value disables caching, set it to e.g. "~/.cache/lol_monitor" to enable it
+# Can also be set using the --cache-dir flag
+CACHE_DIR = ""
+
+# Maximum size of the on-disk match details cache; in MB
+# The least recently used matches are removed once it is exceeded
+MATCH_CACHE_MAX_SIZE = 256
+
+# Whether to bypass the on-disk match details cache (matches are neither read from nor saved to it)
+# Can also be set using the --no-match-cache flag
+DISABLE_MATCH_CACHE = False
+
 # How often to print a "liveness check" message to the output; in seconds
 # Set to 0 to disable
 LIVENESS_CHECK_INTERVAL = 43200  # 12 hours
@@ -86,6 +158,38 @@ CHECK_INTERNET_TIMEOUT = 5
 # Can also be set using the -b flag
 CSV_FILE = ""
 
+# How many rows are buffered before they are flushed to the CSV file when saving match history (-l with -b)
+# The monitoring mode always flushes every row right away, so no finished match is lost if the tool crashes
+CSV_EXPORT_FLUSH_ROWS = 100
+
+# Buffered CSV rows are flushed at least that often, as well as when the tool is terminated or exits; in seconds
+# The same flush policy applies to the Parquet dataset (PARQUET_DIR)
+CSV_FLUSH_INTERVAL = 5
+
+# Directory of the Parquet dataset to save finished matches to, with typed columns (epoch timestamps,
+# duration in seconds, integer K/D/A and level, list of team members), alternatively or in addition to CSV_FILE
+# Every run adds new part files (flushed rows become row groups), in monitoring mode every finished match
+# is saved as its own part file; matches of all accounts can share one dataset (see the 'Riot ID' column)
+# Read it with e.g. pandas.read_parquet(PARQUET_DIR, memory_map=True); requires pyarrow library
+# Can also be set using the --parquet-dir flag
+PARQUET_DIR = ""
+
+# SQLite database to save finished matches to, alternatively or in addition to CSV_FILE
+# Every match is stored once per monitored player (saving it again updates the existing row), with indexes
+# on start time, champion, game mode and participant names, so it can be queried without a full scan
+# Existing CSV files can be imported with tools/lol_import_csv_to_sqlite.py
+# Can also be set using the --sqlite-file flag
+SQLITE_FILE = ""
+
+# Whether to also store the raw match JSON returned by Riot API in the SQLite database
+# Can also be enabled via the --sqlite-raw-json flag
+SQLITE_STORE_RAW_JSON = False
+
+# File with the list of accounts to monitor from a single process (multi-account mode)
+# One "name#tag:region" entry per line, lines starting with # are ignored
+# Can also be set using the --accounts-file flag (or pass the entries directly with --accounts)
+ACCOUNTS_FILE = ""
+
 # Location of the optional dotenv file which can keep secrets
 # If not specified it will try to auto-search for .env files
 # To disable auto-search, set this to the literal string "none"
@@ -94,6 +198,8 @@ DOTENV_FILE = ""
 
 # Base name for the log file. Output will be saved to lol_monitor_<riot_id_name>.log
 # Can include a directory path to specify the location, e.g. ~/some_dir/lol_monitor
+# In multi-account mode each account gets its own lol_monitor_<riot_id_name>.log file
+# and messages not related to any account are saved to lol_monitor.log
 LOL_LOGFILE = "lol_monitor"
 
 # Whether to disable logging to lol_monitor_<riot_id_name>.log
@@ -226,13 +332,34 @@ SENDER_EMAIL = ""
 RECEIVER_EMAIL = ""
 STATUS_NOTIFICATION = False
 ERROR_NOTIFICATION = False
+EMAIL_MAX_RETRIES = 0
+EMAIL_RETRY_DELAY = 0
+EMAIL_IDLE_TIMEOUT = 0
+EMAIL_DIGEST_WINDOW = 0
+EMAIL_MAX_PER_HOUR = 0
+EMAIL_SPOOL_DIR = ""
 LOL_CHECK_INTERVAL = 0
 LOL_ACTIVE_CHECK_INTERVAL = 0
+ADAPTIVE_POLLING = False
+ADAPTIVE_POLL_BUDGET = 0
+ADAPTIVE_POLL_MAX_INTERVAL = 0
+GAME_END_PREDICTION = False
 INCLUDE_FORBIDDEN_MATCHES = False
+MATCH_FETCH_CONCURRENCY = 0
+STARTUP_FETCH_TIMEOUT = 0
+CACHE_DIR = ""
+MATCH_CACHE_MAX_SIZE = 0
+DISABLE_MATCH_CACHE = False
 LIVENESS_CHECK_INTERVAL = 0
 CHECK_INTERNET_URL = ""
 CHECK_INTERNET_TIMEOUT = 0
 CSV_FILE = ""
+CSV_EXPORT_FLUSH_ROWS = 0
+CSV_FLUSH_INTERVAL = 0
+PARQUET_DIR = ""
+SQLITE_FILE = ""
+SQLITE_STORE_RAW_JSON = False
+ACCOUNTS_FILE = ""
 DOTENV_FILE = ""
 LOL_LOGFILE = ""
 DISABLE_LOGGING = False
@@ -281,16 +408,30 @@ from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import argparse
+import atexit
+import bisect
 import csv
 import platform
 import re
 import ipaddress
+import importlib.util
 import asyncio
+import contextvars
 import html
+import gzip
+import json
+import threading
+from collections import deque
 try:
     from pulsefire.clients import RiotAPIClient
+    from pulsefire.middlewares import http_error_middleware, json_response_middleware
 except ModuleNotFoundError:
     raise SystemExit("Error: Couldn't find the Pulsefire library !\n\nTo install it, run:\n    pip3 install pulsefire\n\nOnce installed, re-run this tool. For more help, visit:\nhttps://pulsefire.iann838.com/usage/basic/installation/")
+import aiohttp
+try:
+    from lol_match_store import MatchRecord, MatchStore
+except ModuleNotFoundError:
+    raise SystemExit("Error: Couldn't find the lol_match_store module !\n\nIt is part of lol_monitor, download lol_match_store.py from https://github.com/misiektoja/lol_monitor/ and put it next to lol_monitor.py")
 import shutil
 from pathlib import Path
 from typing import Optional, Any, Dict, List, Mapping, Tuple, TypedDict
@@ -324,6 +465,10 @@ def normalize_log_separators(message):
     return re.sub(r"(?m)^─+$", lambda match: match.group(0).replace("─", "-"), message)
 
 
+# Log file of the account handled by the currently running task (multi-account mode)
+account_logfile: contextvars.ContextVar = contextvars.ContextVar("account_logfile", default=None)
+
+
 # Logger class to output messages to stdout and log file
 class Logger(object):
     def __init__(self, filename):
@@ -332,16 +477,539 @@ class Logger(object):
 
     def write(self, message):
         self.terminal.write(message)
-        self.logfile.write(normalize_log_separators(message.expandtabs(8)))
+        logfile = account_logfile.get() or self.logfile
+        logfile.write(normalize_log_separators(message.expandtabs(8)))
         self.terminal.flush()
-        self.logfile.flush()
+        logfile.flush()
 
     def flush(self):
         pass
 
 
+# Client-side governor for Riot API rate limits, shared by all API calls of the process
+# Limits are tracked per routing value (platform like euw1 or continent like europe) for the application scope
+# and per routing value + endpoint for the method scope; they are learnt from X-App-Rate-Limit / X-Method-Rate-Limit
+# response headers and requests exceeding them are queued (delayed) instead of being sent and rejected with 429
+class RiotRateGovernor(object):
+    # Development key application limits, used until the real ones are learnt from response headers
+    DEFAULT_APP_LIMITS = [(20, 1), (100, 120)]
+    # How many times a request rejected with 429 is retried before the response is passed on
+    MAX_THROTTLED_RETRIES = 5
+    # How many times a request failing with 5xx or a connection error is retried (with 2^n seconds back-off)
+    MAX_ERROR_RETRIES = 3
+
+    def __init__(self):
+        self.limits: Dict[tuple, List[Tuple[int, int]]] = {}
+        self.history: Dict[tuple, List[float]] = {}
+        self.blocked_until: Dict[tuple, float] = {}
+
+    # Returns the (application, method) rate limit keys for the request
+    @staticmethod
+    def get_keys(invocation) -> List[tuple]:
+        routing = invocation.params.get("region", "")
+        return [("app", routing), ("method", routing, invocation.urlformat)]
+
+    # Parses rate limit header value like "20:1,100:120" into list of (count, window) tuples
+    @staticmethod
+    def parse_limits_header(value: Optional[str]) -> List[Tuple[int, int]]:
+        limits = []
+        if not value:
+            return limits
+        for part in value.split(","):
+            try:
+                count, window = part.split(":")
+                limits.append((int(count), int(window)))
+            except ValueError:
+                continue
+        return limits
+
+    def get_limits(self, key: tuple) -> List[Tuple[int, int]]:
+        if key in self.limits:
+            return self.limits[key]
+        return self.DEFAULT_APP_LIMITS if key[0] == "app" else []
+
+    # Returns number of seconds to wait before the request can be sent; when 0, the request slot is reserved
+    def reserve(self, invocation) -> float:
+        now = time.monotonic()
+        keys = self.get_keys(invocation)
+        wait_for = 0.0
+
+        for key in keys:
+            wait_for = max(wait_for, self.blocked_until.get(key, 0) - now)
+            history = self.history.setdefault(key, [])
+            limits = self.get_limits(key)
+            if not limits:
+                continue
+            max_window = max(window for _, window in limits)
+            del history[:bisect.bisect_right(history, now - max_window)]
+            for count, window in limits:
+                in_window = len(history) - bisect.bisect_right(history, now - window)
+                if in_window >= count:
+                    # The slot frees up when the oldest request counted against the limit leaves the window
+                    wait_for = max(wait_for, history[len(history) - count] + window - now)
+
+        if wait_for > 0:
+            return wait_for
+
+        for key in keys:
+            self.history.setdefault(key, []).append(now)
+        return 0.0
+
+    # Learns limits from response headers and aligns local counters with the ones reported by Riot
+    # (they can be higher when other processes use the same API key)
+    def synchronize(self, invocation, headers) -> None:
+        now = time.monotonic()
+        app_key, method_key = self.get_keys(invocation)
+
+        for key, limits_header, counts_header in ((app_key, "X-App-Rate-Limit", "X-App-Rate-Limit-Count"), (method_key, "X-Method-Rate-Limit", "X-Method-Rate-Limit-Count")):
+            limits = self.parse_limits_header(headers.get(limits_header))
+            if not limits:
+                continue
+            self.limits[key] = limits
+            history = self.history.setdefault(key, [])
+            for count, window in self.parse_limits_header(headers.get(counts_header)):
+                missing = count - (len(history) - bisect.bisect_right(history, now - window))
+                if missing > 0:
+                    history.extend([now] * missing)
+
+    # Blocks the throttled scope for the time requested by Riot in Retry-After header
+    def block(self, invocation, headers, attempt: int) -> float:
+        try:
+            retry_after = float(headers.get("Retry-After", ""))
+        except ValueError:
+            # Service rate limits might come without Retry-After, so back off exponentially
+            retry_after = float(2 ** attempt)
+
+        app_key, method_key = self.get_keys(invocation)
+        limit_type = str(headers.get("X-Rate-Limit-Type", "")).lower()
+        key = app_key if limit_type == "application" else method_key
+        self.blocked_until[key] = max(self.blocked_until.get(key, 0), time.monotonic() + retry_after)
+        return retry_after
+
+
+riot_rate_governor = RiotRateGovernor()
+
+
+# Pulsefire middleware passing every Riot API request through the rate governor
+# Requests rejected with 429 are held back for the Retry-After period and sent again instead of failing; it also retries
+# 5xx responses and connection errors, so every retry is counted against the limits (pulsefire's http_error_middleware
+# placed before it must not retry on its own, i.e. be created with max_retries=0)
+def riot_rate_governor_middleware(governor: RiotRateGovernor):
+
+    def constructor(next):
+
+        async def middleware(invocation):
+            attempt = 0
+            error_attempt = 0
+            while True:
+                while (wait_for := governor.reserve(invocation)) > 0:
+                    await asyncio.sleep(wait_for)
+
+                try:
+                    response = await next(invocation)
+                except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                    if error_attempt >= governor.MAX_ERROR_RETRIES:
+                        raise
+                    error_attempt += 1
+                    await asyncio.sleep(2 ** error_attempt)
+                    continue
+
+                governor.synchronize(invocation, response.headers)
+
+                if response.status >= 500 and error_attempt < governor.MAX_ERROR_RETRIES:
+                    error_attempt += 1
+                    response.release()
+                    await asyncio.sleep(2 ** error_attempt)
+                    continue
+
+                if response.status != 429 or attempt >= governor.MAX_THROTTLED_RETRIES:
+                    return response
+
+                attempt += 1
+                retry_after = governor.block(invocation, response.headers, attempt)
+                response.release()
+                print(f"* Riot API rate limit exceeded ({response.headers.get('X-Rate-Limit-Type', 'unknown')}), retrying in {display_time(int(retry_after) or 1)}")
+
+        return middleware
+
+    return constructor
+
+
+# Keeps a single long-lived Riot API client for the whole process, so every helper reuses
+# the same pooled HTTP session (with keep-alive connections per regional/continental host)
+class RiotClientManager(object):
+    def __init__(self):
+        self.client: Optional[RiotAPIClient] = None
+        self.stale = False
+
+    # Returns the shared client, building it on first use or after the API key was reloaded
+    async def get(self) -> RiotAPIClient:
+        if self.client is not None and not self.stale:
+            return self.client
+
+        old_client = self.client
+
+        # Keep idle connections open for longer than the polling interval, so consecutive poll cycles skip TCP/TLS handshakes
+        keepalive_timeout = max(LOL_CHECK_INTERVAL, LOL_ACTIVE_CHECK_INTERVAL) + 30
+        client = RiotAPIClient(
+            default_headers={"X-Riot-Token": RIOT_API_KEY},
+            middlewares=[
+                json_response_middleware(),
+                http_error_middleware(0),
+                riot_rate_governor_middleware(riot_rate_governor),
+            ],
+        )
+        client.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(keepalive_timeout=keepalive_timeout))
+        self.client = client
+        self.stale = False
+
+        if old_client is not None:
+            await old_client.__aexit__(None, None, None)
+
+        return client
+
+    # Marks the client for rebuilding on the next get() call (used when RIOT_API_KEY is reloaded)
+    def invalidate(self):
+        if self.client is not None:
+            self.stale = True
+
+    # Closes the pooled session, must be awaited on the event loop that created it
+    async def close(self):
+        if self.client is not None:
+            client = self.client
+            self.client = None
+            self.stale = False
+            await client.__aexit__(None, None, None)
+
+
+riot_client_manager = RiotClientManager()
+
+
+# Runs the coroutine in a new event loop and closes the shared Riot API client before the loop goes away
+def run_async(coro):
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await riot_client_manager.close()
+
+    return asyncio.run(runner())
+
+
+# On-disk cache of match-v5 details keyed by match ID (payloads of finished matches never change)
+# Every match is kept in its own gzip-compressed JSON file; file modification time is refreshed on every hit,
+# so when the cache grows over its size limit the least recently used matches are removed first
+class MatchCache(object):
+    def __init__(self):
+        self.cache_dir = ""
+        self.max_size = 0
+        self.total_size: Optional[int] = None
+        self.lock = threading.Lock()
+        self.write_error_reported = False
+
+    # Enables the cache in the given directory, max_size_mb <= 0 means no size limit
+    def configure(self, cache_dir: str, max_size_mb: float):
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024) if max_size_mb > 0 else 0
+        self.total_size = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir)
+
+    # Matches are grouped in subdirectories by their platform prefix (e.g. EUN1_1234567890 -> EUN1/)
+    def get_path(self, match_id: str) -> str:
+        safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", str(match_id))
+        return os.path.join(self.cache_dir, safe_id.split("_", 1)[0], f"{safe_id}.json.gz")
+
+    # Returns cached match details or None on cache miss
+    def load(self, match_id: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+
+        path = self.get_path(match_id)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                match = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or corrupted entry, drop it and fetch the match again
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return match
+
+    # Saves details of a finished match to the cache
+    def store(self, match_id: str, match: Any):
+        if not self.enabled or not isinstance(match, dict) or not match.get("info", {}).get("gameDuration"):
+            return
+
+        path = self.get_path(match_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(match, f, separators=(",", ":"))
+            size = os.path.getsize(tmp_path)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.remove(tmp_path)
+            if not self.write_error_reported:
+                print(f"* Warning: Cannot save match {match_id} to the match cache: {e}")
+                self.write_error_reported = True
+            return
+
+        with self.lock:
+            if self.total_size is None:
+                self.total_size = self.get_total_size()
+            else:
+                self.total_size += size - old_size
+            if self.max_size and self.total_size > self.max_size:
+                self.evict()
+
+    def remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Returns list of (mtime, size, path) tuples for all cached matches
+    def list_entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def get_total_size(self) -> int:
+        return sum(size for _, size, _ in self.list_entries())
+
+    # Removes the least recently used matches until the cache shrinks to 90% of its size limit
+    # (the extra headroom avoids rescanning the directory after every new match), must be called with lock held
+    def evict(self):
+        entries = sorted(self.list_entries())
+        total_size = sum(size for _, size, _ in entries)
+        target_size = int(self.max_size * 0.9)
+        for _, size, path in entries:
+            if total_size <= target_size:
+                break
+            self.remove(path)
+            total_size -= size
+        self.total_size = total_size
+
+
+match_cache = MatchCache()
+
+
+# Gets details of the match, served from the on-disk match cache when available
+async def get_match_details(client: RiotAPIClient, match_id: str, region: str) -> Any:
+    if match_cache.enabled:
+        match = await asyncio.to_thread(match_cache.load, match_id)
+        if match is not None:
+            return match
+
+    match = await client.get_lol_match_v5_match(region=REGION_TO_CONTINENT.get(region, 'europe'), id=match_id)
+
+    if match_cache.enabled:
+        await asyncio.to_thread(match_cache.store, match_id, match)
+
+    return match
+
+
+# Event loop running the poll loops and the event they wait on between polls
+poll_event_loop: Optional[asyncio.AbstractEventLoop] = None
+poll_wakeup_event: Optional[asyncio.Event] = None
+
+
+# Wakes up every waiting poll loop by setting the current event and replacing it with a fresh one
+def renew_poll_wakeup_event():
+    global poll_wakeup_event
+    old_event = poll_wakeup_event
+    poll_wakeup_event = asyncio.Event()
+    if old_event is not None:
+        old_event.set()
+
+
+# Wakes up sleeping poll loops so they recalculate their wait time, safe to call from signal handlers
+def wake_up_poll_loops():
+    if poll_event_loop is not None and not poll_event_loop.is_closed():
+        poll_event_loop.call_soon_threadsafe(renew_poll_wakeup_event)
+
+
+# Sleeps until the next poll without blocking the event loop
+# get_interval is re-evaluated after each wake-up, so interval changes done via signals apply to the current wait
+async def sleep_until_next_poll(get_interval):
+    global poll_event_loop, poll_wakeup_event
+
+    loop = asyncio.get_running_loop()
+    if poll_event_loop is not loop or poll_wakeup_event is None:
+        poll_event_loop = loop
+        poll_wakeup_event = asyncio.Event()
+
+    started = time.monotonic()
+    while True:
+        remaining = started + get_interval() - time.monotonic()
+        if remaining <= 0:
+            return
+        try:
+            await asyncio.wait_for(poll_wakeup_event.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return
+
+
+# Loads the user's finished matches from the CSV file and the SQLite database as {start_ts: (stop_ts, game_mode)}
+# Both sources may hold the same matches, so they are merged by their start time
+def load_match_history(csv_file_name: Optional[str], riotid_name: str) -> Dict[int, Tuple[int, Optional[str]]]:
+    history = {}
+
+    if csv_file_name and os.path.isfile(csv_file_name):
+        try:
+            with open(csv_file_name, "r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        start_ts = int(datetime.fromisoformat(row["Match Start"]).timestamp())
+                        stop_ts = int(datetime.fromisoformat(row["Match Stop"]).timestamp())
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    game_mode = row.get("Game Mode")
+                    history[start_ts] = (stop_ts, game_mode if game_mode and game_mode != "N/A" else None)
+        except Exception as e:
+            print(f"* Warning: Cannot read match history from CSV file '{csv_file_name}': {e}")
+
+    if match_store.enabled:
+        try:
+            rows = match_store.connect().execute("SELECT match_start, match_stop, game_mode FROM matches WHERE riot_id = ? AND match_start > 0", (riotid_name,))
+            for start_ts, stop_ts, game_mode in rows:
+                history[int(start_ts)] = (int(stop_ts or 0), game_mode)
+        except Exception as e:
+            print(f"* Warning: Cannot read match history from SQLite database '{match_store.db_file}': {e}")
+
+    return history
+
+
+# Spreads the checks done while the user is NOT in a game over the week according to the user's play history:
+# the share of the hourly request budget given to each hour of the week follows how often the user started
+# games in it, checks in dead hours back off exponentially and the budget is never exceeded within a clock hour
+class AdaptivePollScheduler(object):
+    HOURS_OF_WEEK = 168
+    # Riot API requests made by a single check (match history head and spectator)
+    REQUESTS_PER_CHECK = 2
+    # Matches needed before the learnt activity is trusted
+    MIN_MATCHES = 20
+    # Added to the score of every hour, so hours without any recorded game still get a small share of the budget
+    SMOOTHING = 0.5
+    # Hours whose activity relative to the busiest hour is lower than this are dead hours
+    DEAD_HOUR_ACTIVITY = 0.05
+    MAX_BACKOFF_EXPONENT = 10
+
+    def __init__(self, hourly_budget: int, max_interval: int):
+        self.hourly_budget = max(self.REQUESTS_PER_CHECK, hourly_budget)
+        self.max_interval = max_interval
+        self.counts = [0] * self.HOURS_OF_WEEK
+        self.matches = 0
+        self.activity = [1.0] * self.HOURS_OF_WEEK
+        self.dead_streak = 0
+        self.budget_hour = -1
+        self.budget_used = 0
+
+    @staticmethod
+    def hour_of_week(ts: float) -> int:
+        dt = datetime.fromtimestamp(ts)
+        return dt.weekday() * 24 + dt.hour
+
+    @property
+    def ready(self) -> bool:
+        return self.matches >= self.MIN_MATCHES
+
+    def add_match(self, start_ts: int, update: bool = True):
+        if start_ts <= 0:
+            return
+        self.counts[self.hour_of_week(start_ts)] += 1
+        self.matches += 1
+        if update:
+            self.update_activity()
+
+    def load_history(self, history: Mapping[int, Any]):
+        for start_ts in history:
+            self.add_match(start_ts, update=False)
+        self.update_activity()
+
+    # Scores every hour of the week by its games plus a seventh of the games started at the same hour on any day
+    # (a few weeks of history are not enough for each hour of the week alone), relative to the busiest hour
+    def update_activity(self):
+        day_counts = [0] * 24
+        for hour, count in enumerate(self.counts):
+            day_counts[hour % 24] += count
+        scores = [count + day_counts[hour % 24] / 7 + self.SMOOTHING for hour, count in enumerate(self.counts)]
+        top_score = max(scores)
+        self.activity = [score / top_score for score in scores]
+
+    def busiest_hours(self, count: int = 3) -> List[int]:
+        return sorted(range(self.HOURS_OF_WEEK), key=lambda hour: -self.activity[hour])[:count]
+
+    # Returns interval between checks in the hour of the week; the busiest hour spends the whole budget
+    def hour_interval(self, hour: int, dead_streak: int = 0) -> float:
+        activity = self.activity[hour]
+        interval = self.REQUESTS_PER_CHECK * 3600 / (self.hourly_budget * activity)
+        if activity < self.DEAD_HOUR_ACTIVITY:
+            interval *= 2 ** min(dead_streak, self.MAX_BACKOFF_EXPONENT)
+        return min(max(interval, LOL_ACTIVE_CHECK_INTERVAL), max(self.max_interval, LOL_ACTIVE_CHECK_INTERVAL))
+
+    # Returns number of seconds from check_ts to the next check
+    def get_interval(self, check_ts: float) -> float:
+        if not self.ready:
+            return LOL_CHECK_INTERVAL
+
+        due = check_ts + self.hour_interval(self.hour_of_week(check_ts), self.dead_streak)
+
+        # Do not sleep through the start of a busier hour
+        dt = datetime.fromtimestamp(check_ts)
+        next_hour_ts = check_ts - (dt.minute * 60 + dt.second + dt.microsecond / 1e6) + 3600
+        while next_hour_ts < due:
+            due = min(due, next_hour_ts + self.hour_interval(self.hour_of_week(next_hour_ts)))
+            next_hour_ts += 3600
+
+        # When the budget of the current clock hour is spent, wait for the next one
+        if int(check_ts // 3600) == self.budget_hour and self.budget_used + self.REQUESTS_PER_CHECK > self.hourly_budget:
+            due = max(due, (self.budget_hour + 1) * 3600)
+
+        return due - check_ts
+
+    # Records the check done at check_ts; in_game resets the dead hour back-off
+    def record_check(self, check_ts: float, in_game: bool = False):
+        if in_game:
+            self.dead_streak = 0
+            return
+
+        budget_hour = int(check_ts // 3600)
+        if budget_hour != self.budget_hour:
+            self.budget_hour = budget_hour
+            self.budget_used = 0
+        self.budget_used += self.REQUESTS_PER_CHECK
+
+        if self.activity[self.hour_of_week(check_ts)] < self.DEAD_HOUR_ACTIVITY:
+            self.dead_streak += 1
+        else:
+            self.dead_streak = 0
+
+
 # Signal handler when user presses Ctrl+C
 def signal_handler(sig, frame):
+    close_output_sinks()
     sys.stdout = stdout_bck
     print('\n* You pressed Ctrl+C, tool is terminated.')
     sys.exit(0)
@@ -463,8 +1131,8 @@ def calculate_timespan(timestamp1, timestamp2, show_weeks=True, show_hours=True,
         return '0 seconds'
 
 
-# Sends email notification
-def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
+# Checks SMTP settings and email content, prints the reason and returns False if the email cannot be sent
+def check_email_settings(subject, body, body_html):
     fqdn_re = re.compile(r'(?=^.{4,253}$)(^((?!-)[a-zA-Z0-9-]{1,63}(?<!-)\.)+[a-zA-Z]{2,63}\.?$)')
     email_re = re.compile(r'[^@]+@[^@]+\.[^@]+')
 
@@ -473,7 +1141,7 @@ def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
     except ValueError:
         if not fqdn_re.search(str(SMTP_HOST)):
             print("Error sending email - SMTP settings are incorrect (invalid IP address/FQDN in SMTP_HOST)")
-            return 1
+            return False
 
     try:
         port = int(SMTP_PORT)
@@ -481,48 +1149,92 @@ def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
             raise ValueError
     except ValueError:
         print("Error sending email - SMTP settings are incorrect (invalid port number in SMTP_PORT)")
-        return 1
+        return False
 
     if not email_re.search(str(SENDER_EMAIL)) or not email_re.search(str(RECEIVER_EMAIL)):
         print("Error sending email - SMTP settings are incorrect (invalid email in SENDER_EMAIL or RECEIVER_EMAIL)")
-        return 1
+        return False
 
     if not SMTP_USER or not isinstance(SMTP_USER, str) or SMTP_USER == "your_smtp_user" or not SMTP_PASSWORD or not isinstance(SMTP_PASSWORD, str) or SMTP_PASSWORD == "your_smtp_password":
         print("Error sending email - SMTP settings are incorrect (check SMTP_USER & SMTP_PASSWORD variables)")
-        return 1
+        return False
 
     if not subject or not isinstance(subject, str):
         print("Error sending email - SMTP settings are incorrect (subject is not a string or is empty)")
-        return 1
+        return False
 
     if not body and not body_html:
         print("Error sending email - SMTP settings are incorrect (body and body_html cannot be empty at the same time)")
-        return 1
+        return False
+
+    return True
+
 
+# Opens logged in SMTP connection
+def open_smtp_connection(use_ssl, smtp_timeout=15):
+    smtpObj = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=smtp_timeout)
     try:
         if use_ssl:
             ssl_context = ssl.create_default_context()
-            smtpObj = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=smtp_timeout)
             smtpObj.starttls(context=ssl_context)
-        else:
-            smtpObj = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=smtp_timeout)
         smtpObj.login(SMTP_USER, SMTP_PASSWORD)
-        email_msg = MIMEMultipart('alternative')
-        email_msg["From"] = SENDER_EMAIL
-        email_msg["To"] = RECEIVER_EMAIL
-        email_msg["Subject"] = str(Header(subject, 'utf-8'))
+    except Exception:
+        smtpObj.close()
+        raise
+    return smtpObj
+
+
+# Builds email message with plain text and/or HTML body
+def build_email_message(subject, body, body_html):
+    email_msg = MIMEMultipart('alternative')
+    email_msg["From"] = SENDER_EMAIL
+    email_msg["To"] = RECEIVER_EMAIL
+    email_msg["Subject"] = str(Header(subject, 'utf-8'))
+
+    if body:
+        part1 = MIMEText(body.encode('utf-8'), 'plain', _charset='utf-8')
+        email_msg.attach(part1)
 
-        if body:
-            part1 = MIMEText(body, 'plain')
-            part1 = MIMEText(body.encode('utf-8'), 'plain', _charset='utf-8')
-            email_msg.attach(part1)
+    if body_html:
+        part2 = MIMEText(body_html.encode('utf-8'), 'html', _charset='utf-8')
+        email_msg.attach(part2)
 
+    return email_msg
+
+
+# Merges queued email notifications into a single digest email with combined plain text and HTML bodies
+def build_email_digest(messages):
+    separator = "─" * HORIZONTAL_LINE
+    body_parts = []
+    html_parts = []
+    for message in messages:
+        body_parts.append(f"{separator}\n{message['subject']}\n{separator}\n\n{message['body'] or ''}".rstrip())
+        body_html = message["body_html"]
         if body_html:
-            part2 = MIMEText(body_html, 'html')
-            part2 = MIMEText(body_html.encode('utf-8'), 'html', _charset='utf-8')
-            email_msg.attach(part2)
+            inner = re.search(r"<body[^>]*>(.*)</body>", body_html, re.DOTALL | re.IGNORECASE)
+            body_html = inner.group(1) if inner else body_html
+        else:
+            body_html = html.escape(message["body"] or "").replace("\n", "<br>")
+        html_parts.append(f"<h3>{html.escape(message['subject'])}</h3>{body_html}")
+
+    return {
+        "subject": f"lol_monitor: digest of {len(messages)} notifications ({messages[0]['subject']} ...)",
+        "body": "\n\n".join(body_parts),
+        "body_html": "<html><head></head><body>" + "<hr>".join(html_parts) + "</body></html>",
+        "use_ssl": messages[0]["use_ssl"],
+        "to": messages[0]["to"],
+        "parts": messages,
+    }
+
+
+# Sends email notification right away (blocks until it is delivered or fails)
+def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
+    if not check_email_settings(subject, body, body_html):
+        return 1
 
-        smtpObj.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, email_msg.as_string())
+    try:
+        smtpObj = open_smtp_connection(use_ssl, smtp_timeout)
+        smtpObj.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, build_email_message(subject, body, body_html).as_string())
         smtpObj.quit()
     except Exception as e:
         print(f"Error sending email: {e}")
@@ -530,6 +1242,263 @@ def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
     return 0
 
 
+# Background delivery of email notifications, so the monitoring loops never wait for the mail server
+# Emails are queued in memory (and optionally spooled to disk, so they survive restarts) and sent one by one
+# by a worker task over a single SMTP connection that is reused until it stays idle for EMAIL_IDLE_TIMEOUT;
+# failed deliveries are retried with exponential backoff
+# Emails to a recipient are sent at most once per digest window and at most max_per_hour times per hour;
+# everything queued while a recipient has to wait is merged into one digest email
+class EmailQueue(object):
+    def __init__(self):
+        self.spool_dir: Optional[str] = None
+        self.max_retries = 5
+        self.retry_delay = 30
+        self.idle_timeout = 60
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.digest_window = 0
+        self.max_per_hour = 0
+        self.sent_times: Dict[str, deque] = {}
+        self.current: List[dict] = []
+        self.connection: Optional[smtplib.SMTP] = None
+        self.connection_ssl: Optional[bool] = None
+        self.stale = False
+        self.lock = threading.Lock()
+        self.counter = 0
+
+    def configure(self, spool_dir=None, max_retries=5, retry_delay=30, idle_timeout=60, digest_window=0, max_per_hour=0):
+        self.spool_dir = spool_dir or None
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = max(1, retry_delay)
+        self.idle_timeout = max(1, idle_timeout)
+        self.digest_window = max(0, digest_window)
+        self.max_per_hour = max(0, int(max_per_hour))
+
+    # Queues email for delivery, returns False if no event loop is running (the caller should send it directly then)
+    def put(self, subject, body, body_html, use_ssl) -> bool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        if self.loop is not loop or self.worker is None or self.worker.done():
+            self.start(loop)
+
+        self.counter += 1
+        message = {"id": f"{time.time_ns()}-{os.getpid()}-{self.counter}", "subject": subject, "body": body, "body_html": body_html, "use_ssl": use_ssl, "to": RECEIVER_EMAIL}
+        self.spool(message)
+        self.queue.put_nowait(message)
+        return True
+
+    # Starts the delivery worker for emails left in the spool directory by the previous run
+    def resume(self):
+        if not self.spool_dir:
+            return
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.worker is None or self.worker.done():
+            self.start(loop)
+
+    # Starts the delivery worker on the event loop, emails left in the spool directory are queued first
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        for message in self.load_spool():
+            self.queue.put_nowait(message)
+
+        # Worker runs in a fresh context, so its messages go to the main log file and not to the log of the account that sent the first email
+        self.worker = loop.create_task(self.run(), context=contextvars.Context())
+
+    async def run(self):
+        queue = self.queue
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.disconnect)
+                continue
+
+            # Messages stay current if the worker is cancelled, so shutdown() can still deliver them or remove them from spool
+            batch = [message]
+            self.current = batch
+            announced = False
+            while True:
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                delay = max(self.ready_at(m.get("to") or RECEIVER_EMAIL) for m in batch) - time.time()
+                if delay <= 0:
+                    break
+                if not announced and len(self.sent_times.get(message.get("to") or RECEIVER_EMAIL, ())) >= self.max_per_hour > 0:
+                    print(f"* Email rate limit ({self.max_per_hour} per hour) reached, next notifications will be sent as digest at {get_hour_min_from_ts(int(time.time() + delay))}")
+                    announced = True
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=delay))
+                except asyncio.TimeoutError:
+                    pass
+
+            for digest in self.merge(batch):
+                await self.deliver_with_retry(digest)
+            self.current = []
+
+    # Returns time when the next email can be sent to the recipient (digest window and hourly cap)
+    def ready_at(self, recipient) -> float:
+        times = self.sent_times.get(recipient)
+        if not times:
+            return 0
+        while times and times[0] <= time.time() - 3600:
+            times.popleft()
+        ready = times[-1] + self.digest_window if times else 0
+        if self.max_per_hour and len(times) >= self.max_per_hour:
+            ready = max(ready, times[-self.max_per_hour] + 3600)
+        return ready
+
+    def record_sent(self, recipient):
+        self.sent_times.setdefault(recipient, deque()).append(time.time())
+
+    # Groups messages per recipient, several messages to the same recipient are merged into one digest
+    def merge(self, messages) -> List[dict]:
+        groups: Dict[str, List[dict]] = {}
+        for message in messages:
+            groups.setdefault(message.get("to") or RECEIVER_EMAIL, []).append(message)
+        return [group[0] if len(group) == 1 else build_email_digest(group) for group in groups.values()]
+
+    async def deliver_with_retry(self, message):
+        delay = self.retry_delay
+        attempt = 0
+        while True:
+            error = await asyncio.to_thread(self.deliver, message)
+            if error is None:
+                self.unspool(message)
+                self.record_sent(message.get("to") or RECEIVER_EMAIL)
+                return
+            attempt += 1
+            if attempt > self.max_retries:
+                break
+            print(f"* Warning: Sending email '{message['subject']}' failed ({error}), retrying in {display_time(delay)}")
+            await asyncio.sleep(delay)
+            delay *= 2
+
+        print(f"Error sending email: {error}" + (f" (email is kept in '{self.spool_dir}' and will be retried on next start)" if self.spool_dir else ""))
+
+    # Sends the message over the persistent SMTP connection (runs in a worker thread), returns error message or None on success
+    def deliver(self, message) -> Optional[str]:
+        with self.lock:
+            if message.get("sent"):
+                return None
+
+            # Connection could have been closed by the server while idle, so a failure on a reused connection is retried once on a new one
+            error = None
+            for fresh in ((False, True) if self.connection is not None else (True,)):
+                try:
+                    if self.connection is not None and (self.stale or self.connection_ssl != message["use_ssl"]):
+                        self.disconnect_locked()
+                    self.stale = False
+                    if self.connection is None:
+                        self.connection = open_smtp_connection(message["use_ssl"])
+                        self.connection_ssl = message["use_ssl"]
+                    self.connection.sendmail(SENDER_EMAIL, message.get("to") or RECEIVER_EMAIL, build_email_message(message["subject"], message["body"], message["body_html"]).as_string())
+                    for part in message.get("parts", [message]):
+                        part["sent"] = True
+                    message["sent"] = True
+                    return None
+                except Exception as e:
+                    self.disconnect_locked()
+                    error = str(e) or type(e).__name__
+        return error
+
+    # Marks the connection for reopening before the next email (used when SMTP_PASSWORD is reloaded)
+    def invalidate(self):
+        self.stale = True
+
+    def disconnect(self):
+        with self.lock:
+            self.disconnect_locked()
+
+    def disconnect_locked(self):
+        if self.connection is not None:
+            connection = self.connection
+            self.connection = None
+            try:
+                connection.quit()
+            except Exception:
+                connection.close()
+
+    def spool_path(self, message) -> str:
+        return os.path.join(str(self.spool_dir), f"{message['id']}.json")
+
+    def spool(self, message):
+        if not self.spool_dir:
+            return
+        path = self.spool_path(message)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(message, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"* Warning: Cannot save email to spool directory '{self.spool_dir}': {e}")
+
+    def unspool(self, message):
+        if not self.spool_dir:
+            return
+        for part in message.get("parts", [message]):
+            try:
+                os.remove(self.spool_path(part))
+            except OSError:
+                pass
+
+    def load_spool(self) -> List[dict]:
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return []
+        messages = []
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, name), encoding="utf-8") as f:
+                    message = json.load(f)
+                message["id"] = name[:-len(".json")]
+                messages.append(message)
+            except (OSError, ValueError) as e:
+                print(f"* Warning: Cannot read spooled email '{name}': {e}")
+        return messages
+
+    # Makes one more delivery attempt for emails still queued when the tool exits (as digest, regardless of the window), then closes the connection
+    def shutdown(self):
+        pending = list(self.current)
+        if self.queue is not None:
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+        self.current = []
+
+        for message in pending:
+            if message.get("sent"):
+                self.unspool(message)
+        pending = [message for message in pending if not message.get("sent")]
+
+        for message in self.merge(pending):
+            error = self.deliver(message)
+            if error is None:
+                self.unspool(message)
+            else:
+                print(f"Error sending email: {error}" + (f" (email is kept in '{self.spool_dir}' and will be retried on next start)" if self.spool_dir else ""))
+
+        self.disconnect()
+
+
+email_queue = EmailQueue()
+
+
+# Queues email notification for background delivery (sent right away when called outside of the event loop)
+def queue_email(subject, body, body_html, use_ssl):
+    if not check_email_settings(subject, body, body_html):
+        return 1
+    if email_queue.put(subject, body, body_html, use_ssl):
+        return 0
+    return send_email(subject, body, body_html, use_ssl)
+
+
 # Initializes the CSV file
 def init_csv_file(csv_file_name):
     try:
@@ -541,18 +1510,264 @@ def init_csv_file(csv_file_name):
         raise RuntimeError(f"Could not initialize CSV file '{csv_file_name}': {e}")
 
 
-# Writes CSV entry
-def write_csv_entry(csv_file_name, start_date_ts, stop_date_ts, duration_ts, game_mode, victory, kills, deaths, assists, champion, level, role, lane, team1, team2):
+# CSV file kept open for the whole monitoring session or history export
+# Rows are flushed after flush_rows rows or flush_interval seconds since the last flush, whichever comes first
+class CsvSink(object):
+    def __init__(self, csv_file_name, flush_rows=1, flush_interval=0):
+        self.csv_file_name = csv_file_name
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.csv_file = open(csv_file_name, 'a', newline='', encoding="utf-8")
+        self.csvwriter = csv.DictWriter(self.csv_file, fieldnames=csvfieldnames, quoting=csv.QUOTE_NONNUMERIC)
+        self.pending_rows = 0
+        self.last_flush = time.monotonic()
+
+    def write_row(self, row):
+        self.csvwriter.writerow(row)
+        self.pending_rows += 1
+        if self.pending_rows >= self.flush_rows or (self.flush_interval and time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.pending_rows:
+            self.csv_file.flush()
+            self.pending_rows = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if not self.csv_file.closed:
+            self.flush()
+            self.csv_file.close()
+
+
+# Open CSV sinks by file name
+csv_sinks: Dict[str, CsvSink] = {}
+
+
+# Opens the CSV sink for the file (or changes flush policy of the already opened one)
+def open_csv_sink(csv_file_name, flush_rows=1, flush_interval=0) -> CsvSink:
+    sink = csv_sinks.get(csv_file_name)
+    if sink is None:
+        sink = CsvSink(csv_file_name, flush_rows, flush_interval)
+        csv_sinks[csv_file_name] = sink
+    else:
+        sink.flush()
+        sink.flush_rows = max(1, flush_rows)
+        sink.flush_interval = flush_interval
+    return sink
+
+
+# Flushes buffered rows of all open CSV sinks, optionally closing them
+def flush_csv_sinks(close=False):
+    for csv_file_name, sink in list(csv_sinks.items()):
+        try:
+            if close:
+                sink.close()
+                del csv_sinks[csv_file_name]
+            else:
+                sink.flush()
+        except Exception as e:
+            print(f"* Error: Failed to flush CSV file '{csv_file_name}': {e}")
+
+
+# Parquet dataset of finished matches, each flush of buffered rows writes one row group
+# Part files are written under a hidden name (ignored by Parquet readers) and renamed once closed,
+# so readers never see a part file without its footer
+class ParquetSink(object):
+    def __init__(self):
+        self.dataset_dir = ""
+        self.flush_rows = 1
+        self.flush_interval = 0
+        self.close_after_flush = True
+        self.rows: List[dict] = []
+        self.schema = None
+        self.writer = None
+        self.part_path = ""
+        self.part_number = 0
+        self.last_flush = time.monotonic()
+
+    # close_after_flush=True finalizes the part file after every flush, so flushed rows survive a crash
+    def configure(self, dataset_dir: str, flush_rows: int = 1, flush_interval: float = 0, close_after_flush: bool = True):
+        self.dataset_dir = dataset_dir
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.close_after_flush = close_after_flush
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.dataset_dir)
+
+    def get_schema(self):
+        if self.schema is None:
+            import pyarrow as pa
+            self.schema = pa.schema([
+                ("Match ID", pa.string()),
+                ("Riot ID", pa.string()),
+                ("Match Start", pa.timestamp("s", tz="UTC")),
+                ("Match Stop", pa.timestamp("s", tz="UTC")),
+                ("Duration", pa.int32()),
+                ("Game Mode", pa.string()),
+                ("Victory", pa.bool_()),
+                ("Kills", pa.int16()),
+                ("Deaths", pa.int16()),
+                ("Assists", pa.int16()),
+                ("Champion", pa.string()),
+                ("Level", pa.int16()),
+                ("Role", pa.string()),
+                ("Lane", pa.string()),
+                ("Team 1", pa.list_(pa.string())),
+                ("Team 2", pa.list_(pa.string())),
+            ])
+        return self.schema
+
+    def write_record(self, record: MatchRecord):
+        self.rows.append({
+            "Match ID": record["match_id"],
+            "Riot ID": record["riot_id"],
+            "Match Start": record["start_ts"] or None,
+            "Match Stop": record["stop_ts"] or None,
+            "Duration": record["duration"],
+            "Game Mode": record["game_mode"],
+            "Victory": record["victory"],
+            "Kills": record["kills"],
+            "Deaths": record["deaths"],
+            "Assists": record["assists"],
+            "Champion": record["champion"],
+            "Level": record["level"],
+            "Role": record["role"],
+            "Lane": record["lane"],
+            "Team 1": record["team1"],
+            "Team 2": record["team2"],
+        })
+        if len(self.rows) >= self.flush_rows or (self.flush_interval and time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def open_part_file(self):
+        import pyarrow.parquet as pq
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        self.part_number += 1
+        part_name = f"part-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.part_number:04d}.parquet"
+        self.part_path = os.path.join(self.dataset_dir, part_name)
+        self.writer = pq.ParquetWriter(os.path.join(self.dataset_dir, f".{part_name}.inprogress"), self.get_schema())
+
+    # Rows which cannot be converted to the schema are dropped from the buffer (and reported), so they do not break later flushes
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.rows:
+            return
+        import pyarrow as pa
+        rejected = []
+        try:
+            table = pa.Table.from_pylist(self.rows, schema=self.get_schema())
+        except (ValueError, TypeError):
+            valid = []
+            for row in self.rows:
+                try:
+                    pa.Table.from_pylist([row], schema=self.get_schema())
+                    valid.append(row)
+                except (ValueError, TypeError) as e:
+                    rejected.append(f"{row['Match ID'] or row['Match Start']} ({e})")
+            self.rows = valid
+            table = pa.Table.from_pylist(self.rows, schema=self.get_schema())
+        if table.num_rows:
+            if self.writer is None:
+                self.open_part_file()
+            self.writer.write_table(table)
+        self.rows = []
+        if self.close_after_flush:
+            self.close_part_file()
+        if rejected:
+            raise ValueError(f"skipped {len(rejected)} match(es) not matching the dataset schema: {', '.join(rejected)}")
+
+    def close_part_file(self):
+        if self.writer is None:
+            return
+        writer, self.writer = self.writer, None
+        writer.close()
+        os.replace(writer.where, self.part_path)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.close_part_file()
+
+
+parquet_sink = ParquetSink()
+
+
+match_store = MatchStore()
+
+
+# Flushes and closes all output files (CSV files, Parquet dataset and SQLite database) and delivers queued emails, used on exit and when the tool is terminated
+def close_output_sinks():
+    flush_csv_sinks(close=True)
     try:
+        parquet_sink.close()
+    except Exception as e:
+        print(f"* Error: Failed to write Parquet dataset '{parquet_sink.dataset_dir}': {e}")
+    try:
+        match_store.close()
+    except Exception as e:
+        print(f"* Error: Failed to close SQLite database '{match_store.db_file}': {e}")
+    email_queue.shutdown()
+
+
+atexit.register(close_output_sinks)
 
-        with open(csv_file_name, 'a', newline='', buffering=1, encoding="utf-8") as csv_file:
-            csvwriter = csv.DictWriter(csv_file, fieldnames=csvfieldnames, quoting=csv.QUOTE_NONNUMERIC)
-            csvwriter.writerow({'Match Start': start_date_ts, 'Match Stop': stop_date_ts, 'Duration': duration_ts, 'Game Mode': game_mode, 'Victory': victory, 'Kills': kills, 'Deaths': deaths, 'Assists': assists, 'Champion': champion, 'Level': level, 'Role': role, 'Lane': lane, 'Team 1': team1, 'Team 2': team2})
+
+# Writes CSV entry, rows are written through the CSV sink of the file (opened with flush after every row if not opened yet)
+def write_csv_entry(csv_file_name, start_date_ts, stop_date_ts, duration_ts, game_mode, victory, kills, deaths, assists, champion, level, role, lane, team1, team2):
+    try:
+        sink = csv_sinks.get(csv_file_name) or open_csv_sink(csv_file_name)
+        sink.write_row({'Match Start': start_date_ts, 'Match Stop': stop_date_ts, 'Duration': duration_ts, 'Game Mode': game_mode, 'Victory': victory, 'Kills': kills, 'Deaths': deaths, 'Assists': assists, 'Champion': champion, 'Level': level, 'Role': role, 'Lane': lane, 'Team 1': team1, 'Team 2': team2})
 
     except Exception as e:
         raise RuntimeError(f"Failed to write to CSV file '{csv_file_name}': {e}")
 
 
+# Saves finished match to the CSV file (if given), to the Parquet dataset and SQLite database (if enabled)
+def save_match_record(record: MatchRecord, csv_file_name: Optional[str], raw_match: Optional[Any] = None):
+    if csv_file_name:
+        def na(value):
+            return value if value is not None else "N/A"
+
+        write_csv_entry(
+            csv_file_name,
+            str(datetime.fromtimestamp(record["start_ts"])) if record["start_ts"] else "",
+            str(datetime.fromtimestamp(record["stop_ts"])) if record["stop_ts"] else "",
+            display_time(record["duration"]),
+            na(record["game_mode"]),
+            "N/A" if record["victory"] is None else ("Yes" if record["victory"] else "No"),
+            na(record["kills"]),
+            na(record["deaths"]),
+            na(record["assists"]),
+            na(record["champion"]),
+            na(record["level"]),
+            na(record["role"]),
+            na(record["lane"]),
+            " ".join(f"'{p}'" for p in record["team1"]),
+            " ".join(f"'{p}'" for p in record["team2"]),
+        )
+
+    # A failure of one output does not prevent saving the match to the other one
+    errors = []
+    if parquet_sink.enabled:
+        try:
+            parquet_sink.write_record(record)
+        except Exception as e:
+            errors.append(f"Failed to write to Parquet dataset '{parquet_sink.dataset_dir}': {e}")
+
+    if match_store.enabled:
+        try:
+            match_store.save_record(record, raw_match)
+        except Exception as e:
+            errors.append(f"Failed to write to SQLite database '{match_store.db_file}': {e}")
+
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+
 # Returns the current date/time in human readable format; eg. Sun 21 Apr 2024, 15:08:45
 def get_cur_ts(ts_str=""):
     return (f'{ts_str}{calendar.day_abbr[(datetime.fromtimestamp(int(time.time()))).weekday()]} {datetime.fromtimestamp(int(time.time())).strftime("%d %b %Y, %H:%M:%S")}')
@@ -679,6 +1894,7 @@ def increase_active_check_signal_handler(sig, frame):
     print(f"* Signal {sig_name} received")
     print(f"* LoL timers: [active check interval: {display_time(LOL_ACTIVE_CHECK_INTERVAL)}]")
     print_cur_ts("Timestamp:\t\t\t")
+    wake_up_poll_loops()
 
 
 # Signal handler for SIGABRT allowing to decrease check timer for player activity when user is in game by LOL_ACTIVE_CHECK_SIGNAL_VALUE seconds
@@ -690,6 +1906,7 @@ def decrease_active_check_signal_handler(sig, frame):
     print(f"* Signal {sig_name} received")
     print(f"* LoL timers: [active check interval: {display_time(LOL_ACTIVE_CHECK_INTERVAL)}]")
     print_cur_ts("Timestamp:\t\t\t")
+    wake_up_poll_loops()
 
 
 # Signal handler for SIGHUP allowing to reload secrets from .env
@@ -723,6 +1940,10 @@ def reload_secrets_signal_handler(sig, frame):
             if val is not None and val != old_val:
                 globals()[secret] = val
                 print(f"* Reloaded {secret} from {env_path}")
+                if secret == "RIOT_API_KEY":
+                    riot_client_manager.invalidate()
+                if secret == "SMTP_PASSWORD":
+                    email_queue.invalidate()
 
     print_cur_ts("Timestamp:\t\t\t")
 
@@ -908,52 +2129,147 @@ def get_user_riot_name_tag(riotid: str):
     return riotid_name, riotid_tag
 
 
-# Converts Riot ID to PUUID
-async def get_user_puuid(riotid: str, region: str) -> Optional[str]:
+# Riot ID + region to PUUID mapping, kept in memory and persisted to CACHE_DIR/puuids.json
+# PUUID of an account never changes, so entries are trusted until a PUUID-based call rejects the PUUID
+# (404 - unknown player, 400 - PUUID encrypted for a different Riot API application)
+class PuuidCache(object):
+    def __init__(self):
+        self.cache_file = ""
+        self.entries: Dict[str, str] = {}
+        self.loaded = False
+
+    def configure(self, cache_file: str):
+        self.cache_file = cache_file
+        self.loaded = False
+
+    @staticmethod
+    def get_key(riotid: str, region: str) -> str:
+        return f"{riotid.strip().lower()}:{region.strip().lower()}"
+
+    # Re-reads the cache file, so entries saved in the meantime by other running copies are not lost
+    def load(self):
+        self.loaded = True
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"* Warning: Cannot load cached PUUIDs from '{self.cache_file}': {e}")
+            return
+        if isinstance(entries, dict):
+            self.entries.update({key: value for key, value in entries.items() if isinstance(value, str)})
+
+    def save(self):
+        if not self.cache_file:
+            return
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"* Warning: Cannot save PUUID cache to '{self.cache_file}': {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+    def get(self, riotid: str, region: str) -> Optional[str]:
+        if not self.loaded:
+            self.load()
+        return self.entries.get(self.get_key(riotid, region))
+
+    def set(self, riotid: str, region: str, puuid: str):
+        self.load()
+        self.entries[self.get_key(riotid, region)] = puuid
+        self.save()
+
+    # Drops cached PUUID if the error returned by a PUUID-based call means it is not valid anymore
+    # Returns True if the PUUID was cached and has been dropped
+    def invalidate(self, puuid: Optional[str], error: Exception) -> bool:
+        if not puuid or getattr(error, 'status', None) not in (400, 404):
+            return False
+        self.load()
+        stale_keys = [key for key, value in self.entries.items() if value == puuid]
+        if not stale_keys:
+            return False
+        for key in stale_keys:
+            del self.entries[key]
+        self.save()
+        return True
+
+
+puuid_cache = PuuidCache()
+
+
+# Converts Riot ID to PUUID, the cached value is used when available
+async def get_user_puuid(client: RiotAPIClient, riotid: str, region: str) -> Optional[str]:
+
+    puuid = puuid_cache.get(riotid, region)
+    if puuid:
+        return puuid
 
     riotid_name, riotid_tag = get_user_riot_name_tag(riotid)
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
-        try:
-            account = await client.get_account_v1_by_riot_id(region=REGION_TO_CONTINENT.get(region, "europe"), game_name=riotid_name, tag_line=riotid_tag)
-            puuid = account["puuid"]
-        except Exception as e:
-            print(f"* Error while converting Riot ID to PUUID: {e}")
-            if 'Unauthorized' in str(e):
-                print("* API key might not be valid anymore!")
-            puuid = None
+    try:
+        account = await client.get_account_v1_by_riot_id(region=REGION_TO_CONTINENT.get(region, "europe"), game_name=riotid_name, tag_line=riotid_tag)
+        puuid = account["puuid"]
+    except Exception as e:
+        print(f"* Error while converting Riot ID to PUUID: {e}")
+        if 'Unauthorized' in str(e):
+            print("* API key might not be valid anymore!")
+        puuid = None
+
+    if puuid:
+        puuid_cache.set(riotid, region, puuid)
 
     return puuid
 
 
+# Resolves Riot ID again if the error returned by a PUUID-based call means the cached PUUID is not valid anymore
+async def revalidate_user_puuid(client: RiotAPIClient, riotid: str, region: str, puuid: Optional[str], error: Exception) -> Optional[str]:
+
+    if not puuid_cache.invalidate(puuid, error):
+        return None
+
+    print(f"* Cached PUUID for '{riotid}' was rejected by Riot API ({getattr(error, 'status', None)}), resolving Riot ID again")
+    return await get_user_puuid(client, riotid, region)
+
+
 # Gets summoner details
-async def get_summoner_details(puuid: str, region: str):
+async def get_summoner_details(client: RiotAPIClient, puuid: str, region: str):
 
     summoner_info = {
         "summoner_level": "N/A",
         "revision_date": "N/A"
     }
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
-        try:
-            summoner = await client.get_lol_summoner_v4_by_puuid(region=region, puuid=puuid)
+    try:
+        summoner = await client.get_lol_summoner_v4_by_puuid(region=region, puuid=puuid)
 
-            summoner_info["summoner_level"] = str(summoner.get("summonerLevel", "N/A"))
+        summoner_info["summoner_level"] = str(summoner.get("summonerLevel", "N/A"))
 
-            # revisionDate is in milliseconds
-            revision_date_ts = summoner.get("revisionDate", 0)
-            if revision_date_ts:
-                revision_date = datetime.fromtimestamp(revision_date_ts / 1000)
-                summoner_info["revision_date"] = get_date_from_ts(revision_date)
+        # revisionDate is in milliseconds
+        revision_date_ts = summoner.get("revisionDate", 0)
+        if revision_date_ts:
+            revision_date = datetime.fromtimestamp(revision_date_ts / 1000)
+            summoner_info["revision_date"] = get_date_from_ts(revision_date)
 
-        except Exception as e:
-            print(f"* Error while getting summoner details: {e}")
+    except Exception as e:
+        # Rejected PUUID is passed on, so the caller can resolve the Riot ID again
+        if getattr(e, 'status', None) in (400, 404):
+            raise
+        print(f"* Error while getting summoner details: {e}")
 
     return summoner_info
 
 
 # Gets ranked information
-async def get_ranked_info(puuid: str, region: str) -> RankedInfo:
+async def get_ranked_info(client: RiotAPIClient, puuid: str, region: str) -> RankedInfo:
     ranked_info: RankedInfo = {
         "solo_duo": {"tier": "N/A", "rank": "N/A", "lp": "N/A", "wins": 0, "losses": 0},
         "flex": {"tier": "N/A", "rank": "N/A", "lp": "N/A", "wins": 0, "losses": 0}
@@ -962,78 +2278,158 @@ async def get_ranked_info(puuid: str, region: str) -> RankedInfo:
     if not puuid or puuid == "N/A":
         return ranked_info
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
+    try:
+        league_entries = await client.get_lol_league_v4_entries_by_puuid(region=region, puuid=puuid)
+
+        if not league_entries:
+            return ranked_info
+
+        for entry in league_entries:
+            queue_type = entry.get("queueType", "")
+            tier = str(entry.get("tier", "UNRANKED"))
+            rank = str(entry.get("rank", ""))
+            lp = str(entry.get("leaguePoints", 0))
+            wins = int(entry.get("wins", 0))
+            losses = int(entry.get("losses", 0))
+
+            if queue_type == "RANKED_SOLO_5x5":
+                ranked_info["solo_duo"] = {
+                    "tier": tier,
+                    "rank": rank,
+                    "lp": lp,
+                    "wins": wins,
+                    "losses": losses
+                }
+            elif queue_type == "RANKED_FLEX_SR":
+                ranked_info["flex"] = {
+                    "tier": tier,
+                    "rank": rank,
+                    "lp": lp,
+                    "wins": wins,
+                    "losses": losses
+                }
+    except Exception as e:
+        # Player might not be ranked, this is not an error
+        pass
+
+    return ranked_info
+
+
+# Champion ID to name mapping from Data Dragon, cached on disk (CACHE_DIR/champions.json) together with its game version
+# At startup the table is loaded from the cache and versions.json is checked in the background;
+# champion.json is downloaded again only when Data Dragon reports a new patch
+class ChampionTable(object):
+    VERSIONS_URL = "https://ddragon.leagueoflegends.com/api/versions.json"
+    CHAMPIONS_URL = "https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json"
+
+    def __init__(self):
+        self.cache_file = ""
+        self.version: Optional[str] = None
+        self.names: Dict[int, str] = {}
+        self.initialized = False
+        self.init_task: Optional[asyncio.Task] = None
+        self.refresh_task: Optional[asyncio.Task] = None
+
+    def configure(self, cache_file: str):
+        self.cache_file = cache_file
+
+    # Loads the champion table saved by a previous run, if any
+    def load_cache(self):
+        if not self.cache_file:
+            return
         try:
-            league_entries = await client.get_lol_league_v4_entries_by_puuid(region=region, puuid=puuid)
-
-            if not league_entries:
-                return ranked_info
-
-            for entry in league_entries:
-                queue_type = entry.get("queueType", "")
-                tier = str(entry.get("tier", "UNRANKED"))
-                rank = str(entry.get("rank", ""))
-                lp = str(entry.get("leaguePoints", 0))
-                wins = int(entry.get("wins", 0))
-                losses = int(entry.get("losses", 0))
-
-                if queue_type == "RANKED_SOLO_5x5":
-                    ranked_info["solo_duo"] = {
-                        "tier": tier,
-                        "rank": rank,
-                        "lp": lp,
-                        "wins": wins,
-                        "losses": losses
-                    }
-                elif queue_type == "RANKED_FLEX_SR":
-                    ranked_info["flex"] = {
-                        "tier": tier,
-                        "rank": rank,
-                        "lp": lp,
-                        "wins": wins,
-                        "losses": losses
-                    }
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            names = {int(champ_id): name for champ_id, name in data.get("champions", {}).items()}
+        except FileNotFoundError:
+            return
         except Exception as e:
-            # Player might not be ranked, this is not an error
-            pass
+            print(f"* Warning: Cannot load cached champion names from '{self.cache_file}': {e}")
+            return
+        if names:
+            self.version = data.get("version")
+            self.names = names
+
+    def save_cache(self):
+        if not self.cache_file:
+            return
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": self.version, "champions": self.names}, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"* Warning: Cannot save champion names cache to '{self.cache_file}': {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
 
-    return ranked_info
+    # Downloads champion.json if Data Dragon has a newer version than the one we have (blocking)
+    def update(self):
+        try:
+            versions_response = req.get(self.VERSIONS_URL, timeout=5)
+            if versions_response.status_code != 200:
+                return
+            latest_version = versions_response.json()[0]
+            if latest_version == self.version and self.names:
+                return
+
+            champions_response = req.get(self.CHAMPIONS_URL.format(version=latest_version), timeout=5)
+            if champions_response.status_code != 200:
+                return
+            names = {}
+            for champion_name, champion_info in champions_response.json().get("data", {}).items():
+                champ_id = int(champion_info.get("key", 0))
+                if champ_id:
+                    names[champ_id] = champion_name
+        except Exception:
+            # If Data Dragon fails, we keep using the cached table (if any)
+            return
+
+        if names:
+            self.version = latest_version
+            self.names = names
+            self.save_cache()
+
+    async def initialize(self):
+        await asyncio.to_thread(self.load_cache)
+        if self.names:
+            # Cached table is good enough for now, check for a new patch in the background
+            self.refresh_task = asyncio.create_task(asyncio.to_thread(self.update))
+        else:
+            await asyncio.to_thread(self.update)
+        self.initialized = True
 
+    # Makes the table available, waits for the download only if there is no cached copy yet
+    async def ensure_loaded(self):
+        if self.initialized:
+            return
+        if self.init_task is None:
+            self.init_task = asyncio.create_task(self.initialize())
+        await self.init_task
 
-# Gets champion ID to name mapping from Data Dragon
-_champion_id_to_name_cache = None
+    # Gets champion name from champion ID
+    def get_name(self, champion_id: int) -> Optional[str]:
+        if not self.initialized:
+            # Called outside of the async startup path, load the table synchronously
+            self.load_cache()
+            if not self.names:
+                self.update()
+            self.initialized = True
+        return self.names.get(champion_id)
 
 
-# Gets champion name from champion ID using Data Dragon
-def get_champion_name(champion_id: int) -> Optional[str]:
-    global _champion_id_to_name_cache
+champion_table = ChampionTable()
 
-    if _champion_id_to_name_cache is None:
-        _champion_id_to_name_cache = {}
-        try:
-            # Get latest Data Dragon version
-            versions_response = req.get("https://ddragon.leagueoflegends.com/api/versions.json", timeout=5)
-            if versions_response.status_code == 200:
-                versions = versions_response.json()
-                latest_version = versions[0]
-
-                # Get champion data
-                champions_url = f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/en_US/champion.json"
-                champions_response = req.get(champions_url, timeout=5)
-                if champions_response.status_code == 200:
-                    champions_data = champions_response.json().get("data", {})
-                    for champion_name, champion_info in champions_data.items():
-                        champ_id = int(champion_info.get("key", 0))
-                        if champ_id:
-                            _champion_id_to_name_cache[champ_id] = champion_name
-        except Exception:
-            # If Data Dragon fails, this will return None
-            pass
 
+# Gets champion name from champion ID using Data Dragon
+def get_champion_name(champion_id: int) -> Optional[str]:
     if not champion_id:
         return None
 
-    return _champion_id_to_name_cache.get(champion_id)
+    return champion_table.get_name(champion_id)
 
 
 # Returns name when available, otherwise fall back to numeric identifier
@@ -1048,368 +2444,592 @@ def format_named_value(name: Optional[str], identifier: Optional[int]) -> str:
 
 
 # Gets champion mastery information
-async def get_champion_mastery(puuid: str, region: str, top_n: int = 3):
+async def get_champion_mastery(client: RiotAPIClient, puuid: str, region: str, top_n: int = 3):
     mastery_info = []
 
     if not puuid or puuid == "N/A":
         return mastery_info
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
-        try:
-            champion_masteries = await client.get_lol_champion_v4_top_masteries_by_puuid(region=region, puuid=puuid)
-
-            if not champion_masteries:
-                return mastery_info
-
-            # Sort by mastery points and get top N
-            sorted_masteries = sorted(champion_masteries, key=lambda x: x.get("championPoints", 0), reverse=True)[:top_n]
-
-            for mastery in sorted_masteries:
-                champion_id = mastery.get("championId", 0)
-                champion_level = mastery.get("championLevel", 0)
-                champion_points = mastery.get("championPoints", 0)
-                champion_name = get_champion_name(champion_id)
-                if not champion_name:
-                    champion_name = str(champion_id) if champion_id else "Unknown"
-                mastery_info.append({
-                    "champion_id": champion_id,
-                    "champion_name": champion_name,
-                    "level": champion_level,
-                    "points": champion_points
-                })
-        except Exception as e:
-            # Champion mastery might not be available, this is not an error
-            pass
+    try:
+        champion_masteries = await client.get_lol_champion_v4_top_masteries_by_puuid(region=region, puuid=puuid)
+
+        if not champion_masteries:
+            return mastery_info
+
+        # Sort by mastery points and get top N
+        sorted_masteries = sorted(champion_masteries, key=lambda x: x.get("championPoints", 0), reverse=True)[:top_n]
+
+        for mastery in sorted_masteries:
+            champion_id = mastery.get("championId", 0)
+            champion_level = mastery.get("championLevel", 0)
+            champion_points = mastery.get("championPoints", 0)
+            champion_name = get_champion_name(champion_id)
+            if not champion_name:
+                champion_name = str(champion_id) if champion_id else "Unknown"
+            mastery_info.append({
+                "champion_id": champion_id,
+                "champion_name": champion_name,
+                "level": champion_level,
+                "points": champion_points
+            })
+    except Exception as e:
+        # Champion mastery might not be available, this is not an error
+        pass
 
     return mastery_info
 
 
-# Checks if the player is currently in game
-async def is_user_in_match(puuid: str, region: str):
+# Active game of the user returned by spectator-v5 API, fetched once per check and shared by the in-game check,
+# the current match printer and the custom game snapshot, so all of them see the same game
+class LiveGameSnapshot(object):
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
+    def __init__(self, current_match: Optional[dict] = None):
+        self.current_match = current_match or {}
+        self.fetched_ts = int(time.time())
 
-        try:
-            current_match = await client.get_lol_spectator_v5_active_game_by_summoner(region=region, puuid=puuid)
-            if current_match:
-                return True
-        except Exception:
+    @property
+    def in_game(self) -> bool:
+        return bool(self.current_match)
+
+
+# Fetches the active game of the user; no active game (404) or any other error gives an empty snapshot
+async def fetch_live_game_snapshot(client: RiotAPIClient, puuid: str, region: str) -> LiveGameSnapshot:
+
+    try:
+        return LiveGameSnapshot(await client.get_lol_spectator_v5_active_game_by_summoner(region=region, puuid=puuid))
+    except Exception:
+        return LiveGameSnapshot()
+
+
+# Checks if the player is currently in game
+def is_user_in_match(live_game: LiveGameSnapshot) -> bool:
+    return live_game.in_game
+
+
+# Predicts when the current game ends from its spectator start time and durations of the user's past matches
+# in the same game mode, so checks are sparse mid-game and dense (with back-off) around the time the finished
+# match is expected to show up in the match history
+class GameEndPredictor(object):
+    # Past matches (of the game mode, otherwise of all modes) needed for a prediction
+    MIN_SAMPLES = 5
+    # Checks get back to LOL_ACTIVE_CHECK_INTERVAL once this share of past matches as long as the current one ended
+    EARLY_END_QUANTILE = 0.02
+    # Longest interval between checks mid-game; in seconds
+    MAX_MIDGAME_INTERVAL = 300
+    # Expected delay between the game end and the match showing up in the match history, learnt from found matches
+    DEFAULT_PUBLISH_DELAY = 60
+    # First interval between checks after the expected publication time, every next one is 1.5 times longer
+    POST_GAME_INTERVAL = 10
+    POST_GAME_BACKOFF = 1.5
+    # Spectator and match history start times of the same game can differ a bit
+    MAX_START_DIFF = 300
+
+    def __init__(self):
+        # Sorted durations by game mode, None holds all modes
+        self.durations: Dict[Optional[str], List[int]] = {}
+        self.publish_delay = float(self.DEFAULT_PUBLISH_DELAY)
+        self.published_start_ts = 0
+        self.last_check_ts = 0.0
+        self.reset()
+
+    def reset(self):
+        self.game_start_ts = 0
+        self.game_mode = None
+        self.last_in_game_ts = 0
+        self.ended_ts = 0
+
+    def add_duration(self, game_mode: Optional[str], duration: int):
+        if not 60 <= duration <= 4 * 3600:
+            return
+        for key in {game_mode, None}:
+            bisect.insort(self.durations.setdefault(key, []), duration)
+
+    def load_history(self, history: Mapping[int, Tuple[int, Optional[str]]]):
+        for start_ts, (stop_ts, game_mode) in history.items():
+            if stop_ts:
+                self.add_duration(game_mode, stop_ts - start_ts)
+
+    # Returns the time from which the current game may end (EARLY_END_QUANTILE of past matches longer than elapsed time)
+    def early_end_ts(self, now: float) -> Optional[float]:
+        samples = self.durations.get(self.game_mode, [])
+        if len(samples) < self.MIN_SAMPLES:
+            samples = self.durations.get(None, [])
+
+        longer = samples[bisect.bisect_right(samples, now - self.game_start_ts):]
+        if len(longer) < self.MIN_SAMPLES:
+            return None
+        return self.game_start_ts + longer[int(len(longer) * self.EARLY_END_QUANTILE)]
+
+    # Follows the game the user currently plays
+    def track(self, live_game: LiveGameSnapshot):
+        current_match = live_game.current_match
+        start_ts = int((current_match.get("gameStartTime") or 0) / 1000)
+        if start_ts < 1000000000:
+            start_ts = live_game.fetched_ts - int(current_match.get("gameLength") or 0)
+
+        # Spectator data can still show the game for a while after its match was found
+        if abs(start_ts - self.published_start_ts) <= self.MAX_START_DIFF:
+            return
+
+        gamemode_raw = current_match.get("gameMode")
+        self.game_start_ts = start_ts
+        self.game_mode = game_modes_mapping.get(gamemode_raw, gamemode_raw)
+        self.last_in_game_ts = live_game.fetched_ts
+        self.ended_ts = 0
+
+    def game_ended(self, ended_ts: int):
+        if self.game_start_ts:
+            self.ended_ts = ended_ts
+
+    # Learns from the newest match found in match history; returns True if it is the followed game
+    def match_published(self, found_ts: float, start_ts: int, stop_ts: int) -> bool:
+        if not self.game_start_ts or not start_ts or not stop_ts or abs(start_ts - self.game_start_ts) > self.MAX_START_DIFF:
             return False
 
+        self.add_duration(self.game_mode, stop_ts - start_ts)
+        # Only matches found by the dense checks after the game end tell how long the publication takes;
+        # the match showed up somewhere between the previous check and this one
+        if self.ended_ts and 0 < found_ts - stop_ts < 3600:
+            published_ts = (found_ts + max(self.last_check_ts, stop_ts)) / 2
+            self.publish_delay = 0.7 * self.publish_delay + 0.3 * (published_ts - stop_ts)
+        self.published_start_ts = self.game_start_ts
+        self.reset()
+        return True
+
+    def record_check(self, check_ts: float):
+        self.last_check_ts = check_ts
+
+    # Returns True while the finished game is not in the match history yet (giving up a while after it was expected)
+    def awaiting_match(self, now: float) -> bool:
+        return bool(self.ended_ts) and now - self.ended_ts <= LOL_CHECK_INTERVAL + self.publish_delay
+
+    # Returns number of seconds from check_ts to the next check while the user is in game or the finished match is awaited
+    def get_interval(self, check_ts: float, in_game: bool) -> float:
+        if in_game:
+            early_end_ts = self.early_end_ts(check_ts) if self.game_start_ts else None
+            if early_end_ts:
+                return min(max(early_end_ts - check_ts, LOL_ACTIVE_CHECK_INTERVAL), max(self.MAX_MIDGAME_INTERVAL, LOL_ACTIVE_CHECK_INTERVAL))
+            return LOL_ACTIVE_CHECK_INTERVAL
+
+        if self.ended_ts:
+            # The game ended somewhere between the last two checks
+            publish_ts = (self.last_in_game_ts + self.ended_ts) / 2 + self.publish_delay
+            if check_ts < publish_ts:
+                interval = publish_ts - check_ts
+            else:
+                interval = max(self.POST_GAME_INTERVAL, (check_ts - publish_ts) * (self.POST_GAME_BACKOFF - 1))
+            return min(max(interval, self.POST_GAME_INTERVAL), LOL_ACTIVE_CHECK_INTERVAL)
+
+        return LOL_ACTIVE_CHECK_INTERVAL
+
 
 # Prints details of the current player's match (user is in game)
-async def print_current_match(puuid: str, riotid_name: str, region: str, last_match_start_ts: int, last_match_stop_ts: int, status_notification_flag: bool):
+def print_current_match(live_game: LiveGameSnapshot, riotid_name: str, last_match_start_ts: int, last_match_stop_ts: int, status_notification_flag: bool):
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
+    current_match = live_game.current_match
 
-        try:
-            current_match = await client.get_lol_spectator_v5_active_game_by_summoner(region=region, puuid=puuid)
-        except Exception:
-            current_match = False
+    if current_match:
 
-        if current_match:
+        match_id = current_match.get("gameId", 0)
+        match_start_ts = int((current_match.get("gameStartTime", 0)) / 1000)
+        match_duration = current_match.get("gameLength", 0)
 
-            match_id = current_match.get("gameId", 0)
-            match_start_ts = int((current_match.get("gameStartTime", 0)) / 1000)
-            match_duration = current_match.get("gameLength", 0)
+        gamemode_raw = current_match.get("gameMode")
+        gamemode = game_modes_mapping.get(gamemode_raw, gamemode_raw or "Unknown")
+        queue_id = current_match.get("gameQueueConfigId")
+        map_id = current_match.get("mapId")
+        game_type_raw = current_match.get("gameType")
+        game_type = humanize_game_type(game_type_raw)
+        game_version_raw = current_match.get("gameVersion")
+        game_version = format_game_version_label(game_version_raw)
 
-            gamemode_raw = current_match.get("gameMode")
-            gamemode = game_modes_mapping.get(gamemode_raw, gamemode_raw or "Unknown")
-            queue_id = current_match.get("gameQueueConfigId")
-            map_id = current_match.get("mapId")
-            game_type_raw = current_match.get("gameType")
-            game_type = humanize_game_type(game_type_raw)
-            game_version_raw = current_match.get("gameVersion")
-            game_version = format_game_version_label(game_version_raw)
+        if queue_id is not None:
+            queue_desc = format_named_value(game_queue_mapping.get(queue_id), queue_id)
+        else:
+            queue_desc = "Unknown"
 
-            if queue_id is not None:
-                queue_desc = format_named_value(game_queue_mapping.get(queue_id), queue_id)
-            else:
-                queue_desc = "Unknown"
+        if map_id is not None:
+            map_desc = format_named_value(map_id_mapping.get(map_id), map_id)
+        else:
+            map_desc = "Unknown"
 
-            if map_id is not None:
-                map_desc = format_named_value(map_id_mapping.get(map_id), map_id)
-            else:
-                map_desc = "Unknown"
+        if match_start_ts < 1000000000:
+            match_start_ts = int(time.time())
+
+        print(f"*** LoL user {riotid_name} is in game now (after {calculate_timespan(match_start_ts, int(last_match_stop_ts))})\n")
+
+        print(f"User played last time:\t\t{get_range_of_dates_from_tss(last_match_start_ts, last_match_stop_ts)}\n")
 
-            if match_start_ts < 1000000000:
-                match_start_ts = int(time.time())
+        print(f"Match ID:\t\t\t{match_id}")
+        print(f"Game mode:\t\t\t{gamemode}")
+        print(f"Queue:\t\t\t\t{queue_desc}")
+        print(f"Map:\t\t\t\t{map_desc}")
+        print(f"Game type:\t\t\t{game_type}")
+        print(f"Game version:\t\t\t{game_version}")
 
-            print(f"*** LoL user {riotid_name} is in game now (after {calculate_timespan(match_start_ts, int(last_match_stop_ts))})\n")
+        print(f"\nMatch start date:\t\t{get_date_from_ts(match_start_ts)}")
 
-            print(f"User played last time:\t\t{get_range_of_dates_from_tss(last_match_start_ts, last_match_stop_ts)}\n")
+        if match_duration > 0:
+            current_match_duration = display_time(int(match_duration))
+        else:
+            current_match_duration = "just starting ..."
+            match_duration = 0
 
-            print(f"Match ID:\t\t\t{match_id}")
-            print(f"Game mode:\t\t\t{gamemode}")
-            print(f"Queue:\t\t\t\t{queue_desc}")
-            print(f"Map:\t\t\t\t{map_desc}")
-            print(f"Game type:\t\t\t{game_type}")
-            print(f"Game version:\t\t\t{game_version}")
+        print(f"Match duration:\t\t\t{current_match_duration}")
 
-            print(f"\nMatch start date:\t\t{get_date_from_ts(match_start_ts)}")
+        current_teams = []
+        detailed_teams = {}
+        u_champion_id = 0
+        u_champion_name = None
+        u_teamid = None
 
-            if match_duration > 0:
-                current_match_duration = display_time(int(match_duration))
+        for p in current_match.get("participants", []):
+            u_riotid = p.get("riotId")
+            if u_riotid:
+                u_riotid_name = u_riotid.split('#', 1)[0]
+                # u_riotid_tag=u_riotid.split('#', 1)[1]
             else:
-                current_match_duration = "just starting ..."
-                match_duration = 0
-
-            print(f"Match duration:\t\t\t{current_match_duration}")
-
-            current_teams = []
-            detailed_teams = {}
-            u_champion_id = 0
-            u_champion_name = None
-            u_teamid = None
-
-            for p in current_match.get("participants", []):
-                u_riotid = p.get("riotId")
-                if u_riotid:
-                    u_riotid_name = u_riotid.split('#', 1)[0]
-                    # u_riotid_tag=u_riotid.split('#', 1)[1]
-                else:
-                    u_riotid_name = "unknown"
+                u_riotid_name = "unknown"
 
-                p_teamid = p.get("teamId", 0)
+            p_teamid = p.get("teamId", 0)
 
-                add_new_team_member(current_teams, p_teamid, u_riotid_name)
+            add_new_team_member(current_teams, p_teamid, u_riotid_name)
 
-                champion_id = p.get("championId", 0)
-                champion_name = get_champion_name(champion_id) if champion_id else None
-                champion_display = format_named_value(champion_name, champion_id)
+            champion_id = p.get("championId", 0)
+            champion_name = get_champion_name(champion_id) if champion_id else None
+            champion_display = format_named_value(champion_name, champion_id)
 
-                member_display = u_riotid_name
-                if champion_display != "Unknown":
-                    member_display = f"{u_riotid_name} ({champion_display})"
-                detailed_teams.setdefault(p_teamid, []).append(member_display)
+            member_display = u_riotid_name
+            if champion_display != "Unknown":
+                member_display = f"{u_riotid_name} ({champion_display})"
+            detailed_teams.setdefault(p_teamid, []).append(member_display)
 
-                if u_riotid_name == riotid_name:
-                    u_champion_id = champion_id
-                    u_champion_name = champion_name
-                    u_teamid = p_teamid
+            if u_riotid_name == riotid_name:
+                u_champion_id = champion_id
+                u_champion_name = champion_name
+                u_teamid = p_teamid
 
-            champion_line = format_named_value(u_champion_name, u_champion_id)
-            print(f"\nChampion:\t\t\t{champion_line}")
+        champion_line = format_named_value(u_champion_name, u_champion_id)
+        print(f"\nChampion:\t\t\t{champion_line}")
 
-            current_teams_number = len(current_teams)
-            print(f"Teams:\t\t\t\t{current_teams_number}")
+        current_teams_number = len(current_teams)
+        print(f"Teams:\t\t\t\t{current_teams_number}")
 
-            current_teams_str_lines = []
-            for team_index, team in enumerate(current_teams):
-                if team_index == 0:
-                    print()
-                else:
-                    print()
-                    current_teams_str_lines.append("")
-                # Add star marker if this is the monitored user's team
-                team_marker = " ⭐" if u_teamid is not None and team['id'] == u_teamid else ""
-                teamid_str = f"Team id {team['id']}:{team_marker}"
-                print(teamid_str)
-                current_teams_str_lines.append(teamid_str)
-
-                members_to_print = detailed_teams.get(team["id"], team["members"])
-                for member in members_to_print:
-                    member_str = f"- {member}"
-                    current_teams_str_lines.append(member_str)
-                    print(member_str)
-
-            current_teams_str = "\n".join(current_teams_str_lines) + "\n" if current_teams_str_lines else ""
-
-            banned_champions = current_match.get("bannedChampions") or []
-            banned_champions_str = ""
-            ban_lines = []
-            if banned_champions:
-                bans_by_team = {}
-                for ban in banned_champions:
-                    team_id = ban.get("teamId", 0)
-                    champ_id = ban.get("championId", 0)
-                    pick_turn = ban.get("pickTurn")
-                    if champ_id and champ_id > 0:
-                        champ_display = format_named_value(get_champion_name(champ_id), champ_id)
-                    else:
-                        champ_display = "No ban"
-                    bans_by_team.setdefault(team_id, []).append((pick_turn, champ_display))
-
-                ban_lines, shared_pool = format_banned_champions_output(bans_by_team)
-                if ban_lines:
-                    print("\nBanned champions:\n")
-                    for line in ban_lines:
-                        if line:
-                            print(line)
-                        else:
-                            print()
-                    banned_champions_str = "\n".join(ban_lines) + "\n"
+        current_teams_str_lines = []
+        for team_index, team in enumerate(current_teams):
+            if team_index == 0:
+                print()
+            else:
+                print()
+                current_teams_str_lines.append("")
+            # Add star marker if this is the monitored user's team
+            team_marker = " ⭐" if u_teamid is not None and team['id'] == u_teamid else ""
+            teamid_str = f"Team id {team['id']}:{team_marker}"
+            print(teamid_str)
+            current_teams_str_lines.append(teamid_str)
 
-            m_subject = f"LoL user {riotid_name} is in game now (after {calculate_timespan(match_start_ts, int(last_match_stop_ts), show_seconds=False)} - {get_short_date_from_ts(last_match_stop_ts)})"
-            bans_email_section = f"\nBanned champions:\n\n{banned_champions_str}" if banned_champions_str else ""
-            m_body = (
-                f"LoL user {riotid_name} is in game now (after {calculate_timespan(match_start_ts, int(last_match_stop_ts))})\n\n"
-                f"User played last time: {get_range_of_dates_from_tss(last_match_start_ts, last_match_stop_ts)}\n\n"
-                f"Match ID: {match_id}\nGame mode: {gamemode}\nQueue: {queue_desc}\nMap: {map_desc}\nGame type: {game_type}\nGame version: {game_version}\n\n"
-                f"Match start date: {get_date_from_ts(match_start_ts)}\nMatch duration: {current_match_duration}\n\n"
-                f"Champion: {champion_line}\nTeams: {current_teams_number}\n\n{current_teams_str}{bans_email_section}"
-                f"{get_cur_ts(nl_ch + 'Timestamp: ')}"
-            )
+            members_to_print = detailed_teams.get(team["id"], team["members"])
+            for member in members_to_print:
+                member_str = f"- {member}"
+                current_teams_str_lines.append(member_str)
+                print(member_str)
 
-            # HTML version
-            bans_email_section_html = f"<br><b>Banned champions:</b><br><br>{format_banned_champions_html(ban_lines)}" if banned_champions_str else ""
-            current_teams_html = format_teams_html(current_teams_str_lines, riotid_name)
-            timespan_str = calculate_timespan(match_start_ts, int(last_match_stop_ts))
-            m_body_html = (
-                f"<html><head></head><body>"
-                f"LoL user <b>{html.escape(riotid_name)}</b> is in game now (after <b>{html.escape(timespan_str)}</b>)<br><br>"
-                f"User played last time: <b>{html.escape(get_range_of_dates_from_tss(last_match_start_ts, last_match_stop_ts))}</b><br><br>"
-                f"Match ID: {html.escape(str(match_id))}<br>"
-                f"Game mode: <b>{html.escape(gamemode)}</b><br>"
-                f"Queue: {html.escape(queue_desc)}<br>"
-                f"Map: {html.escape(map_desc)}<br>"
-                f"Game type: {html.escape(game_type)}<br>"
-                f"Game version: {html.escape(game_version)}<br><br>"
-                f"Match start date: <b>{html.escape(get_date_from_ts(match_start_ts))}</b><br>"
-                f"Match duration: {html.escape(current_match_duration)}<br><br>"
-                f"Champion: <b>{html.escape(champion_line)}</b><br>"
-                f"Teams: {current_teams_number}<br><br>"
-                f"{current_teams_html}{bans_email_section_html}"
-                f"{get_cur_ts('<br>Timestamp: ')}"
-                f"</body></html>"
-            )
+        current_teams_str = "\n".join(current_teams_str_lines) + "\n" if current_teams_str_lines else ""
+
+        banned_champions = current_match.get("bannedChampions") or []
+        banned_champions_str = ""
+        ban_lines = []
+        if banned_champions:
+            bans_by_team = {}
+            for ban in banned_champions:
+                team_id = ban.get("teamId", 0)
+                champ_id = ban.get("championId", 0)
+                pick_turn = ban.get("pickTurn")
+                if champ_id and champ_id > 0:
+                    champ_display = format_named_value(get_champion_name(champ_id), champ_id)
+                else:
+                    champ_display = "No ban"
+                bans_by_team.setdefault(team_id, []).append((pick_turn, champ_display))
+
+            ban_lines, shared_pool = format_banned_champions_output(bans_by_team)
+            if ban_lines:
+                print("\nBanned champions:\n")
+                for line in ban_lines:
+                    if line:
+                        print(line)
+                    else:
+                        print()
+                banned_champions_str = "\n".join(ban_lines) + "\n"
+
+        m_subject = f"LoL user {riotid_name} is in game now (after {calculate_timespan(match_start_ts, int(last_match_stop_ts), show_seconds=False)} - {get_short_date_from_ts(last_match_stop_ts)})"
+        bans_email_section = f"\nBanned champions:\n\n{banned_champions_str}" if banned_champions_str else ""
+        m_body = (
+            f"LoL user {riotid_name} is in game now (after {calculate_timespan(match_start_ts, int(last_match_stop_ts))})\n\n"
+            f"User played last time: {get_range_of_dates_from_tss(last_match_start_ts, last_match_stop_ts)}\n\n"
+            f"Match ID: {match_id}\nGame mode: {gamemode}\nQueue: {queue_desc}\nMap: {map_desc}\nGame type: {game_type}\nGame version: {game_version}\n\n"
+            f"Match start date: {get_date_from_ts(match_start_ts)}\nMatch duration: {current_match_duration}\n\n"
+            f"Champion: {champion_line}\nTeams: {current_teams_number}\n\n{current_teams_str}{bans_email_section}"
+            f"{get_cur_ts(nl_ch + 'Timestamp: ')}"
+        )
+
+        # HTML version
+        bans_email_section_html = f"<br><b>Banned champions:</b><br><br>{format_banned_champions_html(ban_lines)}" if banned_champions_str else ""
+        current_teams_html = format_teams_html(current_teams_str_lines, riotid_name)
+        timespan_str = calculate_timespan(match_start_ts, int(last_match_stop_ts))
+        m_body_html = (
+            f"<html><head></head><body>"
+            f"LoL user <b>{html.escape(riotid_name)}</b> is in game now (after <b>{html.escape(timespan_str)}</b>)<br><br>"
+            f"User played last time: <b>{html.escape(get_range_of_dates_from_tss(last_match_start_ts, last_match_stop_ts))}</b><br><br>"
+            f"Match ID: {html.escape(str(match_id))}<br>"
+            f"Game mode: <b>{html.escape(gamemode)}</b><br>"
+            f"Queue: {html.escape(queue_desc)}<br>"
+            f"Map: {html.escape(map_desc)}<br>"
+            f"Game type: {html.escape(game_type)}<br>"
+            f"Game version: {html.escape(game_version)}<br><br>"
+            f"Match start date: <b>{html.escape(get_date_from_ts(match_start_ts))}</b><br>"
+            f"Match duration: {html.escape(current_match_duration)}<br><br>"
+            f"Champion: <b>{html.escape(champion_line)}</b><br>"
+            f"Teams: {current_teams_number}<br><br>"
+            f"{current_teams_html}{bans_email_section_html}"
+            f"{get_cur_ts('<br>Timestamp: ')}"
+            f"</body></html>"
+        )
 
-            if status_notification_flag:
-                print(f"Sending email notification to {RECEIVER_EMAIL}")
-                send_email(m_subject, m_body, m_body_html, SMTP_SSL)
+        if status_notification_flag:
+            print(f"Sending email notification to {RECEIVER_EMAIL}")
+            queue_email(m_subject, m_body, m_body_html, SMTP_SSL)
 
-            return match_start_ts
-        else:
-            print("User is not in game currently")
-            return 0
+        return match_start_ts
+    else:
+        print("User is not in game currently")
+        return 0
 
 
 # Gets recent match IDs
-async def get_latest_match_ids(puuid: str, region: str, count: int = 10, start: int = 0) -> list:
+async def get_latest_match_ids(client: RiotAPIClient, puuid: str, region: str, count: int = 10, start: int = 0) -> list:
     """
     Fetches match IDs from Riot API with pagination support.
     The Riot API has a maximum limit of 100 matches per request.
     For requests > 100, this function automatically paginates.
 
     Args:
+        client: Shared Riot API client
         puuid: Player's PUUID
         region: Region code
         count: Number of matches to fetch
         start: Starting index (0-based, where 0 is the newest match)
     """
+    try:
+        return await fetch_match_ids(client, puuid, region, count, start)
+    except Exception as e:
+        report_match_ids_error(puuid, e)
+        return []
+
+
+# Fetches match IDs like get_latest_match_ids(), but lets errors propagate, so callers can tell them apart from the end of history
+async def fetch_match_ids(client: RiotAPIClient, puuid: str, region: str, count: int = 10, start: int = 0) -> list:
     MAX_MATCHES_PER_REQUEST = 100
     all_matches = []
 
-    try:
-        async with RiotAPIClient(default_headers={'X-Riot-Token': RIOT_API_KEY}) as client:
-            # If count <= 100, make a single request
-            if count <= MAX_MATCHES_PER_REQUEST:
-                matches = await client.get_lol_match_v5_match_ids_by_puuid(
-                    region=REGION_TO_CONTINENT.get(region, 'europe'),
-                    puuid=puuid,
-                    queries={'start': start, 'count': count}
-                )
-                return matches if matches else []
-
-            # For counts > 100, paginate with multiple requests
-            current_start = start
-            remaining = count
-
-            while remaining > 0:
-                # Request up to MAX_MATCHES_PER_REQUEST matches per call
-                request_count = min(remaining, MAX_MATCHES_PER_REQUEST)
-
-                matches = await client.get_lol_match_v5_match_ids_by_puuid(
-                    region=REGION_TO_CONTINENT.get(region, 'europe'),
-                    puuid=puuid,
-                    queries={'start': current_start, 'count': request_count}
-                )
-
-                if not matches:
-                    # No more matches available
-                    break
+    # If count <= 100, make a single request
+    if count <= MAX_MATCHES_PER_REQUEST:
+        matches = await client.get_lol_match_v5_match_ids_by_puuid(
+            region=REGION_TO_CONTINENT.get(region, 'europe'),
+            puuid=puuid,
+            queries={'start': start, 'count': count}
+        )
+        return matches if matches else []
+
+    # For counts > 100, paginate with multiple requests
+    current_start = start
+    remaining = count
+
+    while remaining > 0:
+        # Request up to MAX_MATCHES_PER_REQUEST matches per call
+        request_count = min(remaining, MAX_MATCHES_PER_REQUEST)
+
+        matches = await client.get_lol_match_v5_match_ids_by_puuid(
+            region=REGION_TO_CONTINENT.get(region, 'europe'),
+            puuid=puuid,
+            queries={'start': current_start, 'count': request_count}
+        )
+
+        if not matches:
+            # No more matches available
+            break
 
-                all_matches.extend(matches)
+        all_matches.extend(matches)
 
-                # If we got fewer matches than requested, we've reached the end
-                if len(matches) < request_count:
-                    break
+        # If we got fewer matches than requested, we've reached the end
+        if len(matches) < request_count:
+            break
 
-                current_start += len(matches)
-                remaining -= len(matches)
+        current_start += len(matches)
+        remaining -= len(matches)
 
-            return all_matches[:count]  # Return exactly the requested count (or less if not available)
+    return all_matches[:count]  # Return exactly the requested count (or less if not available)
 
-    except Exception as e:
-        print(f"* Error: Cannot fetch latest match IDs: {e}")
-        print_cur_ts("Timestamp:\t\t\t")
-        return []
 
+# Reports failed fetch of match IDs and drops the cached PUUID if Riot API rejected it
+def report_match_ids_error(puuid: str, error: Exception):
+    print(f"* Error: Cannot fetch latest match IDs: {error}")
+    if puuid_cache.invalidate(puuid, error):
+        print("* Cached PUUID was rejected by Riot API and has been removed from the cache, Riot ID will be resolved again on the next run")
+    print_cur_ts("Timestamp:\t\t\t")
 
-# Fetches all available match IDs to determine total count
-async def get_total_match_count(puuid: str, region: str) -> int:
-    MAX_MATCHES_PER_REQUEST = 100
-    all_matches = []
-    start = 0
 
-    try:
-        async with RiotAPIClient(default_headers={'X-Riot-Token': RIOT_API_KEY}) as client:
-            while True:
-                matches = await client.get_lol_match_v5_match_ids_by_puuid(
-                    region=REGION_TO_CONTINENT.get(region, 'europe'),
-                    puuid=puuid,
-                    queries={'start': start, 'count': MAX_MATCHES_PER_REQUEST}
-                )
+# Detects new matches in user's match history by probing only its head (the newest match ID) on every check
+# The history is fetched in wider windows only when the head is not a known match, until a known match is reached
+class NewMatchDetector(object):
 
-                if not matches:
-                    break
+    HEAD_PROBE_COUNT = 1
+    MIN_WINDOW = 10
+    MAX_WINDOW = 100
+    # Failed attempts after which a match is given up, so it does not hold back newer matches forever
+    MAX_FAILURES = 3
 
-                all_matches.extend(matches)
+    def __init__(self, known_match_ids=()):
+        self.known_match_ids = set(known_match_ids)
+        self.failures: Dict[str, int] = {}
 
-                # If we got fewer than requested, we've reached the end
-                if len(matches) < MAX_MATCHES_PER_REQUEST:
-                    break
+    # Returns IDs of new matches (newest first); they are known only after mark_processed() is called for them,
+    # so a match which failed to be processed is detected again on the next check
+    # Returns None if fetching any part of the history failed, as a partial list would let older new matches be skipped
+    async def poll(self, client: RiotAPIClient, puuid: str, region: str) -> Optional[list]:
+        try:
+            return await self.find_new_match_ids(client, puuid, region)
+        except Exception as e:
+            report_match_ids_error(puuid, e)
+            return None
+
+    async def find_new_match_ids(self, client: RiotAPIClient, puuid: str, region: str) -> list:
+
+        head = await fetch_match_ids(client, puuid, region, count=self.HEAD_PROBE_COUNT)
+        if not head or head[0] in self.known_match_ids:
+            return []
 
-                start += len(matches)
+        # Without any known match there is nothing to stop at, so do not go past the first window
+        max_window = self.MAX_WINDOW if self.known_match_ids else self.MIN_WINDOW
 
-            return len(all_matches)
+        new_match_ids = []
+        start = 0
+        window = self.MIN_WINDOW
+
+        while start < max_window:
+            window = min(window, max_window - start)
+            match_ids = await fetch_match_ids(client, puuid, region, count=window, start=start)
+
+            for match_id in match_ids:
+                if match_id in self.known_match_ids:
+                    return new_match_ids
+                new_match_ids.append(match_id)
+
+            if len(match_ids) < window:
+                break
+
+            start += len(match_ids)
+            window *= 2
+
+        return new_match_ids
+
+    def mark_processed(self, match_id: str):
+        self.known_match_ids.add(match_id)
+        self.failures.pop(match_id, None)
+
+    # Records failed processing of the match; returns True if the match is given up (and marked as processed)
+    def mark_failed(self, match_id: str) -> bool:
+        self.failures[match_id] = self.failures.get(match_id, 0) + 1
+        if self.failures[match_id] < self.MAX_FAILURES:
+            return False
+        print(f"* Warning: Giving up on match {match_id} after {self.MAX_FAILURES} failed attempts")
+        self.mark_processed(match_id)
+        return True
+
+
+# Determines total count of available match IDs without downloading all of them
+# A page requested at offset 'start' holds min(max(total - start, 0), 100) IDs, so any non-empty partial page
+# gives the exact total; otherwise the offset is probed exponentially and then narrowed by binary search,
+# which takes O(log n) requests instead of n / 100
+async def get_total_match_count(client: RiotAPIClient, puuid: str, region: str) -> int:
+    MAX_MATCHES_PER_REQUEST = 100
+
+    # Returns number of match IDs on the page starting at the given offset
+    async def get_page_size(start: int) -> int:
+        matches = await client.get_lol_match_v5_match_ids_by_puuid(
+            region=REGION_TO_CONTINENT.get(region, 'europe'),
+            puuid=puuid,
+            queries={'start': start, 'count': MAX_MATCHES_PER_REQUEST}
+        )
+        return len(matches) if matches else 0
+
+    try:
+        # Total is known to be within the <low, high> range (high is None until the end of history is found)
+        low, high = 0, None
+        start = 0
+
+        while high is None:
+            page_size = await get_page_size(start)
+            if page_size == 0:
+                high = start
+            elif page_size < MAX_MATCHES_PER_REQUEST:
+                return start + page_size
+            else:
+                low = start + MAX_MATCHES_PER_REQUEST
+                start = max(start * 2, MAX_MATCHES_PER_REQUEST)
+
+        while low < high:
+            # Probing the lower bound itself always ends the search once the range fits in a single page
+            start = (low + high) // 2 if high - low > MAX_MATCHES_PER_REQUEST else low
+            page_size = await get_page_size(start)
+            if page_size == 0:
+                high = start
+            elif page_size < MAX_MATCHES_PER_REQUEST:
+                return start + page_size
+            else:
+                low = start + MAX_MATCHES_PER_REQUEST
+
+        return low
 
     except Exception as e:
         print(f"* Error: Cannot determine total match count: {e}")
+        if puuid_cache.invalidate(puuid, e):
+            print("* Cached PUUID was rejected by Riot API and has been removed from the cache, Riot ID will be resolved again on the next run")
         return 0
 
 
 # Processes and prints details for a single match id, handling forbidden matches
-async def process_and_print_single_match(match_id: str, puuid: str, riotid_name: str, region: str, status_notification_flag: bool, csv_file_name: Optional[str], cached_match_data: Optional[Any] = None) -> tuple[int, int]:
+# With raise_errors the errors other than forbidden match are raised after being printed, so the caller can retry
+async def process_and_print_single_match(client: RiotAPIClient, match_id: str, puuid: str, riotid_name: str, region: str, status_notification_flag: bool, csv_file_name: Optional[str], cached_match_data: Optional[Any] = None, raise_errors: bool = False) -> tuple[int, int]:
 
     # Use cached match data if provided, otherwise fetch it
     if cached_match_data:
         match = cached_match_data
     else:
-        async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
-            try:
-                match = await client.get_lol_match_v5_match(region=REGION_TO_CONTINENT.get(region, 'europe'), id=match_id)
-            except Exception as e:
-                if getattr(e, 'status', None) == 403:
-                    if INCLUDE_FORBIDDEN_MATCHES:
-                        print(f"Match ID:\t\t\t{match_id}")
-                        print(f"Match details require RSO token")
-                        if status_notification_flag:
-                            m_subject = f"LoL user {riotid_name} new forbidden match detected"
-                            m_body = (f"LoL user {riotid_name} finished a forbidden match whose details are protected (requires RSO token)\n\nMatch ID: {match_id}\n{get_cur_ts(nl_ch + 'Timestamp: ')}")
-                            m_body_html = (
-                                f"<html><head></head><body>"
-                                f"LoL user <b>{html.escape(riotid_name)}</b> finished a forbidden match whose details are protected (requires RSO token)<br><br>"
-                                f"Match ID: {html.escape(str(match_id))}<br>"
-                                f"{get_cur_ts('<br>Timestamp: ')}"
-                                f"</body></html>"
-                            )
-                            print(f"\nSending email notification to {RECEIVER_EMAIL}")
-                            send_email(m_subject, m_body, m_body_html, SMTP_SSL)
-                    return 0, 0
-                else:
-                    print(f"* An unexpected error occurred while processing match {match_id}: {e}")
-                    return 0, 0
+        try:
+            match = await get_match_details(client, match_id, region)
+        except Exception as e:
+            if getattr(e, 'status', None) == 403:
+                if INCLUDE_FORBIDDEN_MATCHES:
+                    print(f"Match ID:\t\t\t{match_id}")
+                    print(f"Match details require RSO token")
+                    if status_notification_flag:
+                        m_subject = f"LoL user {riotid_name} new forbidden match detected"
+                        m_body = (f"LoL user {riotid_name} finished a forbidden match whose details are protected (requires RSO token)\n\nMatch ID: {match_id}\n{get_cur_ts(nl_ch + 'Timestamp: ')}")
+                        m_body_html = (
+                            f"<html><head></head><body>"
+                            f"LoL user <b>{html.escape(riotid_name)}</b> finished a forbidden match whose details are protected (requires RSO token)<br><br>"
+                            f"Match ID: {html.escape(str(match_id))}<br>"
+                            f"{get_cur_ts('<br>Timestamp: ')}"
+                            f"</body></html>"
+                        )
+                        print(f"\nSending email notification to {RECEIVER_EMAIL}")
+                        queue_email(m_subject, m_body, m_body_html, SMTP_SSL)
+                return 0, 0
+            else:
+                print(f"* An unexpected error occurred while processing match {match_id}: {e}")
+                if raise_errors:
+                    raise
+                return 0, 0
 
     try:
         match_info = match.get("info", {})
@@ -1546,15 +3166,29 @@ async def process_and_print_single_match(match_id: str, puuid: str, riotid_name:
                     else:
                         print()
                 banned_champions_email_str = "\n".join(ban_lines) + "\n"
-        if csv_file_name:
+        if csv_file_name or parquet_sink.enabled or match_store.enabled:
             try:
-                team1_str = " ".join(f"'{p}'" for p in teams[0]["members"]) if len(teams) > 0 else ""
-                team2_str = " ".join(f"'{p}'" for p in teams[1]["members"]) if len(teams) > 1 else ""
-                # Convert None values to "N/A" for CSV
-                csv_level = u_level if u_level is not None else "N/A"
-                csv_role = u_role if (u_role is not None and u_role != "NONE") else "N/A"
-                csv_lane = u_lane if (u_lane is not None and u_lane != "NONE") else "N/A"
-                write_csv_entry(csv_file_name, str(datetime.fromtimestamp(match_start_ts)), str(datetime.fromtimestamp(match_stop_ts)), display_time(int(match_duration)), gamemode, u_victory, u_kills, u_deaths, u_assists, u_champion_display, csv_level, csv_role, csv_lane, team1_str, team2_str)
+                record: MatchRecord = {
+                    "match_id": match_id,
+                    "riot_id": riotid_name,
+                    "start_ts": match_start_ts,
+                    "stop_ts": match_stop_ts,
+                    "duration": int(match_duration),
+                    "game_mode": gamemode,
+                    # Values not available (e.g. the user is missing from participants) are saved as None, not as "N/A" placeholders
+                    "victory": u_victory == "Yes" if user_participant else None,
+                    "kills": u_kills,
+                    "deaths": u_deaths,
+                    "assists": u_assists,
+                    "champion": u_champion_display if u_champion_display != "Unknown" else None,
+                    "level": u_level if isinstance(u_level, int) else None,
+                    # "NONE" is how Riot API reports no role / lane
+                    "role": u_role if u_role not in ("NONE", "N/A") else None,
+                    "lane": u_lane if u_lane not in ("NONE", "N/A") else None,
+                    "team1": list(teams[0]["members"]) if len(teams) > 0 else [],
+                    "team2": list(teams[1]["members"]) if len(teams) > 1 else [],
+                }
+                save_match_record(record, csv_file_name, raw_match=match)
             except Exception as e:
                 print(f"* Error: {e}")
 
@@ -1604,7 +3238,7 @@ async def process_and_print_single_match(match_id: str, puuid: str, riotid_name:
                 f"</body></html>"
             )
             print(f"\nSending email notification to {RECEIVER_EMAIL}")
-            send_email(m_subject, m_body, m_body_html, SMTP_SSL)
+            queue_email(m_subject, m_body, m_body_html, SMTP_SSL)
 
         return match_start_ts, match_stop_ts
 
@@ -1625,15 +3259,17 @@ async def process_and_print_single_match(match_id: str, puuid: str, riotid_name:
                         f"</body></html>"
                     )
                     print(f"\nSending email notification to {RECEIVER_EMAIL}")
-                    send_email(m_subject, m_body, m_body_html, SMTP_SSL)
+                    queue_email(m_subject, m_body, m_body_html, SMTP_SSL)
         else:
             print(f"* An unexpected error occurred while processing match {match_id}: {e}")
+            if raise_errors:
+                raise
 
         return 0, 0
 
 
 # Prints history of matches with relevant details
-async def print_match_history(puuid: str, riotid_name: str, region: str, matches_min: int, matches_num: int, csv_file_name):
+async def print_match_history(client: RiotAPIClient, puuid: str, riotid_name: str, region: str, matches_min: int, matches_num: int, csv_file_name):
 
     if matches_min > matches_num:
         return 0, 0
@@ -1645,7 +3281,7 @@ async def print_match_history(puuid: str, riotid_name: str, region: str, matches
 
     # First, fetch all match IDs
     print(f"* Fetching match IDs ({range_size} matches)...")
-    all_fetched_ids = await get_latest_match_ids(puuid, region, count=range_size, start=start_index)
+    all_fetched_ids = await get_latest_match_ids(client, puuid, region, count=range_size, start=start_index)
 
     if not all_fetched_ids:
         print("* Error: No match history found")
@@ -1655,58 +3291,67 @@ async def print_match_history(puuid: str, riotid_name: str, region: str, matches
     # The API returns newest to oldest, so reversing gives us oldest first
     all_fetched_ids = list(reversed(all_fetched_ids))
 
-    print(f"* Processing matches in batches of 10 (oldest to newest)...\n")
+    concurrency = max(1, MATCH_FETCH_CONCURRENCY)
+
+    print(f"* Processing matches (oldest to newest, fetching up to {concurrency} in parallel)...\n")
 
     last_start_ts, last_stop_ts = 0, 0
-    BATCH_SIZE = 10
     processed_count = 0
     accessible_match_ids = []
 
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
-        # Process in batches
-        for batch_start in range(0, len(all_fetched_ids), BATCH_SIZE):
-            batch_end = min(batch_start + BATCH_SIZE, len(all_fetched_ids))
-            batch_ids = all_fetched_ids[batch_start:batch_end]
+    # Match details are fetched ahead in a sliding window of at most 'concurrency' requests,
+    # but awaited in list order, so output and CSV rows keep the oldest-to-newest order
+    fetch_tasks = deque()
+    next_fetch_index = 0
 
-            # Fetch and process this batch
-            for match_id in batch_ids:
-                try:
-                    # Fetch match details
-                    match = await client.get_lol_match_v5_match(region=REGION_TO_CONTINENT.get(region, 'europe'), id=match_id)
+    try:
+        for match_index_in_reversed, match_id in enumerate(all_fetched_ids):
+            # Calculate match number
+            # Since we reversed the list, oldest is at index 0
+            # Match numbers go from matches_num (oldest) down to matches_min (newest)
+            match_number = matches_num - match_index_in_reversed
 
-                    # Calculate match number
-                    # Since we reversed the list, oldest is at index 0
-                    # Match numbers go from matches_num (oldest) down to matches_min (newest)
-                    match_index_in_reversed = all_fetched_ids.index(match_id)
-                    match_number = matches_num - match_index_in_reversed
+            while next_fetch_index < len(all_fetched_ids) and len(fetch_tasks) < concurrency:
+                fetch_tasks.append(asyncio.create_task(get_match_details(client, all_fetched_ids[next_fetch_index], region)))
+                next_fetch_index += 1
 
-                    print(f"Match number:\t\t\t{match_number}\n")
+            fetch_task = fetch_tasks.popleft()
 
-                    # Process and display (this also writes to CSV)
-                    start_ts, stop_ts = await process_and_print_single_match(match_id, puuid, riotid_name, region, False, csv_file_name, cached_match_data=match)
+            try:
+                # Wait for match details
+                match = await fetch_task
 
-                    print("─" * HORIZONTAL_LINE)
+                print(f"Match number:\t\t\t{match_number}\n")
 
-                    accessible_match_ids.append(match_id)
-                    processed_count += 1
+                # Process and display (this also writes to CSV)
+                start_ts, stop_ts = await process_and_print_single_match(client, match_id, puuid, riotid_name, region, False, csv_file_name, cached_match_data=match)
 
-                    # Track the last match for return value (newest match in the range)
-                    if match_index_in_reversed == len(all_fetched_ids) - 1:
-                        last_start_ts, last_stop_ts = start_ts, stop_ts
+                print("─" * HORIZONTAL_LINE)
 
-                except Exception as e:
-                    if getattr(e, 'status', None) == 403:  # Forbidden match
-                        if INCLUDE_FORBIDDEN_MATCHES:
-                            match_index_in_reversed = all_fetched_ids.index(match_id)
-                            match_number = matches_num - match_index_in_reversed
-                            print(f"Match number:\t\t\t{match_number}\n")
-                            print(f"Match ID:\t\t\t{match_id}")
-                            print(f"Match details require RSO token\n")
-                            print("─" * HORIZONTAL_LINE)
-                            accessible_match_ids.append(match_id)
-                            processed_count += 1
-                    else:
-                        print(f"* Warning: Error processing match {match_id}: {e}")
+                accessible_match_ids.append(match_id)
+                processed_count += 1
+
+                # Track the last match for return value (newest match in the range)
+                if match_index_in_reversed == len(all_fetched_ids) - 1:
+                    last_start_ts, last_stop_ts = start_ts, stop_ts
+
+            except Exception as e:
+                if getattr(e, 'status', None) == 403:  # Forbidden match
+                    if INCLUDE_FORBIDDEN_MATCHES:
+                        print(f"Match number:\t\t\t{match_number}\n")
+                        print(f"Match ID:\t\t\t{match_id}")
+                        print(f"Match details require RSO token\n")
+                        print("─" * HORIZONTAL_LINE)
+                        accessible_match_ids.append(match_id)
+                        processed_count += 1
+                else:
+                    print(f"* Warning: Error processing match {match_id}: {e}")
+    finally:
+        # Do not leave in-flight requests behind if processing was interrupted
+        for fetch_task in fetch_tasks:
+            fetch_task.cancel()
+        if fetch_tasks:
+            await asyncio.gather(*fetch_tasks, return_exceptions=True)
 
     if len(accessible_match_ids) < range_size:
         print(f"* Warning: Not enough displayable matches found. Requested {range_size} matches (from #{matches_min} to #{matches_num}), found: {len(accessible_match_ids)}")
@@ -1720,14 +3365,19 @@ async def print_save_recent_matches(riotid: str, region: str, matches_min: int,
     try:
         if csv_file_name:
             init_csv_file(csv_file_name)
+            # History export is a one-off batch, so rows can be buffered
+            open_csv_sink(csv_file_name, flush_rows=CSV_EXPORT_FLUSH_ROWS, flush_interval=CSV_FLUSH_INTERVAL)
     except Exception as e:
         print(f"* Error: {e}")
 
-    puuid = await get_user_puuid(riotid, region)
+    client = await riot_client_manager.get()
+    await champion_table.ensure_loaded()
+
+    puuid = await get_user_puuid(client, riotid, region)
     riotid_name, riotid_tag = get_user_riot_name_tag(riotid)
 
     if puuid:
-        await print_match_history(puuid, riotid_name, region, matches_min, matches_num, csv_file_name)
+        await print_match_history(client, puuid, riotid_name, region, matches_min, matches_num, csv_file_name)
 
 
 # Finds an optional config file
@@ -1769,12 +3419,8 @@ def resolve_executable(path):
 
 
 # Returns a compact snapshot of the current live match with mode, start_ts, and participants
-async def get_current_match_details(puuid: str, region: str) -> dict:
-    async with RiotAPIClient(default_headers={"X-Riot-Token": RIOT_API_KEY}) as client:
-        try:
-            current_match = await client.get_lol_spectator_v5_active_game_by_summoner(region=region, puuid=puuid)
-        except Exception:
-            return {}
+def get_current_match_details(live_game: LiveGameSnapshot) -> dict:
+    current_match = live_game.current_match
 
     if not current_match:
         return {}
@@ -1813,18 +3459,14 @@ async def get_current_match_details(puuid: str, region: str) -> dict:
 
 # Append a CSV row from a live snapshot for custom game matches that never show up in match history
 async def save_custom_match_to_csv(snapshot: dict, riotid_name: str, start_ts: int, stop_ts: int, csv_file_name: str) -> None:
-    if not csv_file_name or not snapshot:
+    if not (csv_file_name or parquet_sink.enabled or match_store.enabled) or not snapshot:
         return
 
     snap_start = int(snapshot.get('start_ts') or 0)
     if snap_start:
         start_ts = snap_start
 
-    start_dt_str = str(datetime.fromtimestamp(start_ts)) if start_ts else ""
-
-    stop_dt_str = str(datetime.fromtimestamp(stop_ts)) if stop_ts else ""
     duration_sec = max(0, (stop_ts or 0) - (start_ts or 0))
-    duration_str = display_time(int(duration_sec))
 
     teams_map = {}  # teamId -> [names]
     for p in snapshot.get("participants", []):
@@ -1835,25 +3477,49 @@ async def save_custom_match_to_csv(snapshot: dict, riotid_name: str, start_ts: i
     team1_members = teams_map.get(team_ids_sorted[0], []) if team_ids_sorted else []
     team2_members = teams_map.get(team_ids_sorted[1], []) if len(team_ids_sorted) > 1 else []
 
-    team1_str = " ".join(f"'{n}'" for n in team1_members)
-    team2_str = " ".join(f"'{n}'" for n in team2_members)
-
-    user_champion = "N/A"
+    user_champion = None
     for p in snapshot.get("participants", []):
         if p.get("riotIdName") == riotid_name:
-            user_champion = p.get("championId", "N/A")
+            user_champion = str(p["championId"]) if p.get("championId") else None
             break
 
-    victory = "N/A"
-    kills = "N/A"
-    deaths = "N/A"
-    assists = "N/A"
-    level = "N/A"
-    role = "N/A"
-    lane = "N/A"
-    game_mode = snapshot.get('mode', 'N/A')
+    # Spectator snapshot does not carry the match result and player statistics
+    record: MatchRecord = {
+        "match_id": None,
+        "riot_id": riotid_name,
+        "start_ts": start_ts or 0,
+        "stop_ts": stop_ts or 0,
+        "duration": int(duration_sec),
+        "game_mode": snapshot.get('mode'),
+        "victory": None,
+        "kills": None,
+        "deaths": None,
+        "assists": None,
+        "champion": user_champion,
+        "level": None,
+        "role": None,
+        "lane": None,
+        "team1": team1_members,
+        "team2": team2_members,
+    }
+
+    save_match_record(record, csv_file_name)
 
-    write_csv_entry(csv_file_name=csv_file_name, start_date_ts=start_dt_str, stop_date_ts=stop_dt_str, duration_ts=duration_str, game_mode=game_mode, victory=victory, kills=kills, deaths=deaths, assists=assists, champion=user_champion, level=level, role=role, lane=lane, team1=team1_str, team2=team2_str)
+
+# Awaits the startup Riot API call with STARTUP_FETCH_TIMEOUT and records its duration in timings
+async def timed_startup_fetch(name: str, coro, timings: dict):
+    started = time.monotonic()
+    try:
+        return await asyncio.wait_for(coro, timeout=STARTUP_FETCH_TIMEOUT or None)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"timed out after {display_time(STARTUP_FETCH_TIMEOUT)}") from None
+    finally:
+        timings[name] = time.monotonic() - started
+
+
+# Returns startup timing breakdown like "summoner 0.31s, ranked 0.28s (total 0.35s)"
+def format_startup_timings(timings: dict, total: float) -> str:
+    return ", ".join(f"{name} {duration:.2f}s" for name, duration in timings.items()) + f" (total {total:.2f}s)"
 
 
 # Main function that monitors gaming activity of the specified LoL user
@@ -1870,13 +3536,19 @@ async def lol_monitor_user(riotid, region, csv_file_name):
     try:
         if csv_file_name:
             init_csv_file(csv_file_name)
+            # Every finished match is flushed right away to keep it safe if the tool crashes
+            open_csv_sink(csv_file_name, flush_rows=1)
     except Exception as e:
         print(f"* Error: {e}")
 
-    puuid = await get_user_puuid(riotid, region)
+    client = await riot_client_manager.get()
+    await champion_table.ensure_loaded()
+    email_queue.resume()
+
+    puuid = await get_user_puuid(client, riotid, region)
 
     if not puuid:
-        sys.exit(2)
+        return 2
 
     riotid_name, riotid_tag = get_user_riot_name_tag(riotid)
 
@@ -1886,26 +3558,59 @@ async def lol_monitor_user(riotid, region, csv_file_name):
         "flex": {"tier": "N/A", "rank": "N/A", "lp": "N/A", "wins": 0, "losses": 0},
     }
     mastery_info = []
+    initial_match_ids = []
 
-    try:
-        summoner_info = await get_summoner_details(puuid, region)
-    except Exception as e:
-        print(f"* Warning: Could not fetch summoner details: {e}")
+    startup_started = time.monotonic()
+    startup_timings = {}
+
+    async def fetch_summoner_details():
+        nonlocal puuid
+        try:
+            return await get_summoner_details(client, puuid, region)
+        except Exception as e:
+            # PUUID might come from the cache and be rejected, in such case retry with the freshly resolved one
+            revalidated_puuid = await revalidate_user_puuid(client, riotid, region, puuid, e)
+            if not revalidated_puuid:
+                raise
+            puuid = revalidated_puuid
+            return await get_summoner_details(client, puuid, region)
+
+    startup_fetches = {
+        "summoner": fetch_summoner_details,
+        "ranked": lambda: get_ranked_info(client, puuid, region),
+        "mastery": lambda: get_champion_mastery(client, puuid, region, top_n=3),
+        "matches": lambda: get_latest_match_ids(client, puuid, region, count=20),
+    }
+
+    # None of the startup calls depend on each other, so they run in parallel, each one with its own timeout
+    async def run_startup_fetches(names):
+        results = await asyncio.gather(*(timed_startup_fetch(name, startup_fetches[name](), startup_timings) for name in names), return_exceptions=True)
+        return dict(zip(names, results))
+
+    startup_puuid = puuid
+    startup_results = await run_startup_fetches(list(startup_fetches))
+
+    # Calls started with the rejected cached PUUID are repeated with the revalidated one
+    if puuid != startup_puuid:
+        failed_names = [name for name, result in startup_results.items() if name != "summoner" and isinstance(result, Exception)]
+        if failed_names:
+            startup_results.update(await run_startup_fetches(failed_names))
+
+    if isinstance(startup_results["summoner"], Exception):
+        print(f"* Warning: Could not fetch summoner details: {startup_results['summoner']}")
         summoner_info = {"summoner_level": "N/A", "revision_date": "N/A"}
+    else:
+        summoner_info = startup_results["summoner"]
 
-    try:
-        ranked_info = await get_ranked_info(puuid, region)
-    except Exception as e:
-        print(f"* Warning: Could not fetch ranked information: {e}")
-        ranked_info = {
-            "solo_duo": {"tier": "N/A", "rank": "N/A", "lp": "N/A", "wins": 0, "losses": 0},
-            "flex": {"tier": "N/A", "rank": "N/A", "lp": "N/A", "wins": 0, "losses": 0},
-        }
+    if isinstance(startup_results["ranked"], Exception):
+        print(f"* Warning: Could not fetch ranked information: {startup_results['ranked']}")
+    else:
+        ranked_info = startup_results["ranked"]
 
-    try:
-        mastery_info = await get_champion_mastery(puuid, region, top_n=3)
-    except Exception as e:
-        print(f"* Warning: Could not fetch champion mastery: {e}")
+    if isinstance(startup_results["mastery"], Exception):
+        print(f"* Warning: Could not fetch champion mastery: {startup_results['mastery']}")
+    else:
+        mastery_info = startup_results["mastery"]
 
     print(f"Riot ID (name#tag):\t\t{riotid}")
     print(f"Riot PUUID:\t\t\t{puuid}")
@@ -1950,30 +3655,47 @@ async def lol_monitor_user(riotid, region, csv_file_name):
 
     print("─" * HORIZONTAL_LINE)
 
-    processed_match_ids = set()
-    initial_match_ids = []
-
     CUSTOM_SAVE_DELAY = LOL_ACTIVE_CHECK_INTERVAL * 2
     current_custom_snapshot = None
     current_match_start_ts = 0
     pending_custom = None
 
-    try:
-        initial_match_ids = await get_latest_match_ids(puuid, region, count=20)
-    except Exception as e:
-        print(f"* Warning: Could not fetch initial match history due to an error: {e}")
+    if isinstance(startup_results["matches"], Exception):
+        print(f"* Warning: Could not fetch initial match history due to an error: {startup_results['matches']}")
         print("* The tool will start with no history and detect the first new match played")
+    else:
+        initial_match_ids = startup_results["matches"]
+
+    match_detector = NewMatchDetector(initial_match_ids)
 
     if initial_match_ids:
-        processed_match_ids.update(initial_match_ids)
         print("User last played match:\n")
         try:
-            last_match_start_ts, last_match_stop_ts = await process_and_print_single_match(initial_match_ids[0], puuid, riotid_name, region, False, None)
+            last_match_start_ts, last_match_stop_ts = await timed_startup_fetch("last match", process_and_print_single_match(client, initial_match_ids[0], puuid, riotid_name, region, False, None), startup_timings)
         except Exception as e:
             print(f"* Warning: Could not display details for the last known match: {e}")
     else:
         print("* Warning: Could not fetch initial match history. Will detect first new match played")
 
+    print(f"\nStartup fetch time:\t\t{format_startup_timings(startup_timings, time.monotonic() - startup_started)}")
+
+    match_history = load_match_history(csv_file_name, riotid_name) if ADAPTIVE_POLLING or GAME_END_PREDICTION else {}
+
+    game_end_predictor = None
+    if GAME_END_PREDICTION:
+        game_end_predictor = GameEndPredictor()
+        game_end_predictor.load_history(match_history)
+
+    poll_scheduler = None
+    if ADAPTIVE_POLLING:
+        poll_scheduler = AdaptivePollScheduler(ADAPTIVE_POLL_BUDGET, ADAPTIVE_POLL_MAX_INTERVAL)
+        poll_scheduler.load_history(match_history)
+        if poll_scheduler.ready:
+            busiest_hours = ", ".join(f"{calendar.day_abbr[hour // 24]} {hour % 24:02d}:00" for hour in poll_scheduler.busiest_hours())
+            print(f"Adaptive polling:\t\tlearnt from {poll_scheduler.matches} matches, busiest hours: {busiest_hours}")
+        else:
+            print(f"Adaptive polling:\t\t{poll_scheduler.matches} matches known, fixed interval until {poll_scheduler.MIN_MATCHES} are recorded")
+
     ingame = False
     ingame_old = False
     game_finished_ts = 0
@@ -1987,52 +3709,69 @@ async def lol_monitor_user(riotid, region, csv_file_name):
 
             processed_new_match_in_this_cycle = False
 
-            latest_match_ids = await get_latest_match_ids(puuid, region, count=10)
+            # Picks up a rebuilt client if the API key was reloaded via SIGHUP
+            client = await riot_client_manager.get()
 
-            if latest_match_ids:
+            # Only the newest match ID is fetched unless the head of the match history changed
+            new_match_ids = await match_detector.poll(client, puuid, region)
 
-                new_match_ids = [mid for mid in latest_match_ids if mid not in processed_match_ids]
+            if new_match_ids:
+                print(f"*** Found {len(new_match_ids)} new completed match(es)")
+                # Any completion arriving cancels a pending custom game save (assume it corresponds to the last stop)
+                if pending_custom:
+                    pending_custom = None
+                    current_custom_snapshot = None
+                    current_match_start_ts = 0
 
-                if new_match_ids:
-                    print(f"*** Found {len(new_match_ids)} new completed match(es)")
-                    # Any completion arriving cancels a pending custom game save (assume it corresponds to the last stop)
-                    if pending_custom:
-                        pending_custom = None
-                        current_custom_snapshot = None
-                        current_match_start_ts = 0
+                for match_id in reversed(new_match_ids):
+                    print("─" * HORIZONTAL_LINE)
 
-                    for match_id in reversed(new_match_ids):
-                        print("─" * HORIZONTAL_LINE)
+                    try:
+                        start_ts, stop_ts = await process_and_print_single_match(client, match_id, puuid, riotid_name, region, STATUS_NOTIFICATION, csv_file_name, raise_errors=True)
+                    except Exception:
+                        if match_detector.mark_failed(match_id):
+                            continue
+                        # Newer matches wait for the failed one, so all of them are processed in order on the next check
+                        break
 
-                        start_ts, stop_ts = await process_and_print_single_match(match_id, puuid, riotid_name, region, STATUS_NOTIFICATION, csv_file_name)
+                    if start_ts:
+                        last_match_start_ts = start_ts
+                        if poll_scheduler:
+                            poll_scheduler.add_match(start_ts)
 
-                        if start_ts:
-                            last_match_start_ts = start_ts
+                    if stop_ts:
+                        last_match_stop_ts = stop_ts
 
-                        if stop_ts:
-                            last_match_stop_ts = stop_ts
+                    match_detector.mark_processed(match_id)
 
-                        processed_match_ids.add(match_id)
+                    processed_new_match_in_this_cycle = True
 
-                        processed_new_match_in_this_cycle = True
+                    started_announced = False
 
-                        started_announced = False
+                # The followed game is in, so there is no need to keep checking often for it
+                if game_end_predictor and game_end_predictor.match_published(time.time(), last_match_start_ts, last_match_stop_ts):
+                    game_finished_ts = 0
 
-                    print_cur_ts("\nTimestamp:\t\t\t")
+                print_cur_ts("\nTimestamp:\t\t\t")
 
-            ingame = await is_user_in_match(puuid, region)
+            # Single spectator call per check, shared by everything below
+            live_game = await fetch_live_game_snapshot(client, puuid, region)
+            ingame = is_user_in_match(live_game)
+
+            if game_end_predictor and ingame:
+                game_end_predictor.track(live_game)
 
             if ingame != ingame_old:
 
                 # User is playing new match
                 if ingame:
-                    ts = await print_current_match(puuid, riotid_name, region, last_match_start_ts, last_match_stop_ts, STATUS_NOTIFICATION)
+                    ts = print_current_match(live_game, riotid_name, last_match_start_ts, last_match_stop_ts, STATUS_NOTIFICATION)
                     if ts and ts > 0:
                         started_announced = True
 
                     # Capture snapshot for custom games so we can persist it later if no completion arrives
                     try:
-                        snap = await get_current_match_details(puuid, region)
+                        snap = get_current_match_details(live_game)
                         if snap:
                             # Check if it's a custom game: gameType is CUSTOM_GAME or gameMode is unknown
                             game_type = snap.get('game_type')
@@ -2069,6 +3808,9 @@ async def lol_monitor_user(riotid, region, csv_file_name):
 
                     game_finished_ts = int(time.time())
 
+                    if game_end_predictor:
+                        game_end_predictor.game_ended(game_finished_ts)
+
                     # If the last active game was a custom game, arm a delayed save in case no completion arrives
                     if current_custom_snapshot:
                         pending_custom = {
@@ -2082,7 +3824,7 @@ async def lol_monitor_user(riotid, region, csv_file_name):
 
                     if STATUS_NOTIFICATION:
                         print(f"Sending email notification to {RECEIVER_EMAIL}")
-                        send_email(m_subject, m_body, m_body_html, SMTP_SSL)
+                        queue_email(m_subject, m_body, m_body_html, SMTP_SSL)
 
                     print_cur_ts("\nTimestamp:\t\t\t")
 
@@ -2114,10 +3856,24 @@ async def lol_monitor_user(riotid, region, csv_file_name):
                 print_cur_ts("Liveness check, timestamp:\t")
                 alive_counter = 0
 
-            if ingame or (game_finished_ts and (int(time.time()) - game_finished_ts) <= LOL_CHECK_INTERVAL):
-                time.sleep(LOL_ACTIVE_CHECK_INTERVAL)
+            check_ts = time.time()
+
+            if game_end_predictor:
+                game_end_predictor.record_check(check_ts)
+
+            if game_end_predictor and (ingame or game_end_predictor.awaiting_match(check_ts)):
+                if poll_scheduler:
+                    poll_scheduler.record_check(check_ts, in_game=True)
+                await sleep_until_next_poll(lambda: game_end_predictor.get_interval(check_ts, ingame))
+            elif ingame or (game_finished_ts and (int(time.time()) - game_finished_ts) <= LOL_CHECK_INTERVAL):
+                if poll_scheduler:
+                    poll_scheduler.record_check(check_ts, in_game=True)
+                await sleep_until_next_poll(lambda: LOL_ACTIVE_CHECK_INTERVAL)
+            elif poll_scheduler:
+                poll_scheduler.record_check(check_ts)
+                await sleep_until_next_poll(lambda: poll_scheduler.get_interval(check_ts))
             else:
-                time.sleep(LOL_CHECK_INTERVAL)
+                await sleep_until_next_poll(lambda: LOL_CHECK_INTERVAL)
 
         except Exception as e:
             print(f"* Error, retrying in {display_time(LOL_CHECK_INTERVAL)}: {e}")
@@ -2133,15 +3889,132 @@ async def lol_monitor_user(riotid, region, csv_file_name):
                         f"</body></html>"
                     )
                     print(f"Sending email notification to {RECEIVER_EMAIL}")
-                    send_email(m_subject, m_body, m_body_html, SMTP_SSL)
+                    queue_email(m_subject, m_body, m_body_html, SMTP_SSL)
                     email_sent = True
             print_cur_ts("Timestamp:\t\t\t")
-            time.sleep(LOL_CHECK_INTERVAL)
+            await sleep_until_next_poll(lambda: LOL_CHECK_INTERVAL)
+            continue
+
+
+# Parses "name#tag:region" entries used by the multi-account mode, entries starting with # are skipped
+def parse_account_entries(entries: List[str]) -> List[Tuple[str, str]]:
+    accounts: List[Tuple[str, str]] = []
+
+    for entry in entries:
+        entry = entry.strip()
+        if not entry or entry.startswith("#"):
             continue
 
+        riotid, sep, region = entry.rpartition(":")
+        riotid = riotid.strip()
+        region = region.strip()
+        if not sep or not riotid or not region or "#" not in riotid:
+            raise ValueError(f"Invalid account entry '{entry}', it needs to be in name#tag:region format")
+
+        if not REGION_TO_CONTINENT.get(region):
+            raise ValueError(f"Region '{region}' of account '{riotid}' is not present in 'REGION_TO_CONTINENT' dictionary")
+
+        if (riotid, region) not in accounts:
+            accounts.append((riotid, region))
+
+    return accounts
+
+
+# Returns accounts listed in the accounts file and/or passed via --accounts (comma separated)
+def load_account_entries(accounts_arg: Optional[str], accounts_file: Optional[str]) -> List[Tuple[str, str]]:
+    entries: List[str] = []
+
+    if accounts_file:
+        try:
+            with open(accounts_file, "r", encoding="utf-8") as f:
+                entries.extend(f.read().splitlines())
+        except OSError as e:
+            raise ValueError(f"Cannot read accounts file '{accounts_file}': {e}")
+
+    if accounts_arg:
+        entries.extend(accounts_arg.split(","))
+
+    return parse_account_entries(entries)
+
+
+# Returns unique labels used to name per-account log and CSV files (Riot ID name, extended with tag and region on conflicts)
+def get_account_labels(accounts: List[Tuple[str, str]]) -> List[str]:
+    names = [get_user_riot_name_tag(riotid)[0] for riotid, _ in accounts]
+    riotids = [riotid for riotid, _ in accounts]
+    labels = []
+
+    for (riotid, region), name in zip(accounts, names):
+        label = name
+        if names.count(name) > 1:
+            label = f"{name}_{get_user_riot_name_tag(riotid)[1]}"
+            if riotids.count(riotid) > 1:
+                label = f"{label}_{region}"
+        labels.append(label)
+
+    return labels
+
+
+# Returns the per-account variant of a file path, e.g. games.csv -> games_<label>.csv
+def get_account_file_path(file_path: str, label: str) -> str:
+    path = Path(file_path)
+    return str(path.with_name(f"{path.stem}_{label}{path.suffix}"))
+
+
+# Returns the log file path for the specified label, based on LOL_LOGFILE
+# Without label it returns the shared log of multi-account mode, which cannot collide with any per-account log
+def get_log_file_path(label: Optional[str]) -> str:
+    log_path = Path(os.path.expanduser(LOL_LOGFILE))
+    log_name = f"{log_path.name}_{label}.log" if label else f"{log_path.name}.log"
+    if log_path.parent != Path('.'):
+        if log_path.suffix == "":
+            log_path = log_path.parent / log_name
+    else:
+        if log_path.suffix == "":
+            log_path = Path(log_name)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    return str(log_path)
+
+
+# Monitors several LoL users from one process: each account runs its own lol_monitor_user() state machine
+# as an asyncio task, all of them sharing the Riot API client (with its rate limiter) and notification settings
+async def lol_monitor_accounts(accounts: List[Tuple[str, str]], csv_file_name: str, logging_enabled: bool):
+    labels = get_account_labels(accounts)
+
+    # Spread the accounts over one check interval, so their polls do not hit the API in bursts
+    stagger_delay = LOL_CHECK_INTERVAL / len(accounts)
+
+    async def monitor_account(index: int, riotid: str, region: str, label: str):
+        logfile = open(get_log_file_path(label), "a", buffering=1, encoding="utf-8") if logging_enabled else None
+        token = account_logfile.set(logfile)
+        try:
+            if index:
+                await asyncio.sleep(index * stagger_delay)
+
+            account_csv_file = get_account_file_path(csv_file_name, label) if csv_file_name else ""
+
+            print(f"Monitoring user {riotid} ({region})" + (f", CSV file: {account_csv_file}" if account_csv_file else ""))
+            print("─" * HORIZONTAL_LINE)
+
+            return await lol_monitor_user(riotid, region, account_csv_file)
+        finally:
+            account_logfile.reset(token)
+            if logfile:
+                logfile.close()
+
+    results = await asyncio.gather(*(monitor_account(index, riotid, region, label) for index, ((riotid, region), label) in enumerate(zip(accounts, labels))), return_exceptions=True)
+
+    # The monitoring loops never finish on their own, so we get here only when all accounts failed
+    for (riotid, region), result in zip(accounts, results):
+        if isinstance(result, Exception):
+            print(f"* Error: Monitoring of user {riotid} ({region}) failed: {result}")
+        else:
+            print(f"* Error: Monitoring of user {riotid} ({region}) stopped")
+
+    return 2
+
 
 def main():
-    global CLI_CONFIG_PATH, DOTENV_FILE, LIVENESS_CHECK_COUNTER, RIOT_API_KEY, CSV_FILE, DISABLE_LOGGING, LOL_LOGFILE, STATUS_NOTIFICATION, ERROR_NOTIFICATION, LOL_CHECK_INTERVAL, LOL_ACTIVE_CHECK_INTERVAL, SMTP_PASSWORD, stdout_bck, REGION_TO_CONTINENT, INCLUDE_FORBIDDEN_MATCHES
+    global CLI_CONFIG_PATH, DOTENV_FILE, LIVENESS_CHECK_COUNTER, RIOT_API_KEY, CSV_FILE, ACCOUNTS_FILE, DISABLE_LOGGING, LOL_LOGFILE, STATUS_NOTIFICATION, ERROR_NOTIFICATION, LOL_CHECK_INTERVAL, LOL_ACTIVE_CHECK_INTERVAL, SMTP_PASSWORD, stdout_bck, REGION_TO_CONTINENT, INCLUDE_FORBIDDEN_MATCHES, MATCH_FETCH_CONCURRENCY, CACHE_DIR, DISABLE_MATCH_CACHE, PARQUET_DIR, SQLITE_FILE, SQLITE_STORE_RAW_JSON, EMAIL_SPOOL_DIR, EMAIL_DIGEST_WINDOW, ADAPTIVE_POLLING, ADAPTIVE_POLL_BUDGET, GAME_END_PREDICTION
 
     if "--generate-config" in sys.argv:
         config_content = CONFIG_BLOCK.strip("\n") + "\n"
@@ -2248,6 +4121,20 @@ def main():
         default=None,
         help="Disable email on errors (e.g. invalid API key)"
     )
+    notify.add_argument(
+        "--email-digest-window",
+        dest="email_digest_window",
+        metavar="SECONDS",
+        type=int,
+        help="Merge notifications queued within this time after the previous email into one digest email (0 = disabled)"
+    )
+    notify.add_argument(
+        "--email-spool-dir",
+        dest="email_spool_dir",
+        metavar="DIR",
+        type=str,
+        help="Keep queued emails in this directory until they are delivered, so they survive restarts"
+    )
     notify.add_argument(
         "--send-test-email",
         dest="send_test_email",
@@ -2271,6 +4158,42 @@ def main():
         type=int,
         help="Polling interval when user is in game"
     )
+    times.add_argument(
+        "--adaptive-polling",
+        dest="adaptive_polling",
+        action="store_true",
+        help="Adapt polling interval when user is not in game to hours in which user usually plays (learnt from CSV file / SQLite database)"
+    )
+    times.add_argument(
+        "--poll-budget",
+        dest="poll_budget",
+        metavar="REQUESTS",
+        type=int,
+        help="Max Riot API requests per hour spent on checks when user is not in game with --adaptive-polling"
+    )
+    times.add_argument(
+        "--predict-game-end",
+        dest="predict_game_end",
+        action="store_true",
+        help="Check rarely mid-game and often around the predicted game end (learnt from CSV file / SQLite database)"
+    )
+
+    # Multi-account monitoring
+    multi = parser.add_argument_group("Multi-account monitoring")
+    multi.add_argument(
+        "--accounts",
+        dest="accounts",
+        metavar="ENTRIES",
+        type=str,
+        help="Comma separated list of accounts to monitor from one process, e.g. \"name1#tag1:eun1,name2#tag2:na1\""
+    )
+    multi.add_argument(
+        "--accounts-file",
+        dest="accounts_file",
+        metavar="PATH",
+        type=str,
+        help="File with accounts to monitor from one process (one name#tag:region entry per line)"
+    )
 
     # Listing mode
     listing = parser.add_argument_group("Listing")
@@ -2301,6 +4224,13 @@ def main():
         action="store_true",
         help="Fetch all available matches (use with -l)"
     )
+    listing.add_argument(
+        "--fetch-concurrency",
+        dest="fetch_concurrency",
+        metavar="N",
+        type=int,
+        help="Number of match details to fetch in parallel when listing (default: 10)"
+    )
 
     # Features & Output
     opts = parser.add_argument_group("Features & output")
@@ -2317,6 +4247,41 @@ def main():
         type=str,
         help="Write game status changes to CSV file"
     )
+    opts.add_argument(
+        "--parquet-dir",
+        dest="parquet_dir",
+        metavar="DIR",
+        type=str,
+        help="Save finished matches to Parquet dataset in the directory (typed columns, requires pyarrow)"
+    )
+    opts.add_argument(
+        "--sqlite-file",
+        dest="sqlite_file",
+        metavar="DB_FILENAME",
+        type=str,
+        help="Save finished matches to SQLite database (one row per match, indexed)"
+    )
+    opts.add_argument(
+        "--sqlite-raw-json",
+        dest="sqlite_raw_json",
+        action="store_true",
+        default=None,
+        help="Also store raw match JSON in the SQLite database"
+    )
+    opts.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        metavar="DIR",
+        type=str,
+        help="Directory for the on-disk cache of Riot API data (e.g. finished match details), enables caching"
+    )
+    opts.add_argument(
+        "--no-match-cache",
+        dest="no_match_cache",
+        action="store_true",
+        default=None,
+        help="Bypass the on-disk match details cache"
+    )
     opts.add_argument(
         "-d", "--disable-logging",
         dest="disable_logging",
@@ -2392,13 +4357,39 @@ def main():
             sys.exit(1)
         sys.exit(0)
 
-    if not args.riot_id or not args.region:
-        print("* Error: RIOT_ID and REGION arguments are required !")
-        sys.exit(1)
+    if args.accounts_file:
+        ACCOUNTS_FILE = os.path.expanduser(args.accounts_file)
+    else:
+        if ACCOUNTS_FILE:
+            ACCOUNTS_FILE = os.path.expanduser(ACCOUNTS_FILE)
 
-    if not REGION_TO_CONTINENT.get(args.region):
-        print("* Error: REGION might be wrong as it is not present in 'REGION_TO_CONTINENT' dictionary")
-        sys.exit(1)
+    accounts = []
+    if args.accounts or ACCOUNTS_FILE:
+        try:
+            accounts = load_account_entries(args.accounts, ACCOUNTS_FILE)
+        except ValueError as e:
+            print(f"* Error: {e}")
+            sys.exit(1)
+
+        if not accounts:
+            print("* Error: No accounts to monitor found in --accounts / ACCOUNTS_FILE")
+            sys.exit(1)
+
+        if args.riot_id or args.region:
+            print("* Error: RIOT_ID and REGION arguments cannot be used in multi-account mode (--accounts / ACCOUNTS_FILE), add the account to the accounts list instead")
+            sys.exit(1)
+
+        if args.list_recent_matches:
+            print("* Error: Listing mode (-l) cannot be used together with multi-account mode")
+            sys.exit(1)
+    else:
+        if not args.riot_id or not args.region:
+            print("* Error: RIOT_ID and REGION arguments are required !")
+            sys.exit(1)
+
+        if not REGION_TO_CONTINENT.get(args.region):
+            print("* Error: REGION might be wrong as it is not present in 'REGION_TO_CONTINENT' dictionary")
+            sys.exit(1)
 
     if args.riot_api_key:
         RIOT_API_KEY = args.riot_api_key
@@ -2414,16 +4405,50 @@ def main():
     if args.active_interval:
         LOL_ACTIVE_CHECK_INTERVAL = args.active_interval
 
+    if args.adaptive_polling is True:
+        ADAPTIVE_POLLING = True
+
+    if args.predict_game_end is True:
+        GAME_END_PREDICTION = True
+
+    if args.poll_budget is not None:
+        if args.poll_budget < AdaptivePollScheduler.REQUESTS_PER_CHECK:
+            print(f"* Error: --poll-budget must be at least {AdaptivePollScheduler.REQUESTS_PER_CHECK}")
+            sys.exit(1)
+        ADAPTIVE_POLL_BUDGET = args.poll_budget
+
     if args.include_forbidden_matches is True:
         INCLUDE_FORBIDDEN_MATCHES = True
 
+    if args.fetch_concurrency is not None:
+        if args.fetch_concurrency < 1:
+            print("* Error: --fetch-concurrency must be at least 1")
+            sys.exit(1)
+        MATCH_FETCH_CONCURRENCY = args.fetch_concurrency
+
+    if args.cache_dir:
+        CACHE_DIR = args.cache_dir
+
+    if CACHE_DIR:
+        CACHE_DIR = os.path.expanduser(CACHE_DIR)
+
+    if args.no_match_cache is True:
+        DISABLE_MATCH_CACHE = True
+
+    if CACHE_DIR:
+        champion_table.configure(os.path.join(CACHE_DIR, "champions.json"))
+        puuid_cache.configure(os.path.join(CACHE_DIR, "puuids.json"))
+
+    if CACHE_DIR and not DISABLE_MATCH_CACHE:
+        match_cache.configure(os.path.join(CACHE_DIR, "matches"), MATCH_CACHE_MAX_SIZE)
+
     if args.csv_file:
         CSV_FILE = os.path.expanduser(args.csv_file)
     else:
         if CSV_FILE:
             CSV_FILE = os.path.expanduser(CSV_FILE)
 
-    if CSV_FILE:
+    if CSV_FILE and not accounts:
         try:
             with open(CSV_FILE, 'a', newline='', buffering=1, encoding="utf-8") as _:
                 pass
@@ -2431,19 +4456,49 @@ def main():
             print(f"* Error: CSV file cannot be opened for writing: {e}")
             sys.exit(1)
 
+    if args.parquet_dir:
+        PARQUET_DIR = args.parquet_dir
+
+    if PARQUET_DIR:
+        PARQUET_DIR = os.path.expanduser(PARQUET_DIR)
+        if importlib.util.find_spec("pyarrow") is None:
+            print("* Error: Parquet dataset (PARQUET_DIR / --parquet-dir) requires pyarrow library, install it with: pip3 install pyarrow")
+            sys.exit(1)
+        if args.list_recent_matches:
+            # History export is a one-off batch, so rows are buffered into bigger row groups of a single part file
+            parquet_sink.configure(PARQUET_DIR, flush_rows=CSV_EXPORT_FLUSH_ROWS, flush_interval=CSV_FLUSH_INTERVAL, close_after_flush=False)
+        else:
+            parquet_sink.configure(PARQUET_DIR)
+
+    if args.sqlite_file:
+        SQLITE_FILE = args.sqlite_file
+
+    if args.sqlite_raw_json is True:
+        SQLITE_STORE_RAW_JSON = True
+
+    if SQLITE_FILE:
+        SQLITE_FILE = os.path.expanduser(SQLITE_FILE)
+        match_store.configure(SQLITE_FILE, SQLITE_STORE_RAW_JSON)
+        try:
+            match_store.connect()
+        except Exception as e:
+            print(f"* Error: SQLite database '{SQLITE_FILE}' cannot be opened: {e}")
+            sys.exit(1)
+
     if args.list_recent_matches:
         if args.all_matches:
             # Fetch all available matches
             print("* Determining total number of available matches...")
             try:
                 async def get_all_matches_info():
-                    puuid = await get_user_puuid(args.riot_id, args.region)
+                    client = await riot_client_manager.get()
+                    puuid = await get_user_puuid(client, args.riot_id, args.region)
                     if puuid:
-                        total_count = await get_total_match_count(puuid, args.region)
+                        total_count = await get_total_match_count(client, puuid, args.region)
                         return puuid, total_count
                     return None, 0
 
-                puuid, total_count = asyncio.run(get_all_matches_info())
+                puuid, total_count = run_async(get_all_matches_info())
                 if puuid and total_count > 0:
                     matches_num = total_count
                     matches_min = 1
@@ -2474,8 +4529,9 @@ def main():
             print(f"* Min matches ({matches_min}) cannot be greater than max matches ({matches_num})")
             sys.exit(1)
 
-        list_operation = "* Listing & saving" if CSV_FILE else "* Listing"
-        csv_destination_str = f" to '{CSV_FILE}'" if CSV_FILE else ""
+        destinations = [f"'{path}'" for path in (CSV_FILE, PARQUET_DIR, SQLITE_FILE) if path]
+        list_operation = "* Listing & saving" if destinations else "* Listing"
+        csv_destination_str = f" to {' and '.join(destinations)}" if destinations else ""
 
         if matches_min != matches_num:
             print(f"{list_operation} recent matches from {matches_min} to {matches_num} for '{args.riot_id}'{csv_destination_str}:\n")
@@ -2483,17 +4539,20 @@ def main():
             print(f"{list_operation} recent match for '{args.riot_id}'{csv_destination_str}:\n")
 
         try:
-            asyncio.run(print_save_recent_matches(args.riot_id, args.region, matches_min, matches_num, CSV_FILE))
+            run_async(print_save_recent_matches(args.riot_id, args.region, matches_min, matches_num, CSV_FILE))
         except Exception as e:
             print(f"* Error: {e}")
             if 'Unauthorized' in str(e):
                 print("* API key might not be valid anymore!")
         sys.exit(0)
 
-    riotid_name, riotid_tag = get_user_riot_name_tag(args.riot_id)
+    if accounts:
+        riotid_name = None
+    else:
+        riotid_name, riotid_tag = get_user_riot_name_tag(args.riot_id)
 
-    if not riotid_name or not riotid_tag:
-        sys.exit(1)
+        if not riotid_name or not riotid_tag:
+            sys.exit(1)
 
     try:
         ascii_log_separators_enabled()
@@ -2505,15 +4564,7 @@ def main():
         DISABLE_LOGGING = True
 
     if not DISABLE_LOGGING:
-        log_path = Path(os.path.expanduser(LOL_LOGFILE))
-        if log_path.parent != Path('.'):
-            if log_path.suffix == "":
-                log_path = log_path.parent / f"{log_path.name}_{riotid_name}.log"
-        else:
-            if log_path.suffix == "":
-                log_path = Path(f"{log_path.name}_{riotid_name}.log")
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        FINAL_LOG_PATH = str(log_path)
+        FINAL_LOG_PATH = get_log_file_path(riotid_name)
         sys.stdout = Logger(FINAL_LOG_PATH)
     else:
         FINAL_LOG_PATH = None
@@ -2528,11 +4579,32 @@ def main():
         STATUS_NOTIFICATION = False
         ERROR_NOTIFICATION = False
 
+    if args.email_spool_dir:
+        EMAIL_SPOOL_DIR = args.email_spool_dir
+
+    if EMAIL_SPOOL_DIR:
+        EMAIL_SPOOL_DIR = os.path.expanduser(EMAIL_SPOOL_DIR)
+
+    if args.email_digest_window is not None:
+        if args.email_digest_window < 0:
+            print("* Error: --email-digest-window cannot be negative")
+            sys.exit(1)
+        EMAIL_DIGEST_WINDOW = args.email_digest_window
+
+    email_queue.configure(EMAIL_SPOOL_DIR, EMAIL_MAX_RETRIES, EMAIL_RETRY_DELAY, EMAIL_IDLE_TIMEOUT, EMAIL_DIGEST_WINDOW, EMAIL_MAX_PER_HOUR)
+
     print(f"* LoL polling intervals:\t[NOT in game: {display_time(LOL_CHECK_INTERVAL)}] [in game: {display_time(LOL_ACTIVE_CHECK_INTERVAL)}]")
+    print(f"* Adaptive polling enabled:\t{ADAPTIVE_POLLING}" + (f" (budget: {ADAPTIVE_POLL_BUDGET} requests/hour)" if ADAPTIVE_POLLING else ""))
+    print(f"* Game end prediction enabled:\t{GAME_END_PREDICTION}")
     print(f"* Email notifications:\t\t[status changes = {STATUS_NOTIFICATION}] [errors = {ERROR_NOTIFICATION}]")
+    print(f"* Email digest & rate limit:\t[window = {display_time(EMAIL_DIGEST_WINDOW) if EMAIL_DIGEST_WINDOW else 'disabled'}] [max per hour = {EMAIL_MAX_PER_HOUR or 'unlimited'}]")
+    print(f"* Email spool enabled:\t\t{bool(EMAIL_SPOOL_DIR)}" + (f" ({EMAIL_SPOOL_DIR})" if EMAIL_SPOOL_DIR else ""))
     print(f"* Include forbidden matches:\t{INCLUDE_FORBIDDEN_MATCHES}")
+    print(f"* Match cache enabled:\t\t{match_cache.enabled}" + (f" ({match_cache.cache_dir})" if match_cache.enabled else ""))
     print(f"* Liveness check:\t\t{bool(LIVENESS_CHECK_INTERVAL)}" + (f" ({display_time(LIVENESS_CHECK_INTERVAL)})" if LIVENESS_CHECK_INTERVAL else ""))
     print(f"* CSV logging enabled:\t\t{bool(CSV_FILE)}" + (f" ({CSV_FILE})" if CSV_FILE else ""))
+    print(f"* Parquet dataset enabled:\t{bool(PARQUET_DIR)}" + (f" ({PARQUET_DIR})" if PARQUET_DIR else ""))
+    print(f"* SQLite database enabled:\t{bool(SQLITE_FILE)}" + (f" ({SQLITE_FILE})" if SQLITE_FILE else ""))
     print(f"* Output logging enabled:\t{not DISABLE_LOGGING}" + (f" ({FINAL_LOG_PATH})" if not DISABLE_LOGGING else ""))
     print(f"* ASCII log separators:\t\t{ascii_log_separators_enabled()} (mode: {ASCII_LOG_SEPARATORS})")
     print(f"* Configuration file:\t\t{cfg_path}")
@@ -2545,15 +4617,21 @@ def main():
         signal.signal(signal.SIGABRT, decrease_active_check_signal_handler)
         signal.signal(signal.SIGHUP, reload_secrets_signal_handler)
 
-    out = f"Monitoring user {args.riot_id}"
-    print(out)
-    # print("-" * len(out))
-    print("─" * HORIZONTAL_LINE)
+    if accounts:
+        print(f"Monitoring {len(accounts)} users: {', '.join(riotid for riotid, _ in accounts)}")
+        print("─" * HORIZONTAL_LINE)
 
-    asyncio.run(lol_monitor_user(args.riot_id, args.region, CSV_FILE))
+        exit_code = run_async(lol_monitor_accounts(accounts, CSV_FILE, not DISABLE_LOGGING))
+    else:
+        out = f"Monitoring user {args.riot_id}"
+        print(out)
+        # print("-" * len(out))
+        print("─" * HORIZONTAL_LINE)
+
+        exit_code = run_async(lol_monitor_user(args.riot_id, args.region, CSV_FILE))
 
     sys.stdout = stdout_bck
-    sys.exit(0)
+    sys.exit(exit_code or 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Author: Michal Szymanski <misiektoja-github@rm-rf.ninja>
+v1.0
+
+Micro-benchmark of lol_monitor's match history export (print_match_history, used by -l) showing that processing
+time per match stays flat when the number of match IDs grows.
+
+Riot API calls and match printing are replaced by no-op stubs and the output is discarded, so only the bookkeeping
+done by print_match_history itself (e.g. numbering of matches) is measured.
+
+To compare with another version of lol_monitor.py pass it via --baseline, e.g. the one before match numbering
+was switched from all_fetched_ids.index() to enumerate():
+
+    git show 812da8a^:lol_monitor.py > /tmp/lol_monitor_old.py
+    python3 tools/bench_match_processing.py --baseline /tmp/lol_monitor_old.py
+
+Requires lol_monitor.py dependencies (pulsefire, aiohttp and others).
+"""
+
+import io
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+import importlib.util
+from pathlib import Path
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+
+# Stub of Riot API client returning minimal match payloads
+class StubClient(object):
+    async def get_lol_match_v5_match(self, region=None, id=None):
+        return {"metadata": {"matchId": id}, "info": {}}
+
+
+# Loads lol_monitor.py from the path as a separate module with monitoring-related calls stubbed out
+# Modules it imports (lol_match_store.py) are looked up next to it, as when it is run as a script
+def load_monitor(path, name):
+    monitor_dir = str(Path(path).resolve().parent)
+    if monitor_dir not in sys.path:
+        sys.path.insert(0, monitor_dir)
+    saved_argv = sys.argv
+    sys.argv = [str(path)]
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.argv = saved_argv
+
+    async def get_latest_match_ids(client, puuid, region, count=10, start=0):
+        return [f"EUN1_{i}" for i in range(start, start + count)]
+
+    async def process_and_print_single_match(client, match_id, *args, **kwargs):
+        return 1, 2
+
+    module.get_latest_match_ids = get_latest_match_ids
+    module.process_and_print_single_match = process_and_print_single_match
+    if hasattr(module, "match_cache"):
+        module.match_cache.cache_dir = ""
+    return module
+
+
+# Returns average time per match in microseconds of exporting `size` matches
+def bench(module, size, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(module.print_match_history(StubClient(), "puuid", "name", "eun1", 1, size, None))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / size * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-match processing time of lol_monitor's match history export")
+    parser.add_argument("--monitor", default=str(Path(__file__).resolve().parent.parent / "lol_monitor.py"), help="lol_monitor.py to benchmark (default: the one from this repository)")
+    parser.add_argument("--baseline", default=None, help="Another lol_monitor.py to compare with")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help=f"Numbers of match IDs (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the best one is reported (default: 3)")
+    args = parser.parse_args()
+
+    versions = [("current", args.monitor)]
+    if args.baseline:
+        versions.insert(0, ("baseline", args.baseline))
+
+    modules = [(label, load_monitor(path, f"lol_monitor_{label}")) for label, path in versions]
+
+    print(f"{'IDs':>8}" + "".join(f"{label + ' (us/match)':>22}" for label, _ in modules))
+    for size in args.sizes:
+        print(f"{size:>8,}" + "".join(f"{bench(module, size, args.repeat):>22.1f}" for _, module in modules))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Author: Michal Szymanski <misiektoja-github@rm-rf.ninja>
+v1.0
+
+Benchmark of lol_compare_csvs.py profile building on a generated large match history (50,000 matches by default)
+in the CSV format written by lol_monitor.
+
+It measures loading of the CSV (load_matches) and computing profile features from it (build_profile and
+profile_features), as well as building the profile file used by --profiles (update_profile_file) from scratch,
+updating it with appended rows and reading it when nothing changed.
+
+It also checks that a profile file updated with appended rows (including a partially written last row) is the same
+as the profile built from the whole CSV at once, i.e. that merge_profiles() is correct.
+
+To compare with another version of lol_compare_csvs.py pass it via --baseline, e.g. the one before teammate features
+were built from the long-format participant table:
+
+    git show e70d67e^:tools/lol_compare_csvs.py > /tmp/lol_compare_csvs_old.py
+    python3 tools/bench_profiles.py --baseline /tmp/lol_compare_csvs_old.py
+
+Requires pandas and numpy.
+"""
+
+import io
+import os
+import sys
+import csv
+import math
+import time
+import argparse
+import tempfile
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_MATCHES = 50000
+CSV_FIELDNAMES = ['Match Start', 'Match Stop', 'Duration', 'Game Mode', 'Victory', 'Kills', 'Deaths', 'Assists', 'Champion', 'Level', 'Role', 'Lane', 'Team 1', 'Team 2']
+CHAMPIONS = ["Ahri", "Zed", "Lux", "Jinx", "Yasuo", "Thresh", "Lee Sin", "Ezreal", "Kai'Sa", "Garen", "Ashe", "Morgana"]
+GAME_MODES = [("Summoner's Rift", 33), ("ARAM", 20), ("Arena", 18), ("URF", 22)]
+ROLES = ["SOLO", "CARRY", "SUPPORT", "NONE", "N/A"]
+LANES = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "N/A"]
+
+
+# Formats duration like lol_monitor's display_time() does
+def display_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    parts = [f"{minutes} minutes"] if minutes else []
+    if seconds:
+        parts.append(f"{seconds} seconds")
+    return ", ".join(parts)
+
+
+# Writes synthetic match history of the focal player in the CSV format of lol_monitor
+def generate_history_csv(path, matches, seed=1):
+    rng = np.random.default_rng(seed)
+
+    start = 1672531200 + np.cumsum(rng.integers(20 * 60, 12 * 3600, matches))
+    mode_index = rng.integers(0, len(GAME_MODES), matches)
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writeheader()
+        for i in range(matches):
+            mode, mean_minutes = GAME_MODES[mode_index[i]]
+            duration = max(300, int(rng.normal(mean_minutes, 5) * 60))
+            team = ["Focal#EUNE"] + [f"Friend{k}#EUNE" for k in rng.choice(40, 2, replace=False)] + [f"Player{k}#EUNE" for k in rng.integers(0, 200000, 2)]
+            enemies = [f"Player{k}#EUNE" for k in rng.integers(0, 200000, 5)]
+            level = int(rng.integers(8, 19)) if rng.random() < 0.9 else "N/A"
+            writer.writerow({
+                'Match Start': str(np.datetime64(int(start[i]), "s")).replace("T", " "),
+                'Match Stop': str(np.datetime64(int(start[i]) + duration, "s")).replace("T", " "),
+                'Duration': display_duration(duration),
+                'Game Mode': mode,
+                'Victory': "Yes" if rng.random() < 0.52 else "No",
+                'Kills': int(rng.integers(0, 20)),
+                'Deaths': int(rng.integers(0, 12)),
+                'Assists': int(rng.integers(0, 25)),
+                'Champion': CHAMPIONS[rng.integers(0, len(CHAMPIONS))],
+                'Level': level,
+                'Role': ROLES[rng.integers(0, len(ROLES))],
+                'Lane': LANES[rng.integers(0, len(LANES))],
+                'Team 1': " ".join(f"'{p}'" for p in team),
+                'Team 2': " ".join(f"'{p}'" for p in enemies),
+            })
+
+
+# Loads lol_compare_csvs.py from the path as a separate module
+def load_compare(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Returns best time in seconds of `repeat` runs of func
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Returns timings of the benchmarked steps for the CSV file
+def bench(module, csv_path, appended_path, repeat):
+    timings = {}
+    df = module.load_matches(csv_path)
+    timings["load"] = best_time(lambda: module.load_matches(csv_path), repeat)
+    timings["features"] = best_time(lambda: module.profile_features(module.build_profile(df)), repeat)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profile_path = os.path.join(tmp_dir, "history" + module.PROFILE_SUFFIX)
+        work_csv = os.path.join(tmp_dir, "history.csv")
+
+        def build():
+            if os.path.exists(profile_path):
+                os.unlink(profile_path)
+            module.update_profile_file(csv_path, profile_path)
+
+        timings["profile build"] = best_time(build, repeat)
+        timings["profile unchanged"] = best_time(lambda: module.update_profile_file(csv_path, profile_path), repeat)
+
+        # Profile of the history without its last rows, then updated with them
+        with open(csv_path, "rb") as src, open(appended_path, "rb") as extra:
+            base, appended = src.read(), extra.read()
+
+        def update():
+            with open(work_csv, "wb") as f:
+                f.write(base)
+            if os.path.exists(profile_path):
+                os.unlink(profile_path)
+            module.update_profile_file(work_csv, profile_path)
+            with open(work_csv, "ab") as f:
+                f.write(appended)
+            started = time.perf_counter()
+            module.update_profile_file(work_csv, profile_path)
+            return time.perf_counter() - started
+
+        timings["profile update"] = min(update() for _ in range(repeat))
+    return timings
+
+
+# Compares two profiles (or their parts), sums of floats may differ by rounding only
+def same_profile(a, b, path="profile"):
+    if isinstance(a, dict) and isinstance(b, dict):
+        if set(a) != set(b):
+            print(f"  {path}: keys differ: {sorted(set(a) ^ set(b), key=str)[:5]}")
+            return False
+        return all(same_profile(a[k], b[k], f"{path}.{k}") for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        if len(a) != len(b):
+            print(f"  {path}: lengths differ: {len(a)} != {len(b)}")
+            return False
+        return all(same_profile(x, y, f"{path}[{i}]") for i, (x, y) in enumerate(zip(a, b)))
+    if isinstance(a, float) or isinstance(b, float):
+        if (isinstance(a, float) and math.isnan(a)) and (isinstance(b, float) and math.isnan(b)):
+            return True
+        if not math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9):
+            print(f"  {path}: {a} != {b}")
+            return False
+        return True
+    if a != b:
+        print(f"  {path}: {a!r} != {b!r}")
+        return False
+    return True
+
+
+# Checks that profile updated with appended rows (in several steps, with partially written last row) equals full rebuild
+def check_incremental(module, csv_path, steps):
+    with open(csv_path, "rb") as f:
+        data = f.read()
+    row_ends = (np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1).tolist()[1:]
+
+    # Cut points: the first half of rows, then equal steps; each but the last one also writes part of the next row
+    rows = len(row_ends)
+    cuts = [row_ends[rows // 2 + (rows - rows // 2) * k // steps - 1] + 25 for k in range(steps + 1)]
+    cuts[-1] = len(data)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_csv = os.path.join(tmp_dir, "history.csv")
+        profile_path = os.path.join(tmp_dir, "history" + module.PROFILE_SUFFIX)
+        statuses = []
+        written = 0
+        with open(work_csv, "wb") as f:
+            for cut in cuts:
+                f.write(data[written:cut])
+                f.flush()
+                written = cut
+                statuses.append(module.update_profile_file(work_csv, profile_path)[1])
+        incremental = module.read_profile_file(profile_path)
+
+    full = module.build_profile(module.load_matches(io.BytesIO(data)))
+    full["source"] = module.csv_source_info(data)
+
+    ok = same_profile(incremental, full) and same_profile(module.profile_features(incremental), module.profile_features(full), "features")
+    print(f"Profile updated in {len(cuts)} steps ({', '.join(statuses)}) equals full rebuild: {'OK' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lol_compare_csvs.py profile building on a generated large match history")
+    parser.add_argument("--compare", default=str(Path(__file__).resolve().parent / "lol_compare_csvs.py"), help="lol_compare_csvs.py to benchmark (default: the one from this repository)")
+    parser.add_argument("--baseline", default=None, help="Another lol_compare_csvs.py to compare with")
+    parser.add_argument("--matches", type=int, default=DEFAULT_MATCHES, help=f"Number of matches in the generated history (default: {DEFAULT_MATCHES})")
+    parser.add_argument("--appended", type=int, default=100, help="Number of matches appended before profile update (default: 100)")
+    parser.add_argument("--steps", type=int, default=4, help="Number of profile updates in the incremental check (default: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per step, the best one is reported (default: 3)")
+    parser.add_argument("--csv", default=None, help="Keep the generated history in this CSV file instead of a temporary one")
+    args = parser.parse_args()
+
+    versions = [("current", args.compare)]
+    if args.baseline:
+        versions.insert(0, ("baseline", args.baseline))
+    modules = [(label, load_compare(path, f"lol_compare_csvs_{label}")) for label, path in versions]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = args.csv or os.path.join(tmp_dir, "history.csv")
+        appended_csv = os.path.join(tmp_dir, "appended.csv")
+        generate_history_csv(csv_path, args.matches)
+
+        # Rows appended to the history, without the header
+        generate_history_csv(appended_csv, args.appended, seed=2)
+        with open(appended_csv, "rb") as f:
+            appended = f.read()
+        with open(appended_csv, "wb") as f:
+            f.write(appended[appended.find(b"\n") + 1:])
+
+        print(f"Generated history of {args.matches:,} matches ({os.path.getsize(csv_path) / 2**20:.1f} MiB), {args.appended} matches appended for updates\n")
+
+        ok = all(check_incremental(module, csv_path, args.steps) for _, module in modules[-1:])
+
+        results = [(label, bench(module, csv_path, appended_csv, args.repeat)) for label, module in modules]
+        print(f"\n{'step':<20}" + "".join(f"{label + ' (s)':>16}" for label, _ in results))
+        for step in results[0][1]:
+            print(f"{step:<20}" + "".join(f"{timings[step]:>16.3f}" for _, timings in results))
+
+    if not ok:
+        print("\nError: incrementally updated profile differs from the full rebuild")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Author: Michal Szymanski <misiektoja-github@rm-rf.ninja>
+v1.0
+
+Checks and benchmarks temporal overlap detection of lol_compare_csvs.py on synthetic match histories.
+
+The sort-and-sweep find_overlapping_pairs() is compared with the previous algorithm, which checked all n × m pairs
+with boolean matrices (evaluated here in row blocks, so large sizes fit in memory). Synthetic histories include
+inverted intervals (stop before start), touching endpoints, missing timestamps and timezone-aware datetimes with
+different UTC offsets in each file. The pairs found by find_temporal_overlaps() must be exactly the ones found by
+the n × m check computed from the generated epoch times.
+
+Requires pandas and numpy.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from lol_compare_csvs import find_overlapping_pairs, find_temporal_overlaps
+
+DEFAULT_SIZES = [1000, 5000, 10000, 20000]
+BLOCK_ROWS = 1024
+
+
+# Previous algorithm: all n × m pairs checked with boolean matrices, returns positions ordered like find_overlapping_pairs()
+def nxm_overlapping_pairs(s1: np.ndarray, e1: np.ndarray, s2: np.ndarray, e2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    pairs1 = []
+    pairs2 = []
+    for block_start in range(0, len(s1), BLOCK_ROWS):
+        block = slice(block_start, block_start + BLOCK_ROWS)
+        overlap_matrix = (s1[block, None] <= e2[None, :]) & (e1[block, None] >= s2[None, :])
+        rows, cols = np.nonzero(overlap_matrix)
+        pairs1.append(rows + block_start)
+        pairs2.append(cols)
+    return np.concatenate(pairs1).astype(np.int64), np.concatenate(pairs2).astype(np.int64)
+
+
+# Builds synthetic history of n matches over 3 years; returns the data frame with start/stop strings
+# and generated start/stop epoch seconds (NaN where the timestamp is missing)
+def synthetic_history(n: int, seed: int, tz: Optional[str] = None, inverted: float = 0.0, missing: float = 0.0) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    base = int(pd.Timestamp("2022-01-01", tz="UTC").timestamp())
+    start = base + np.sort(rng.integers(0, 3 * 365 * 86400, n))
+    stop = start + rng.integers(15 * 60, 50 * 60, n)
+
+    flip = rng.random(n) < inverted
+    start[flip], stop[flip] = stop[flip], start[flip].copy()
+
+    def to_strings(values):
+        stamps = pd.to_datetime(values, unit="s", utc=True)
+        if tz:
+            return pd.Series(stamps.tz_convert(tz).map(lambda ts: ts.isoformat()))
+        return pd.Series(stamps.tz_localize(None).astype(str))
+
+    start_str = to_strings(start)
+    stop_str = to_strings(stop)
+    start_f = start.astype(float)
+    stop_f = stop.astype(float)
+
+    gone = rng.random(n) < missing
+    start_str[gone] = None
+    start_f[gone] = np.nan
+
+    df = pd.DataFrame({
+        "start": start_str,
+        "stop": stop_str,
+        "champion": rng.choice(["Ahri", "Zed", "Lux", "Jinx"], n),
+        "game_mode": rng.choice(["ARAM", "Summoner's Rift"], n),
+    })
+    return df, start_f, stop_f
+
+
+# Makes some matches of the second history start exactly when matches of the first one stop (touching endpoints)
+def add_touching_endpoints(df1: pd.DataFrame, stop1: np.ndarray, df2: pd.DataFrame, start2: np.ndarray, count: int) -> None:
+    count = min(count, len(df1), len(df2))
+    df2.loc[:count - 1, "start"] = df1.loc[:count - 1, "stop"].values
+    start2[:count] = stop1[:count]
+
+
+# Returns all overlapping (file1_index, file2_index) pairs computed with the n × m check from generated epoch times
+def expected_pairs(s1: np.ndarray, e1: np.ndarray, s2: np.ndarray, e2: np.ndarray) -> Set[Tuple[int, int]]:
+    valid1 = np.nonzero(~np.isnan(s1) & ~np.isnan(e1))[0]
+    valid2 = np.nonzero(~np.isnan(s2) & ~np.isnan(e2))[0]
+    i1, i2 = nxm_overlapping_pairs(s1[valid1], e1[valid1], s2[valid2], e2[valid2])
+    return set(zip(valid1[i1].tolist(), valid2[i2].tolist()))
+
+
+# Checks that the sweep finds exactly the pairs found by the n × m check, for several kinds of synthetic data
+def check_equality(n: int) -> bool:
+    cases = [
+        ("naive", None, None),
+        ("same timezone", "Europe/Warsaw", "Europe/Warsaw"),
+        ("different offsets", "America/New_York", "Asia/Tokyo"),
+    ]
+    all_ok = True
+    for seed, (label, tz1, tz2) in enumerate(cases):
+        df1, s1, e1 = synthetic_history(n, seed, tz1, inverted=0.02, missing=0.01)
+        df2, s2, e2 = synthetic_history(n, seed + 100, tz2, inverted=0.02, missing=0.01)
+        add_touching_endpoints(df1, e1, df2, s2, n // 20)
+
+        expected = expected_pairs(s1, e1, s2, e2)
+        found = {(o["file1_index"], o["file2_index"]) for o in find_temporal_overlaps(df1, df2, verbose=False)}
+
+        # Positions and order returned by the sweep itself must also be the ones of the n × m check
+        valid = ~np.isnan(s1) & ~np.isnan(e1)
+        sweep = find_overlapping_pairs(s1[valid], e1[valid], s1[valid], e1[valid])
+        nxm = nxm_overlapping_pairs(s1[valid], e1[valid], s1[valid], e1[valid])
+        same_order = np.array_equal(sweep[0], nxm[0]) and np.array_equal(sweep[1], nxm[1])
+
+        ok = found == expected and same_order
+        all_ok &= ok
+        print(f"  {label:<18} {len(expected):>6} pairs expected, {len(found):>6} found by sweep: {'OK' if ok else 'MISMATCH'}")
+    return all_ok
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark temporal overlap detection of lol_compare_csvs.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help=f"Numbers of matches per history (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--check-size", type=int, default=3000, help="Number of matches per history in equality checks (default: 3000)")
+    args = parser.parse_args()
+
+    print("Equality of sweep and n × m results:")
+    ok = check_equality(args.check_size)
+
+    print()
+    print(f"{'matches':>8} {'overlaps':>9} {'n × m (s)':>10} {'sweep (s)':>10} {'speedup':>8} {'find_temporal_overlaps (s)':>27}")
+    for n in args.sizes:
+        df1, s1, e1 = synthetic_history(n, 1, inverted=0.001)
+        df2, s2, e2 = synthetic_history(n, 2, "Europe/Warsaw", inverted=0.001)
+        nxm_time, nxm = timed(nxm_overlapping_pairs, s1, e1, s2, e2)
+        sweep_time, sweep = timed(find_overlapping_pairs, s1, e1, s2, e2)
+        ok &= set(zip(*nxm)) == set(zip(*sweep))
+        full_time, _ = timed(find_temporal_overlaps, df1, df2, False)
+        print(f"{n:>8,} {len(sweep[0]):>9,} {nxm_time:>10.3f} {sweep_time:>10.4f} {nxm_time / sweep_time:>7.0f}x {full_time:>27.3f}")
+
+    if not ok:
+        print("\nError: sweep results differ from the n × m check")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
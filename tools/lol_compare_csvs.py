@@ -23,8 +23,16 @@ The script computes similarity scores for each feature and combines them into an
 indicating the likelihood that both CSV files represent the same player. It can output results in either human-readable
 format or JSON for programmatic use.
 
+With more than two files (or a directory) it runs in all-pairs mode: each CSV is loaded once (in parallel worker
+processes), the full similarity matrix is computed at once and the top-k most similar pairs are listed.
+
+With --profiles a compact profile file (<name>.profile.json.gz) holding the feature counts, KDA/winrate/level/duration
+moments and match intervals is kept next to each CSV. It is built once, updated with only the rows appended to the CSV
+since, and can be passed instead of the CSV file, so comparing accounts does not require parsing their CSVs again.
+
 Usage:
-    python lol_compare_csvs.py file1.csv file2.csv [--limit N] [--json] [--pretty] [--no-overlap-check]
+    python lol_compare_csvs.py file1.csv file2.csv [--limit N] [--json] [--pretty] [--no-overlap-check] [--profiles]
+    python lol_compare_csvs.py file1.csv file2.csv file3.csv ... [--all-pairs] [--top K] [-j N] [--json]
 
 Python pip3 requirements:
 
@@ -32,21 +40,26 @@ pandas
 """
 
 import argparse
+import gzip
+import hashlib
+import io
 import json
 import math
 import os
 import re
+import shutil
 import sys
+import tempfile
 from collections import Counter
-from datetime import datetime
-from typing import Any, Dict, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple, Optional, Union
 
 import numpy as np
 import pandas as pd
 
 
 # Loads and normalizes a LoL matches CSV into a clean DataFrame
-def load_matches(path: str) -> pd.DataFrame:
+def load_matches(path: Union[str, io.BytesIO]) -> pd.DataFrame:
     df = pd.read_csv(path, engine="c")  # default quotechar='"' handles your sample
 
     # Normalize column names aggressively
@@ -58,7 +71,6 @@ def load_matches(path: str) -> pd.DataFrame:
         s = s.lower()
         return s
 
-    original_cols = list(df.columns)
     ncols = [norm(c) for c in df.columns]
     df.columns = ncols
 
@@ -157,10 +169,6 @@ def load_matches(path: str) -> pd.DataFrame:
     df["champion"] = df["champion"].astype(str).str.strip()
     df["champion"] = df["champion"].replace(["N/A", "NONE", "NAN", ""], pd.NA)
 
-    # Team lists
-    df["blue_list"] = df["blue"].astype(str).apply(extract_names_from_blob)
-    df["red_list"] = df["red"].astype(str).apply(extract_names_from_blob)
-
     # Hour-of-day
     df["hour"] = df["start"].dt.hour
 
@@ -196,66 +204,45 @@ def parse_duration_to_minutes(s: str) -> float:
     return m + sec / 60.0
 
 
-# Extracts summoner names wrapped in single quotes from a blob string
-def extract_names_from_blob(s: str) -> List[str]:
-    if not isinstance(s, str):
-        return []
-    return [m.strip() for m in re.findall(r"'([^']+)'", s)]
-
-
-# Builds a normalized champion pick frequency distribution
-def champion_distribution(df: pd.DataFrame) -> Dict[str, float]:
-    cnt = Counter(df["champion"].astype(str).str.strip())
-    total = sum(cnt.values())
-    return {k: v / total for k, v in cnt.items()} if total > 0 else {}
+# Builds long-format participant table (match position, team, name) from names wrapped in single quotes in team blob strings
+def participant_table(df: pd.DataFrame) -> pd.DataFrame:
+    frames = []
+    for team in ("blue", "red"):
+        names = df[team].astype(str).reset_index(drop=True).str.findall(r"'([^']+)'").explode().dropna().str.strip()
+        frames.append(pd.DataFrame({"match": names.index.to_numpy(), "team": team, "name": names.to_numpy()}))
+    table = pd.concat(frames, ignore_index=True).sort_values("match", kind="stable")
+    return table[table["name"] != ""].reset_index(drop=True)
 
 
-# Builds a normalized 24-bin hour-of-day activity histogram
-def hour_histogram(df: pd.DataFrame) -> List[float]:
-    counts = [0] * 24
-    for h in df["hour"].dropna().astype(int):
-        if 0 <= h <= 23:
-            counts[h] += 1
-    total = sum(counts)
-    return [c / total if total > 0 else 0.0 for c in counts]
+# Counts champion picks
+def champion_counts(df: pd.DataFrame) -> Dict[str, int]:
+    return df["champion"].astype(str).str.strip().value_counts(sort=False).to_dict()
 
 
-# Builds a normalized frequency dictionary of all teammate names seen
-def teammate_distribution(df: pd.DataFrame) -> Dict[str, float]:
-    names = []
-    if "blue_list" in df.columns:
-        for lst in df["blue_list"]:
-            names.extend(lst)
-    if "red_list" in df.columns:
-        for lst in df["red_list"]:
-            names.extend(lst)
-    cnt = Counter([n.strip() for n in names if n.strip()])
-    total = sum(cnt.values())
-    return {k: v / total for k, v in cnt.items()} if total > 0 else {}
+# Counts matches in each of 24 hour-of-day bins
+def hour_counts(df: pd.DataFrame) -> List[int]:
+    hours = df["hour"].dropna().astype(int).to_numpy()
+    hours = hours[(hours >= 0) & (hours <= 23)]
+    return np.bincount(hours, minlength=24).tolist()
 
 
-# Builds a normalized role frequency distribution
-def role_distribution(df: pd.DataFrame) -> Dict[str, float]:
-    roles = df["role"].dropna().astype(str).str.strip()
-    cnt = Counter(roles)
-    total = sum(cnt.values())
-    return {k: v / total for k, v in cnt.items()} if total > 0 else {}
+# Counts all teammate names seen
+def teammate_counts(participants: pd.DataFrame) -> Dict[str, int]:
+    codes, names = pd.factorize(participants["name"], sort=False)
+    return dict(zip(names.tolist(), np.bincount(codes, minlength=len(names)).tolist()))
 
 
-# Builds a normalized lane frequency distribution
-def lane_distribution(df: pd.DataFrame) -> Dict[str, float]:
-    lanes = df["lane"].dropna().astype(str).str.strip()
-    cnt = Counter(lanes)
-    total = sum(cnt.values())
-    return {k: v / total for k, v in cnt.items()} if total > 0 else {}
+# Counts non-missing values of a categorical column (role, lane, game mode)
+def category_counts(df: pd.DataFrame, column: str) -> Dict[str, int]:
+    return df[column].dropna().astype(str).str.strip().value_counts(sort=False).to_dict()
 
 
-# Builds a normalized game mode frequency distribution
-def game_mode_distribution(df: pd.DataFrame) -> Dict[str, float]:
-    modes = df["game_mode"].dropna().astype(str).str.strip()
-    cnt = Counter(modes)
-    total = sum(cnt.values())
-    return {k: v / total for k, v in cnt.items()} if total > 0 else {}
+# Counts in how many matches each name appears (used to guess the focal player)
+def player_match_counts(participants: pd.DataFrame) -> Dict[str, int]:
+    codes, names = pd.factorize(participants["name"], sort=False)
+    # Distinct (match, name) pairs as single integers; pd.unique hashes, np.unique would sort
+    pairs = pd.unique(participants["match"].to_numpy(dtype=np.int64) * max(1, len(names)) + codes)
+    return dict(zip(names.tolist(), np.bincount(pairs % max(1, len(names)), minlength=len(names)).tolist()))
 
 
 # Computes cosine similarity between two sparse distributions
@@ -308,193 +295,482 @@ MODE_DURATION_THRESHOLDS = {
 }
 
 
+# Returns duration threshold (in minutes) for the game mode
+def mode_duration_threshold(mode: str) -> float:
+    if mode == "Unknown":
+        return MODE_DURATION_THRESHOLDS.get("default", 8.0)
+    return MODE_DURATION_THRESHOLDS.get(mode, MODE_DURATION_THRESHOLDS["default"])
+
+
+# Computes number of matches, number of matches with known duration and duration sum per game mode
+def mode_duration_moments(df: pd.DataFrame) -> Dict[str, List[float]]:
+    modes = df["game_mode"].astype(str).str.strip()
+    modes = modes.mask(df["game_mode"].isna() | modes.str.upper().isin(["N/A", "NONE", "NAN", ""]), "Unknown")
+    grouped = df["duration_min"].groupby(modes)
+    sizes = grouped.size()
+    valid = grouped.count()
+    sums = grouped.sum()
+    return {str(mode): [int(sizes[mode]), int(valid[mode]), float(sums[mode])] for mode in sizes.index}
+
+
 # Computes duration similarity using mode-specific thresholds
-def duration_similarity_by_mode(df1: pd.DataFrame, df2: pd.DataFrame) -> float:
-    def normalize_mode(mode):
-        if pd.isna(mode):
-            return "Unknown"
-        mode_str = str(mode).strip()
-        if mode_str.upper() in ("N/A", "NONE", "NAN", ""):
-            return "Unknown"
-        return mode_str
-
-    # Get all game modes (including "Unknown" for N/A values)
-    modes1 = set(normalize_mode(m) for m in df1["game_mode"])
-    modes2 = set(normalize_mode(m) for m in df2["game_mode"])
-    common_modes = modes1 & modes2
-
-    if not common_modes:
-        # No common modes - fall back to overall comparison with default threshold
-        mean1 = df1["duration_min"].mean()
-        mean2 = df2["duration_min"].mean()
-        if any(pd.isna(x) for x in [mean1, mean2]):
-            return 0.0
-        threshold = MODE_DURATION_THRESHOLDS.get("default", 8.0)
-        return scalar_similarity(mean1, mean2, threshold)
+def duration_similarity_by_mode(f1: Dict[str, Any], f2: Dict[str, Any]) -> float:
+    stats1 = f1["mode_durations"]
+    stats2 = f2["mode_durations"]
 
     # Calculate similarity for each common mode, weighted by frequency
     mode_similarities = []
     mode_weights = []
 
-    for mode in common_modes:
-        # Get matches for this mode in each dataframe
-        df1_mode = df1[df1["game_mode"].apply(normalize_mode) == mode]
-        df2_mode = df2[df2["game_mode"].apply(normalize_mode) == mode]
+    for mode in set(stats1) & set(stats2):
+        mean1, count1 = stats1[mode]
+        mean2, count2 = stats2[mode]
 
-        # Skip if either dataframe has no valid duration data for this mode
-        if len(df1_mode) == 0 or len(df2_mode) == 0:
+        # Skip if either profile has no valid duration data for this mode
+        if any(pd.isna(x) for x in [mean1, mean2]):
             continue
 
-        mean1 = df1_mode["duration_min"].mean()
-        mean2 = df2_mode["duration_min"].mean()
+        mode_similarities.append(scalar_similarity(mean1, mean2, mode_duration_threshold(mode)))
 
-        if any(pd.isna(x) for x in [mean1, mean2]):
-            continue
+        # Weight by combined frequency (how often this mode appears in both files)
+        mode_weights.append(count1 + count2)
+
+    total_weight = sum(mode_weights)
+    if not mode_similarities or total_weight == 0:
+        # No common modes or no valid mode comparisons - fall back to overall comparison with default threshold
+        return scalar_similarity(f1["duration_mean"], f2["duration_mean"], MODE_DURATION_THRESHOLDS.get("default", 8.0))
+
+    # Weighted average of mode-specific similarities
+    return sum(sim * weight for sim, weight in zip(mode_similarities, mode_weights)) / total_weight
+
+
+# Distributions compared with cosine similarity, as (component name, feature key)
+DISTRIBUTION_FEATURES = [
+    ("champ", "champion"),
+    ("time_of_day", "hour"),
+    ("teammates", "teammates"),
+    ("role", "role"),
+    ("lane", "lane"),
+    ("game_mode", "game_mode"),
+]
+
+# Weighted blend of component similarities into the overall score
+# Game mode gets lower weight since new modes are introduced periodically
+SIMILARITY_WEIGHTS = {
+    "champ": 0.23,
+    "kda": 0.16,
+    "winrate": 0.09,
+    "duration": 0.09,
+    "time_of_day": 0.10,
+    "teammates": 0.10,
+    "role": 0.07,
+    "lane": 0.07,
+    "level": 0.04,
+    "game_mode": 0.05,
+}
+
+# Result keys of component similarities
+SIMILARITY_RESULT_KEYS = {
+    "champ": "champion_similarity",
+    "kda": "kda_similarity",
+    "winrate": "winrate_similarity",
+    "duration": "duration_similarity",
+    "time_of_day": "time_of_day_similarity",
+    "teammates": "teammate_overlap_similarity",
+    "role": "role_similarity",
+    "lane": "lane_similarity",
+    "level": "level_similarity",
+    "game_mode": "game_mode_similarity",
+}
+
+
+# Profile artifact format version, file name suffix and number of bytes hashed at start and end of the source CSV
+PROFILE_VERSION = 1
+PROFILE_SUFFIX = ".profile.json.gz"
+PROFILE_HASH_BYTES = 4096
+
+
+# Builds the profile of a match history: sparse count vectors, moments and match intervals
+# Profiles of consecutive parts of the same history can be combined with merge_profiles()
+def build_profile(df: pd.DataFrame) -> Dict[str, Any]:
+    kda = df["kda"].dropna().to_numpy(dtype=float)
+    victory = pd.to_numeric(df["victory"], errors="coerce").dropna()
+    level = df["level"].dropna()
+    duration = df["duration_min"].dropna()
+
+    start = datetimes_to_ns(df["start"]) // 10**9
+    stop = datetimes_to_ns(df["stop"]) // 10**9
+    stop_missing = df["stop"].isna().to_numpy()
+    participants = participant_table(df)
+
+    return {
+        "version": PROFILE_VERSION,
+        "matches": len(df),
+        "counts": {
+            "champion": champion_counts(df),
+            "hour": hour_counts(df),
+            "teammates": teammate_counts(participants),
+            "role": category_counts(df, "role"),
+            "lane": category_counts(df, "lane"),
+            "game_mode": category_counts(df, "game_mode"),
+            "players": player_match_counts(participants),
+        },
+        "moments": {
+            "kda": [len(kda), float(kda.sum()), float((kda * kda).sum())],
+            "victory": [len(victory), float(victory.sum())],
+            "level": [len(level), float(level.sum())],
+            "duration": [len(duration), float(duration.sum())],
+        },
+        "mode_durations": mode_duration_moments(df),
+        "intervals": {
+            "start": start.tolist(),
+            "stop": [None if missing else int(ts) for ts, missing in zip(stop, stop_missing)],
+            "champion": df["champion"].astype(str).tolist(),
+            "game_mode": [None if pd.isna(mode) else str(mode) for mode in df["game_mode"]],
+        },
+    }
+
+
+# Adds two sparse count vectors
+def merge_counts(a: Dict[str, int], b: Dict[str, int]) -> Dict[str, int]:
+    merged = dict(a)
+    for k, v in b.items():
+        merged[k] = merged.get(k, 0) + v
+    return merged
 
-        # Get mode-specific threshold (use default for "Unknown" modes)
-        if mode == "Unknown":
-            threshold = MODE_DURATION_THRESHOLDS.get("default", 8.0)
+
+# Combines the profile of appended matches into the profile of the earlier ones
+def merge_profiles(base: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    counts = {}
+    for key, value in base["counts"].items():
+        if key == "hour":
+            counts[key] = [a + b for a, b in zip(value, extra["counts"][key])]
         else:
-            threshold = MODE_DURATION_THRESHOLDS.get(mode, MODE_DURATION_THRESHOLDS["default"])
+            counts[key] = merge_counts(value, extra["counts"][key])
 
-        # Calculate similarity for this mode
-        mode_sim = scalar_similarity(mean1, mean2, threshold)
+    mode_durations = {mode: list(values) for mode, values in base["mode_durations"].items()}
+    for mode, values in extra["mode_durations"].items():
+        mode_durations[mode] = [a + b for a, b in zip(mode_durations.get(mode, [0, 0, 0.0]), values)]
 
-        # Weight by combined frequency (how often this mode appears in both files)
-        weight = len(df1_mode) + len(df2_mode)
+    return {
+        "version": PROFILE_VERSION,
+        "matches": base["matches"] + extra["matches"],
+        "counts": counts,
+        "moments": {key: [a + b for a, b in zip(value, extra["moments"][key])] for key, value in base["moments"].items()},
+        "mode_durations": mode_durations,
+        "intervals": {key: value + extra["intervals"][key] for key, value in base["intervals"].items()},
+    }
 
-        mode_similarities.append(mode_sim)
-        mode_weights.append(weight)
 
-    if not mode_similarities:
-        # No valid mode comparisons - fall back to overall
-        mean1 = df1["duration_min"].mean()
-        mean2 = df2["duration_min"].mean()
-        if any(pd.isna(x) for x in [mean1, mean2]):
-            return 0.0
-        threshold = MODE_DURATION_THRESHOLDS.get("default", 8.0)
-        return scalar_similarity(mean1, mean2, threshold)
+# Returns mean from [count, sum] moments
+def moments_mean(moments: List[float]) -> float:
+    return moments[1] / moments[0] if moments[0] else math.nan
 
-    # Weighted average of mode-specific similarities
-    total_weight = sum(mode_weights)
-    if total_weight == 0:
-        return 0.0
 
-    weighted_sim = sum(sim * weight for sim, weight in zip(mode_similarities, mode_weights)) / total_weight
-    return weighted_sim
+# Computes the feature vectors and summary statistics used for comparison from a profile
+def profile_features(profile: Dict[str, Any]) -> Dict[str, Any]:
+    counts = profile["counts"]
+    matches = profile["matches"]
 
+    kda_n, kda_sum, kda_sumsq = profile["moments"]["kda"]
+    kda_mean = kda_sum / kda_n if kda_n else math.nan
+    kda_std = math.sqrt(max(0.0, kda_sumsq / kda_n - kda_mean * kda_mean)) if kda_n else math.nan
 
-# Heuristically guesses the focal player by most frequent name across matches
-def guess_player_name(df: pd.DataFrame) -> Tuple[str, float]:
-    freq = Counter()
-    blues = df["blue_list"] if "blue_list" in df.columns else []
-    reds = df["red_list"] if "red_list" in df.columns else []
-    for blue, red in zip(blues, reds):
-        for n in set(blue + red):
-            freq[n] += 1
-    if not freq:
-        return "", 0.0
-    name, count = freq.most_common(1)[0]
-    conf = count / max(1, len(df))
-    return name, conf
+    # Heuristically guess the focal player by most frequent name across matches
+    player, player_conf = "", 0.0
+    if counts["players"]:
+        player, count = max(counts["players"].items(), key=lambda item: item[1])
+        player_conf = count / max(1, matches)
 
+    return {
+        "matches": matches,
+        "champion": counts["champion"],
+        "hour": {str(i): v for i, v in enumerate(counts["hour"])},
+        "teammates": counts["teammates"],
+        "role": counts["role"],
+        "lane": counts["lane"],
+        "game_mode": counts["game_mode"],
+        "kda_mean": kda_mean,
+        "kda_std": kda_std,
+        "winrate": moments_mean(profile["moments"]["victory"]),
+        "duration_mean": moments_mean(profile["moments"]["duration"]),
+        "mode_durations": {mode: (valid_sum / valid if valid else math.nan, size) for mode, (size, valid, valid_sum) in profile["mode_durations"].items()},
+        "level_mean": moments_mean(profile["moments"]["level"]),
+        "level_valid": profile["moments"]["level"][0] / matches if matches else 0.0,
+        "player": player,
+        "player_conf": player_conf,
+    }
 
-# Compares two match histories and return component similarities and an overall score
-def compare_profiles(df1: pd.DataFrame, df2: pd.DataFrame) -> Dict[str, Any]:
 
-    # Feature 1: champion pool similarity (cosine on frequency)
-    champ_sim = cosine_sim(champion_distribution(df1), champion_distribution(df2))
+# Rebuilds start/stop/champion/game mode columns of a profile for temporal overlap analysis
+def profile_intervals_frame(profile: Dict[str, Any]) -> pd.DataFrame:
+    intervals = profile["intervals"]
+    return pd.DataFrame({
+        "start": pd.to_datetime(pd.Series(intervals["start"], dtype="float64"), unit="s", utc=True),
+        "stop": pd.to_datetime(pd.Series(intervals["stop"], dtype="float64"), unit="s", utc=True),
+        "champion": intervals["champion"],
+        "game_mode": pd.Series(intervals["game_mode"], dtype="object"),
+    })
 
-    # Feature 2: KDA profile similarity (mean and stdev)
-    kda_mean_sim = scalar_similarity(df1["kda"].mean(), df2["kda"].mean(), scale=2.0)
-    kda_std_sim = scalar_similarity(df1["kda"].std(ddof=0), df2["kda"].std(ddof=0), scale=1.0)
-    kda_sim = 0.7 * kda_mean_sim + 0.3 * kda_std_sim
 
-    # Feature 3: Winrate similarity
-    wr1 = df1["victory"].mean() if len(df1) else pd.NA
-    wr2 = df2["victory"].mean() if len(df2) else pd.NA
-    winrate_sim = scalar_similarity(wr1, wr2, scale=0.25)
+# Blends component similarities (floats or numpy arrays) into the overall score on [0,1]
+def blend_similarities(components: Dict[str, Any]) -> Any:
+    overall = sum(SIMILARITY_WEIGHTS[name] * components[name] for name in SIMILARITY_WEIGHTS)
+    return np.clip(overall, 0.0, 1.0)
 
-    # Feature 4: Average duration similarity (mode-aware)
-    dur_sim = duration_similarity_by_mode(df1, df2)
 
-    # Feature 5: Time-of-day habit similarity
-    tod_sim = cosine_sim(
-        {str(i): v for i, v in enumerate(hour_histogram(df1))},
-        {str(i): v for i, v in enumerate(hour_histogram(df2))},
-    )
+# Compares two profiles' features and return component similarities and an overall score
+def compare_profile_features(f1: Dict[str, Any], f2: Dict[str, Any]) -> Dict[str, Any]:
+    components = {}
+
+    # Champion pool, time-of-day habits, teammate overlap, role, lane and game mode preferences (cosine on frequency)
+    for name, key in DISTRIBUTION_FEATURES:
+        components[name] = cosine_sim(f1[key], f2[key])
 
-    # Feature 6: Teammate overlap (names)
-    team_sim = cosine_sim(teammate_distribution(df1), teammate_distribution(df2))
+    # KDA profile similarity (mean and stdev)
+    kda_mean_sim = scalar_similarity(f1["kda_mean"], f2["kda_mean"], scale=2.0)
+    kda_std_sim = scalar_similarity(f1["kda_std"], f2["kda_std"], scale=1.0)
+    components["kda"] = 0.7 * kda_mean_sim + 0.3 * kda_std_sim
 
-    # Feature 7: Role preference similarity
-    role_sim = cosine_sim(role_distribution(df1), role_distribution(df2))
+    # Winrate similarity
+    components["winrate"] = scalar_similarity(f1["winrate"], f2["winrate"], scale=0.25)
 
-    # Feature 8: Lane preference similarity
-    lane_sim = cosine_sim(lane_distribution(df1), lane_distribution(df2))
+    # Average duration similarity (mode-aware)
+    components["duration"] = duration_similarity_by_mode(f1, f2)
 
-    # Feature 9: Average level similarity (indicates skill/playstyle)
-    # Only compute if both files have sufficient level data (>50% valid)
-    level_valid1 = df1["level"].notna().mean()
-    level_valid2 = df2["level"].notna().mean()
-    if level_valid1 >= 0.5 and level_valid2 >= 0.5:
-        level_sim = scalar_similarity(df1["level"].mean(), df2["level"].mean(), scale=4.0)
+    # Average level similarity (indicates skill/playstyle)
+    # Only compute if both files have sufficient level data (>50% valid), otherwise set similarity
+    # to 0.5 (neutral) to avoid penalizing accounts with missing level data
+    if f1["level_valid"] >= 0.5 and f2["level_valid"] >= 0.5:
+        components["level"] = scalar_similarity(f1["level_mean"], f2["level_mean"], scale=4.0)
     else:
-        # If either file has sparse level data, set similarity to 0.5 (neutral)
-        # to avoid penalizing accounts with missing level data
-        level_sim = 0.5 if (level_valid1 < 0.5 or level_valid2 < 0.5) else 0.0
-
-    # Feature 10: Game mode preference similarity
-    # Lower weight since new modes are introduced periodically
-    mode_sim = cosine_sim(game_mode_distribution(df1), game_mode_distribution(df2))
-
-    # Weighted blend (adjusted weights to accommodate new features)
-    # Game mode gets lower weight since new modes are introduced periodically
-    weights = {
-        "champ": 0.23,
-        "kda": 0.16,
-        "winrate": 0.09,
-        "duration": 0.09,
-        "time_of_day": 0.10,
-        "teammates": 0.10,
-        "role": 0.07,
-        "lane": 0.07,
-        "level": 0.04,
-        "game_mode": 0.05,
-    }
-    overall = (
-        weights["champ"] * champ_sim
-        + weights["kda"] * kda_sim
-        + weights["winrate"] * winrate_sim
-        + weights["duration"] * dur_sim
-        + weights["time_of_day"] * tod_sim
-        + weights["teammates"] * team_sim
-        + weights["role"] * role_sim
-        + weights["lane"] * lane_sim
-        + weights["level"] * level_sim
-        + weights["game_mode"] * mode_sim
-    )
-    overall = min(1.0, max(0.0, overall))
+        components["level"] = 0.5
 
-    return {
-        "champion_similarity": round(champ_sim, 4),
-        "kda_similarity": round(kda_sim, 4),
-        "winrate_similarity": round(winrate_sim, 4),
-        "duration_similarity": round(dur_sim, 4),
-        "time_of_day_similarity": round(tod_sim, 4),
-        "teammate_overlap_similarity": round(team_sim, 4),
-        "role_similarity": round(role_sim, 4),
-        "lane_similarity": round(lane_sim, 4),
-        "level_similarity": round(level_sim, 4),
-        "game_mode_similarity": round(mode_sim, 4),
+    overall = float(blend_similarities(components))
+
+    result = {SIMILARITY_RESULT_KEYS[name]: round(components[name], 4) for name in SIMILARITY_RESULT_KEYS}
+    result.update({
         "overall_score_0_100": round(overall * 100, 1),
-        "guessed_player_file1": guess_player_name(df1)[0],
-        "guess_conf_file1": round(guess_player_name(df1)[1], 3),
-        "guessed_player_file2": guess_player_name(df2)[0],
-        "guess_conf_file2": round(guess_player_name(df2)[1], 3),
+        "guessed_player_file1": f1["player"],
+        "guess_conf_file1": round(f1["player_conf"], 3),
+        "guessed_player_file2": f2["player"],
+        "guess_conf_file2": round(f2["player_conf"], 3),
+    })
+    return result
+
+
+# Compares two match histories (DataFrames or their profiles) and return component similarities and an overall score
+def compare_profiles(df1: Union[pd.DataFrame, Dict[str, Any]], df2: Union[pd.DataFrame, Dict[str, Any]]) -> Dict[str, Any]:
+    profile1 = build_profile(df1) if isinstance(df1, pd.DataFrame) else df1
+    profile2 = build_profile(df2) if isinstance(df2, pd.DataFrame) else df2
+    return compare_profile_features(profile_features(profile1), profile_features(profile2))
+
+
+# Computes pairwise cosine similarity matrix of sparse distributions
+def cosine_sim_matrix(dists: List[Dict[str, float]]) -> np.ndarray:
+    n = len(dists)
+    norms = np.array([math.sqrt(sum(v * v for v in d.values())) for d in dists])
+
+    # Keys seen in a single profile only add to its norm, so the dot products need just the shared ones
+    seen = Counter(k for d in dists for k in d)
+    columns = {k: i for i, k in enumerate(k for k, c in seen.items() if c > 1)}
+    matrix = np.zeros((n, len(columns)))
+    for row, d in enumerate(dists):
+        for k, v in d.items():
+            col = columns.get(k)
+            if col is not None:
+                matrix[row, col] = v
+
+    dots = matrix @ matrix.T
+    denom = np.outer(norms, norms)
+    return np.divide(dots, denom, out=np.zeros((n, n)), where=denom > 0)
+
+
+# Converts pairwise absolute differences to similarities on [0,1] using a scale
+def scalar_similarity_matrix(values: np.ndarray, scale: float) -> np.ndarray:
+    diff = np.abs(values[:, None] - values[None, :])
+    sim = np.clip(1.0 - np.minimum(1.0, diff / scale), 0.0, 1.0)
+    return np.nan_to_num(sim, nan=0.0)
+
+
+# Computes pairwise mode-aware duration similarity matrix
+def duration_similarity_matrix(features: List[Dict[str, Any]]) -> np.ndarray:
+    n = len(features)
+    modes = sorted({mode for f in features for mode in f["mode_durations"]})
+    weighted = np.zeros((n, n))
+    weights = np.zeros((n, n))
+
+    for mode in modes:
+        means = np.array([f["mode_durations"].get(mode, (math.nan, 0))[0] for f in features])
+        counts = np.array([f["mode_durations"].get(mode, (math.nan, 0))[1] for f in features], dtype=float)
+        valid = ~np.isnan(means) & (counts > 0)
+        pair_weights = (counts[:, None] + counts[None, :]) * (valid[:, None] & valid[None, :])
+        weighted += pair_weights * scalar_similarity_matrix(means, mode_duration_threshold(mode))
+        weights += pair_weights
+
+    # Pairs without common modes fall back to overall comparison with default threshold
+    fallback = scalar_similarity_matrix(np.array([f["duration_mean"] for f in features]), MODE_DURATION_THRESHOLDS.get("default", 8.0))
+    return np.divide(weighted, weights, out=fallback, where=weights > 0)
+
+
+# Computes component and overall similarity matrices for all pairs of profiles at once
+def similarity_matrices(features: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    components = {}
+
+    for name, key in DISTRIBUTION_FEATURES:
+        components[name] = cosine_sim_matrix([f[key] for f in features])
+
+    def column(key: str) -> np.ndarray:
+        return np.array([f[key] for f in features], dtype=float)
+
+    components["kda"] = 0.7 * scalar_similarity_matrix(column("kda_mean"), 2.0) + 0.3 * scalar_similarity_matrix(column("kda_std"), 1.0)
+    components["winrate"] = scalar_similarity_matrix(column("winrate"), 0.25)
+    components["duration"] = duration_similarity_matrix(features)
+
+    level_valid = column("level_valid") >= 0.5
+    components["level"] = np.where(level_valid[:, None] & level_valid[None, :], scalar_similarity_matrix(column("level_mean"), 4.0), 0.5)
+
+    components["overall"] = blend_similarities(components)
+    return components
+
+
+# Returns the top-k most similar pairs of profiles (all pairs if top_k is 0)
+def top_similar_pairs(files: List[str], features: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    matrices = similarity_matrices(features)
+    rows, cols = np.triu_indices(len(features), k=1)
+    scores = matrices["overall"][rows, cols]
+    order = np.argsort(-scores, kind="stable")
+    if top_k > 0:
+        order = order[:top_k]
+
+    pairs = []
+    for i, j in zip(rows[order], cols[order]):
+        f1, f2 = features[i], features[j]
+        result = {"file1": files[i], "file2": files[j]}
+        result.update({SIMILARITY_RESULT_KEYS[name]: round(float(matrices[name][i, j]), 4) for name in SIMILARITY_RESULT_KEYS})
+        result["overall_score_0_100"] = round(float(matrices["overall"][i, j]) * 100, 1)
+        result["verdict"] = verdict(result["overall_score_0_100"])
+        result.update({
+            "guessed_player_file1": f1["player"],
+            "guess_conf_file1": round(f1["player_conf"], 3),
+            "guessed_player_file2": f2["player"],
+            "guess_conf_file2": round(f2["player_conf"], 3),
+        })
+        pairs.append(result)
+    return pairs
+
+
+# Reads a profile artifact file
+def read_profile_file(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        profile = json.load(f)
+    if not isinstance(profile, dict) or profile.get("version") != PROFILE_VERSION:
+        raise ValueError(f"unsupported profile format in '{path}'")
+    return profile
+
+
+# Writes a profile artifact file atomically, with file permissions copied from mode_source (e.g. the CSV file)
+def write_profile_file(path: str, profile: Dict[str, Any], mode_source: Optional[str] = None) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix=".profile-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(profile, separators=(",", ":")).encode("utf-8"))
+        if mode_source:
+            shutil.copymode(mode_source, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# Returns path of the profile artifact kept next to the CSV file
+def profile_path_for(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + PROFILE_SUFFIX
+
+
+# Fingerprints the part of the CSV file the profile was built from, so rewritten files are detected
+def csv_source_info(data: bytes) -> Dict[str, Any]:
+    return {
+        "size": len(data),
+        "head_sha1": hashlib.sha1(data[:PROFILE_HASH_BYTES]).hexdigest(),
+        "tail_sha1": hashlib.sha1(data[-PROFILE_HASH_BYTES:]).hexdigest(),
     }
 
 
+# Builds the profile artifact of a CSV file or updates it with rows appended since it was built
+# Returns the profile and whether it was built from scratch, updated or unchanged
+def update_profile_file(csv_path: str, profile_path: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+    profile_path = profile_path or profile_path_for(csv_path)
+
+    profile = None
+    if os.path.exists(profile_path):
+        try:
+            profile = read_profile_file(profile_path)
+        except (OSError, ValueError, EOFError):
+            profile = None
+
+    with open(csv_path, "rb") as f:
+        source = profile.get("source") if profile else None
+        size = os.fstat(f.fileno()).st_size
+
+        if source and source["size"] <= size:
+            # Check the already processed part of the file is unchanged and read only the appended rows
+            consumed = source["size"]
+            head = f.read(min(PROFILE_HASH_BYTES, consumed))
+            f.seek(max(0, consumed - PROFILE_HASH_BYTES))
+            tail = f.read(consumed - f.tell())
+            if hashlib.sha1(head).hexdigest() == source["head_sha1"] and hashlib.sha1(tail).hexdigest() == source["tail_sha1"]:
+                appended = f.read()
+
+                # Leave a partially written last row for the next update
+                appended = appended[:appended.rfind(b"\n") + 1]
+                if not appended:
+                    return profile, "unchanged"
+
+                header = head[:head.find(b"\n") + 1]
+                extra = build_profile(load_matches(io.BytesIO(header + appended)))
+                profile = merge_profiles(profile, extra)
+                profile["source"] = {
+                    "size": consumed + len(appended),
+                    "head_sha1": hashlib.sha1((head + appended)[:PROFILE_HASH_BYTES]).hexdigest(),
+                    "tail_sha1": hashlib.sha1((tail + appended)[-PROFILE_HASH_BYTES:]).hexdigest(),
+                }
+                write_profile_file(profile_path, profile, csv_path)
+                return profile, "updated"
+
+        f.seek(0)
+        data = f.read()
+
+    # Leave a partially written last row for the next update
+    if b"\n" in data:
+        data = data[:data.rfind(b"\n") + 1]
+
+    profile = build_profile(load_matches(io.BytesIO(data)))
+    profile["source"] = csv_source_info(data)
+    write_profile_file(profile_path, profile, csv_path)
+    return profile, "built"
+
+
+# Loads a CSV file or profile artifact, returns DataFrame with match intervals and the profile
+def load_input(path: str, limit: int = 0, use_profiles: bool = False) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    if path.endswith(PROFILE_SUFFIX):
+        profile = read_profile_file(path)
+        return profile_intervals_frame(profile), profile
+    if use_profiles:
+        profile, _ = update_profile_file(path)
+        return profile_intervals_frame(profile), profile
+    df = load_matches(path)
+    if limit and limit > 0:
+        df = df.head(limit)
+    return df, build_profile(df)
+
+
+# Loads a CSV file or profile artifact and computes its profile features (runs in worker processes)
+def load_profile_features(path: str, limit: int = 0, use_profiles: bool = False) -> Tuple[int, Dict[str, Any]]:
+    _, profile = load_input(path, limit, use_profiles)
+    return profile["matches"], profile_features(profile)
+
+
 # Produces a short textual verdict from the overall score
 def verdict(score_0_100: float) -> str:
     if score_0_100 >= 80:
@@ -515,22 +791,76 @@ def format_similarity(score: float, width: int = 20) -> str:
     bar = "█" * filled + "░" * (width - filled)
     return f"{pct:5.1f}% [{bar}]"
 
-# Safely extracts and sanitizes values from a pandas row
-def safe_get(row, col, default="N/A"):
-    try:
-        val = row[col]
-        if pd.isna(val):
-            return default
-        val_str = str(val).strip()
-        # Also check for string "nan" (case-insensitive) as pandas sometimes converts NaN to string "nan"
-        if val_str.lower() in ("nan", "none", ""):
-            return default
-        return val_str
-    except (KeyError, IndexError):
-        return default
-
-
-# Finds temporal overlaps between matches using vectorized NumPy comparisons
+# Safely extracts and sanitizes values of a column for the given row positions
+def safe_get_column(df: pd.DataFrame, col: str, positions: np.ndarray, default="N/A") -> List[str]:
+    if col not in df.columns:
+        return [default] * len(positions)
+    values = df[col].iloc[positions]
+    values_str = values.astype(str).str.strip()
+    # Also check for string "nan" (case-insensitive) as pandas sometimes converts NaN to string "nan"
+    missing = values.isna().to_numpy() | values_str.str.lower().isin(["nan", "none", ""]).to_numpy()
+    return [default if m else v for m, v in zip(missing, values_str.tolist())]
+
+
+# Converts datetime series (without missing values) to int64 nanoseconds, so both files are compared in the same unit
+def datetimes_to_ns(series: pd.Series) -> np.ndarray:
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+    return series.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+# Expands per-query [lo, hi) ranges of sorted positions into flat (query, position) pairs without Python loops
+def expand_ranges(lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    queries = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return queries, np.repeat(lo, counts) + offsets
+
+
+# Finds all pairs of overlapping (closed) intervals: start1 <= stop2 AND stop1 >= start2
+# Returns positions into (s1, e1) and (s2, e2) arrays, ordered by first then second position
+def find_overlapping_pairs(s1: np.ndarray, e1: np.ndarray, s2: np.ndarray, e2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    proper1 = np.nonzero(s1 <= e1)[0]
+    proper2 = np.nonzero(s2 <= e2)[0]
+
+    # For proper intervals every overlap falls into exactly one of two cases, each being a range query on sorted starts:
+    #   a) start1 <= start2 <= stop1  -> starts of file 2 within [start1, stop1]
+    #   b) start2 < start1 <= stop2   -> starts of file 1 within (start2, stop2]
+    order2 = proper2[np.argsort(s2[proper2], kind="stable")]
+    sorted_s2 = s2[order2]
+    lo = np.searchsorted(sorted_s2, s1[proper1], side="left")
+    hi = np.searchsorted(sorted_s2, e1[proper1], side="right")
+    q, pos = expand_ranges(lo, hi)
+    pairs1 = [proper1[q]]
+    pairs2 = [order2[pos]]
+
+    order1 = proper1[np.argsort(s1[proper1], kind="stable")]
+    sorted_s1 = s1[order1]
+    lo = np.searchsorted(sorted_s1, s2[proper2], side="right")
+    hi = np.searchsorted(sorted_s1, e2[proper2], side="right")
+    q, pos = expand_ranges(lo, hi)
+    pairs1.append(order1[pos])
+    pairs2.append(proper2[q])
+
+    # Inverted intervals (stop before start) are rare data errors, they are checked against everything directly
+    for i in np.nonzero(s1 > e1)[0]:
+        matches = np.nonzero((s1[i] <= e2) & (e1[i] >= s2))[0]
+        pairs1.append(np.full(len(matches), i))
+        pairs2.append(matches)
+    for j in np.nonzero(s2 > e2)[0]:
+        matches = proper1[(s1[proper1] <= e2[j]) & (e1[proper1] >= s2[j])]
+        pairs1.append(matches)
+        pairs2.append(np.full(len(matches), j))
+
+    i1 = np.concatenate(pairs1).astype(np.int64)
+    i2 = np.concatenate(pairs2).astype(np.int64)
+    order = np.lexsort((i2, i1))
+    return i1[order], i2[order]
+
+
+# Finds temporal overlaps between matches with sort-and-sweep range queries
+# Runs in O((n + m) log(n + m) + k) time and memory for k overlaps, instead of comparing all n × m pairs
 def find_temporal_overlaps(df1: pd.DataFrame, df2: pd.DataFrame, verbose: bool = True) -> List[Dict[str, Any]]:
     overlaps: List[Dict[str, Any]] = []
 
@@ -541,23 +871,22 @@ def find_temporal_overlaps(df1: pd.DataFrame, df2: pd.DataFrame, verbose: bool =
         return overlaps
 
     # Convert to timestamps for comparison
-    df1_start = pd.to_datetime(df1["start"], errors="coerce")
-    df1_stop = pd.to_datetime(df1["stop"], errors="coerce")
-    df2_start = pd.to_datetime(df2["start"], errors="coerce")
-    df2_stop = pd.to_datetime(df2["stop"], errors="coerce")
+    df1_start = pd.to_datetime(df1["start"], errors="coerce", utc=True)
+    df1_stop = pd.to_datetime(df1["stop"], errors="coerce", utc=True)
+    df2_start = pd.to_datetime(df2["start"], errors="coerce", utc=True)
+    df2_stop = pd.to_datetime(df2["stop"], errors="coerce", utc=True)
 
     # Filter out rows with missing start/stop
     valid1 = (~df1_start.isna()) & (~df1_stop.isna())
     valid2 = (~df2_start.isna()) & (~df2_stop.isna())
 
     if verbose:
-        total_comparisons = int(valid1.sum()) * int(valid2.sum())
         print(
             "Analyzing temporal overlaps between matches...",
             end="",
             flush=True,
         )
-        print(f" ({int(valid1.sum())} × {int(valid2.sum())} = {total_comparisons:,} comparisons)")
+        print(f" ({int(valid1.sum())} × {int(valid2.sum())} matches)")
 
     if valid1.sum() == 0 or valid2.sum() == 0:
         if verbose:
@@ -568,23 +897,13 @@ def find_temporal_overlaps(df1: pd.DataFrame, df2: pd.DataFrame, verbose: bool =
     idx1 = np.nonzero(valid1.to_numpy())[0]
     idx2 = np.nonzero(valid2.to_numpy())[0]
 
-    # NumPy arrays of start/stop times for valid rows
-    s1 = df1_start.iloc[idx1].to_numpy()
-    e1 = df1_stop.iloc[idx1].to_numpy()
-    s2 = df2_start.iloc[idx2].to_numpy()
-    e2 = df2_stop.iloc[idx2].to_numpy()
-
-    # Broadcast to compute all pairwise overlaps:
-    # Two ranges overlap if: start1 <= stop2 AND stop1 >= start2
-    s1_2d = s1[:, None]
-    e1_2d = e1[:, None]
-    s2_2d = s2[None, :]
-    e2_2d = e2[None, :]
+    # Start/stop times of valid rows
+    s1 = datetimes_to_ns(df1_start.iloc[idx1])
+    e1 = datetimes_to_ns(df1_stop.iloc[idx1])
+    s2 = datetimes_to_ns(df2_start.iloc[idx2])
+    e2 = datetimes_to_ns(df2_stop.iloc[idx2])
 
-    mask = (s1_2d <= e2_2d) & (e1_2d >= s2_2d)
-
-    # Get indices of overlapping pairs
-    i1_rel, i2_rel = np.where(mask)
+    i1_rel, i2_rel = find_overlapping_pairs(s1, e1, s2, e2)
 
     if len(i1_rel) == 0:
         if verbose:
@@ -595,42 +914,32 @@ def find_temporal_overlaps(df1: pd.DataFrame, df2: pd.DataFrame, verbose: bool =
     i1_abs = idx1[i1_rel]
     i2_abs = idx2[i2_rel]
 
-    # Build result list
-    for a, b in zip(i1_abs, i2_abs):
-        start1 = df1_start.iloc[a]
-        stop1 = df1_stop.iloc[a]
-        start2 = df2_start.iloc[b]
-        stop2 = df2_stop.iloc[b]
-
-        overlap_start = max(start1, start2)
-        overlap_stop = min(stop1, stop2)
-        overlap_duration = (overlap_stop - overlap_start).total_seconds() / 60.0  # minutes
-
-        row1 = df1.iloc[a]
-        row2 = df2.iloc[b]
-
-        champ1 = safe_get(row1, "champion")
-        champ2 = safe_get(row2, "champion")
-        mode1 = safe_get(row1, "game_mode")
-        mode2 = safe_get(row2, "game_mode")
-
-        overlaps.append(
-            {
-                "file1_index": int(a),
-                "file1_start": start1,
-                "file1_stop": stop1,
-                "file1_champion": champ1,
-                "file1_mode": mode1,
-                "file2_index": int(b),
-                "file2_start": start2,
-                "file2_stop": stop2,
-                "file2_champion": champ2,
-                "file2_mode": mode2,
-                "overlap_start": overlap_start,
-                "overlap_stop": overlap_stop,
-                "overlap_duration_minutes": overlap_duration,
-            }
-        )
+    # Build result columns at once
+    start1 = df1_start.iloc[i1_abs].reset_index(drop=True)
+    stop1 = df1_stop.iloc[i1_abs].reset_index(drop=True)
+    start2 = df2_start.iloc[i2_abs].reset_index(drop=True)
+    stop2 = df2_stop.iloc[i2_abs].reset_index(drop=True)
+
+    overlap_start = start1.where(start1 >= start2, start2)
+    overlap_stop = stop1.where(stop1 <= stop2, stop2)
+    overlap_duration = (overlap_stop - overlap_start).dt.total_seconds() / 60.0  # minutes
+
+    columns = {
+        "file1_index": i1_abs.tolist(),
+        "file1_start": start1.tolist(),
+        "file1_stop": stop1.tolist(),
+        "file1_champion": safe_get_column(df1, "champion", i1_abs),
+        "file1_mode": safe_get_column(df1, "game_mode", i1_abs),
+        "file2_index": i2_abs.tolist(),
+        "file2_start": start2.tolist(),
+        "file2_stop": stop2.tolist(),
+        "file2_champion": safe_get_column(df2, "champion", i2_abs),
+        "file2_mode": safe_get_column(df2, "game_mode", i2_abs),
+        "overlap_start": overlap_start.tolist(),
+        "overlap_stop": overlap_stop.tolist(),
+        "overlap_duration_minutes": overlap_duration.tolist(),
+    }
+    overlaps = [dict(zip(columns, values)) for values in zip(*columns.values())]
 
     if verbose:
         print(f"  Found {len(overlaps)} overlapping match(es)")
@@ -776,13 +1085,108 @@ def print_readable_report(result: Dict[str, Any], file1: str, file2: str, df1: O
                 print("\n" + "=" * 80)
 
 
+# Expands directories to the CSV files they contain
+def expand_csv_files(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".csv")))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+# Prints the most similar pairs found by the all-pairs comparison
+def print_top_pairs_report(pairs: List[Dict[str, Any]], profiles_count: int) -> None:
+    print("=" * 80)
+    print(" LoL Match History Comparison Report (all pairs)")
+    print("=" * 80)
+    print()
+    print(f"Compared {profiles_count} files ({profiles_count * (profiles_count - 1) // 2} pairs), top {len(pairs)} candidate pairs:")
+    print()
+
+    for rank, pair in enumerate(pairs, start=1):
+        print(f"{rank:>3}. {pair['overall_score_0_100']:5.1f}/100  {pair['verdict']}")
+        for n in (1, 2):
+            player = pair[f"guessed_player_file{n}"]
+            guess = f" ({player}, confidence: {pair[f'guess_conf_file{n}'] * 100:.1f}%)" if player else ""
+            print(f"       {pair[f'file{n}']}{guess}")
+        print()
+
+    print("=" * 80)
+
+
+# Loads all CSV files once in worker processes, computes the full similarity matrix and reports the top-k pairs
+def run_all_pairs(args: argparse.Namespace) -> int:
+    files = expand_csv_files(args.files)
+    if len(files) < 2:
+        print("Error: --all-pairs requires at least two CSV files")
+        return 1
+    if args.top < 0:
+        print(f"Error: --top must be a non-negative integer, got '{args.top}'")
+        return 1
+
+    if args.limit and args.limit > 0 and args.profiles:
+        print("Warning: --limit is ignored with --profiles")
+
+    jobs = max(1, min(args.jobs, len(files)))
+    print(f"Loading and parsing {len(files)} CSV files ({jobs} worker{'s' if jobs > 1 else ''})...")
+
+    loaded_files = []
+    features = []
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        if executor:
+            pending = [(path, executor.submit(load_profile_features, path, args.limit, args.profiles)) for path in files]
+        else:
+            pending = [(path, None) for path in files]
+        for path, future in pending:
+            try:
+                count, profile = future.result() if future else load_profile_features(path, args.limit, args.profiles)
+            except Exception as e:
+                print(f"  Error: '{path}': {e}")
+                continue
+            print(f"  Loaded {path} ({count} matches)")
+            loaded_files.append(path)
+            features.append(profile)
+    except KeyboardInterrupt:
+        print("\n  Interrupted by user. Exiting...", flush=True)
+        sys.exit(130)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    if len(features) < 2:
+        print("Error: at least two CSV files must load successfully")
+        return 1
+
+    print("\nComputing similarity matrix...")
+    pairs = top_similar_pairs(loaded_files, features, args.top)
+    print("  Analysis complete\n")
+
+    result = {"files": loaded_files, "pairs": pairs}
+    if args.json:
+        if args.pretty:
+            print(json.dumps(result, indent=2))
+        else:
+            print(json.dumps(result, separators=(",", ":")))
+    else:
+        print_top_pairs_report(pairs, len(features))
+        if args.pretty:
+            print("\n" + "=" * 80)
+            print("JSON Output (for programmatic use):")
+            print("-" * 80)
+            print(json.dumps(result, indent=2))
+
+    return 0
+
+
 # Runs the command-line comparison workflow
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Compare two LoL match CSVs and assess if the same person played"
     )
-    parser.add_argument("file1", help="Path to first CSV")
-    parser.add_argument("file2", help="Path to second CSV")
+    parser.add_argument("files", nargs="+", metavar="file", help=f"Paths to CSV or profile (*{PROFILE_SUFFIX}) files (two for a detailed comparison, more or directories for --all-pairs)")
     parser.add_argument(
         "--limit",
         type=int,
@@ -811,23 +1215,54 @@ def main() -> int:
         default="5",
         help="Maximum number of temporal overlaps to display (default: 5, use 'all' to show all)",
     )
+    parser.add_argument(
+        "--all-pairs",
+        action="store_true",
+        help="Compare every pair of the given CSV files and list the most similar ones (implied by more than two files or a directory)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of most similar pairs to list with --all-pairs (default: 10, use 0 to list all)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes used to load CSV files with --all-pairs (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--profiles",
+        action="store_true",
+        help=f"Build a profile file (*{PROFILE_SUFFIX}) next to each CSV, or update it with appended rows, and compare using it",
+    )
     args = parser.parse_args()
 
+    if args.all_pairs or len(args.files) > 2 or any(os.path.isdir(path) for path in args.files):
+        return run_all_pairs(args)
+
+    if len(args.files) != 2:
+        parser.error("two CSV files are required (or use --all-pairs)")
+    args.file1, args.file2 = args.files
+
+    if args.limit and args.limit > 0:
+        if args.profiles:
+            print("Warning: --limit is ignored with --profiles")
+        else:
+            print(f"Limiting to {args.limit} matches per file...")
+
     print("Loading and parsing CSV files...")
     print(f"  Loading {args.file1}...", end="", flush=True)
-    df1 = load_matches(args.file1)
-    print(f" done ({len(df1)} matches)")
+    df1, profile1 = load_input(args.file1, args.limit, args.profiles)
+    print(f" done ({profile1['matches']} matches)")
     print(f"  Loading {args.file2}...", end="", flush=True)
-    df2 = load_matches(args.file2)
-    print(f" done ({len(df2)} matches)")
-
-    if args.limit and args.limit > 0:
-        print(f"Limiting to {args.limit} matches per file...")
-        df1 = df1.head(args.limit)
-        df2 = df2.head(args.limit)
+    df2, profile2 = load_input(args.file2, args.limit, args.profiles)
+    print(f" done ({profile2['matches']} matches)")
 
     print("\nAnalyzing match profiles and computing similarity metrics...")
-    result = compare_profiles(df1, df2)
+    result = compare_profiles(profile1, profile2)
     result["verdict"] = verdict(result["overall_score_0_100"])
     print("  Analysis complete\n")
 
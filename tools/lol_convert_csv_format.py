@@ -15,181 +15,159 @@ Missing values are filled with "N/A".
 """
 
 import csv
+import glob
+import os
+import shutil
 import sys
 import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
+# Old column order
+OLD_COLUMNS = ['Match Start', 'Match Stop', 'Duration', 'Victory', 'Kills', 'Deaths', 'Assists', 'Champion', 'Team 1', 'Team 2']
+
+# New column order
+NEW_COLUMNS = ['Match Start', 'Match Stop', 'Duration', 'Game Mode', 'Victory', 'Kills', 'Deaths', 'Assists', 'Champion', 'Level', 'Role', 'Lane', 'Team 1', 'Team 2']
+
+
+# Converts a single value of the given column, preserving data types
+def convert_value(col, value):
+    if col in ['Kills', 'Deaths', 'Assists']:
+        try:
+            if value == "" or value is None:
+                return "N/A"
+            return int(value)
+        except (ValueError, TypeError):
+            return "N/A"
+    elif col == 'Victory':
+        # Convert to "Yes" or "No" string format, or "N/A" if empty
+        if value == "" or value is None:
+            return "N/A"
+        elif isinstance(value, bool):
+            return "Yes" if value else "No"
+        elif isinstance(value, str):
+            value_lower = value.lower().strip()
+            if value_lower in ('true', '1', 'yes'):
+                return "Yes"
+            elif value_lower in ('false', '0', 'no'):
+                return "No"
+            return "N/A"
+        return "Yes" if bool(value) else "No"
+    else:
+        if value is None:
+            return ""
+        return str(value)
+
+
+# Converts a single CSV row to a dict with new format columns
+def convert_row(row):
+    # If row has old format (10 values), map them positionally
+    # Otherwise row already has new format or unexpected format - try to map by new column order
+    columns = OLD_COLUMNS if len(row) == len(OLD_COLUMNS) else NEW_COLUMNS
+
+    new_row = {}
+    for i, col in enumerate(columns):
+        new_row[col] = convert_value(col, row[i] if i < len(row) else "")
+
+    # Now build the final row in new column order, columns missing in old format are filled with "N/A"
+    # (values already present in new format rows are kept)
+    return {col: new_row.get(col, "N/A") for col in NEW_COLUMNS}
+
+
+# Reads CSV file in old (or new) format and yields its rows converted to the new format
+# Raises ValueError if the file has no header or no data rows
+def iter_converted_rows(input_file):
+    with open(input_file, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+
+        if next(reader, None) is None:
+            raise ValueError("CSV file is empty or has no header.")
+
+        first_data_row = next(reader, None)
+        if first_data_row is None:
+            raise ValueError("CSV file has no data rows.")
+
+        yield convert_row(first_data_row)
+
+        for row in reader:
+            yield convert_row(row)
+
+
 # Convert CSV file from old format to new format
+# Rows are streamed one by one to a temporary file next to the output file, which then atomically replaces it,
+# so the input is never partially overwritten if the conversion fails midway
+# Returns number of converted rows, raises ValueError on invalid input and OSError on I/O failures
 def convert_csv_file(input_file, output_file=None):
     input_path = Path(input_file)
 
     if not input_path.exists():
-        print(f"Error: Input file '{input_file}' does not exist.")
-        sys.exit(1)
+        raise ValueError("Input file does not exist.")
 
     if output_file is None:
         output_file = input_file
     else:
         output_path = Path(output_file)
         if output_path.exists() and output_path.samefile(input_path):
-            print("Error: Output file cannot be the same as input file when specified explicitly.")
-            sys.exit(1)
+            raise ValueError("Output file cannot be the same as input file when specified explicitly.")
 
-    # Old column order
-    old_columns = ['Match Start', 'Match Stop', 'Duration', 'Victory', 'Kills', 'Deaths', 'Assists', 'Champion', 'Team 1', 'Team 2']
-
-    # New column order
-    new_columns = ['Match Start', 'Match Stop', 'Duration', 'Game Mode', 'Victory', 'Kills', 'Deaths', 'Assists', 'Champion', 'Level', 'Role', 'Lane', 'Team 1', 'Team 2']
-
-    rows = []
+    output_path = Path(output_file)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.resolve().parent, prefix=f".{output_path.name}.", suffix=".tmp")
+    count = 0
 
     try:
-        with open(input_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-
-            header_row = next(reader, None)
-            if header_row is None:
-                print("Error: CSV file is empty or has no header.")
-                sys.exit(1)
-
-            # Normalize header
-            header_normalized = [col.strip().strip('"').strip("'") for col in header_row]
-
-            # Determine if we're reading old format (10 columns) or new format (14 columns)
-            # Check by counting actual data columns vs header columns
-            is_old_format = len(header_normalized) == len(old_columns) and all(col in header_normalized for col in old_columns)
-
-            # If header has new columns but data rows might be old format, we'll detect by row length
-            # Read first data row to check
-            first_data_row = next(reader, None)
-            if first_data_row is None:
-                print("Error: CSV file has no data rows.")
-                sys.exit(1)
-
-            # Check if first row has old format (10 values) or new format (14 values)
-            actual_old_format = len(first_data_row) == len(old_columns)
-
-            # Reset file and skip header
-            f.seek(0)
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-
-            for row in reader:
-                new_row = {}
-
-                # If row has old format (10 values), map them positionally
-                if len(row) == len(old_columns):
-                    # Map old format values by position
-                    for i, old_col in enumerate(old_columns):
-                        if i < len(row):
-                            value = row[i]
-                        else:
-                            value = ""
-
-                        # Preserve data types
-                        if old_col in ['Kills', 'Deaths', 'Assists']:
-                            try:
-                                if value == "" or value is None:
-                                    value = "N/A"
-                                else:
-                                    value = int(value)
-                            except (ValueError, TypeError):
-                                value = "N/A"
-                        elif old_col == 'Victory':
-                            # Convert to "Yes" or "No" string format, or "N/A" if empty
-                            if value == "" or value is None:
-                                value = "N/A"
-                            elif isinstance(value, bool):
-                                value = "Yes" if value else "No"
-                            elif isinstance(value, str):
-                                value_lower = value.lower().strip()
-                                if value_lower in ('true', '1', 'yes'):
-                                    value = "Yes"
-                                elif value_lower in ('false', '0', 'no'):
-                                    value = "No"
-                                else:
-                                    value = "N/A"
-                            else:
-                                value = "Yes" if bool(value) else "No"
-                        else:
-                            if value is None:
-                                value = ""
-                            else:
-                                value = str(value)
-
-                        new_row[old_col] = value
-                else:
-                    # Row already has new format or unexpected format - try to map by header
-                    # This shouldn't happen for old format files, but handle it gracefully
-                    for i, col in enumerate(new_columns):
-                        if i < len(row):
-                            value = row[i]
-                        else:
-                            value = ""
-
-                        # Preserve data types
-                        if col in ['Kills', 'Deaths', 'Assists']:
-                            try:
-                                if value == "" or value is None:
-                                    value = "N/A"
-                                else:
-                                    value = int(value)
-                            except (ValueError, TypeError):
-                                value = "N/A"
-                        elif col == 'Victory':
-                            # Convert to "Yes" or "No" string format, or "N/A" if empty
-                            if value == "" or value is None:
-                                value = "N/A"
-                            elif isinstance(value, bool):
-                                value = "Yes" if value else "No"
-                            elif isinstance(value, str):
-                                value_lower = value.lower().strip()
-                                if value_lower in ('true', '1', 'yes'):
-                                    value = "Yes"
-                                elif value_lower in ('false', '0', 'no'):
-                                    value = "No"
-                                else:
-                                    value = "N/A"
-                            else:
-                                value = "Yes" if bool(value) else "No"
-                        else:
-                            if value is None:
-                                value = ""
-                            else:
-                                value = str(value)
-
-                        new_row[col] = value
-
-                # Now build the final row in new column order, inserting new columns
-                final_row = {}
-                for col in new_columns:
-                    if col == 'Game Mode':
-                        final_row[col] = "N/A"
-                    elif col in ['Level', 'Role', 'Lane']:
-                        final_row[col] = "N/A"
-                    else:
-                        # Get value from new_row (which has old format values)
-                        value = new_row.get(col, "")
-                        final_row[col] = value
-
-                rows.append(final_row)
-
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=NEW_COLUMNS, quoting=csv.QUOTE_NONNUMERIC)
+            writer.writeheader()
+            for row in iter_converted_rows(input_path):
+                writer.writerow(row)
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep permissions of the file being replaced
+        shutil.copymode(output_path if output_path.exists() else input_path, tmp_name)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    return count
+
+
+# Converts single file and reports the result, returns True on success (runs in worker processes for many files)
+def convert_and_report(input_file, output_file=None):
+    try:
+        count = convert_csv_file(input_file, output_file)
+    except ValueError as e:
+        print(f"Error: '{input_file}': {e}", flush=True)
+        return False
     except Exception as e:
-        print(f"Error reading input file: {e}")
-        sys.exit(1)
+        print(f"Error converting '{input_file}': {e}", flush=True)
+        return False
 
-    try:
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=new_columns, quoting=csv.QUOTE_NONNUMERIC)
-            writer.writeheader()
-            writer.writerows(rows)
+    print(f"Successfully converted {count} rows from '{input_file}' to '{output_file or input_file}'", flush=True)
+    return True
 
-        print(f"Successfully converted {len(rows)} rows from '{input_file}' to '{output_file}'")
 
-    except Exception as e:
-        print(f"Error writing output file: {e}")
-        sys.exit(1)
+# Expands input arguments (files, directories and glob patterns) to the list of CSV files
+def expand_input_files(inputs):
+    files = []
+    for item in inputs:
+        path = Path(item).expanduser()
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.glob('*.csv')))
+        elif any(ch in item for ch in '*?['):
+            files.extend(sorted(glob.glob(str(path))))
+        else:
+            files.append(item)
+
+    # Preserve order, drop duplicates
+    return list(dict.fromkeys(files))
 
 
 def main():
@@ -204,14 +182,41 @@ New format columns:
   "Match Start","Match Stop","Duration","Game Mode","Victory","Kills","Deaths","Assists","Champion","Level","Role","Lane","Team 1","Team 2"
 
 Missing values are filled with "N/A".
+
+Inputs can be CSV files, directories (all *.csv files inside) or glob patterns (quote them, e.g. 'archive/*.csv').
+Many files are converted in place, in parallel.
         """
     )
-    parser.add_argument('input_file', help='Input CSV file to convert')
-    parser.add_argument('-o', '--output', dest='output_file', default=None, help='Output CSV file (default: overwrites input file)')
+    parser.add_argument('input_files', nargs='+', metavar='input', help='Input CSV file, directory or glob pattern to convert')
+    parser.add_argument('-o', '--output', dest='output_file', default=None, help='Output CSV file, only for a single input file (default: overwrites input file)')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=None, help='Number of files converted in parallel (default: number of CPUs)')
 
     args = parser.parse_args()
 
-    convert_csv_file(args.input_file, args.output_file)
+    input_files = expand_input_files(args.input_files)
+
+    if not input_files:
+        print("Error: No input CSV files found.")
+        sys.exit(1)
+
+    if args.output_file and len(input_files) > 1:
+        print("Error: Output file (-o) can only be used with a single input file.")
+        sys.exit(1)
+
+    if args.jobs is not None and args.jobs < 1:
+        print("Error: Number of jobs (-j) must be at least 1.")
+        sys.exit(1)
+
+    if len(input_files) == 1:
+        ok = convert_and_report(input_files[0], args.output_file)
+        sys.exit(0 if ok else 1)
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(convert_and_report, input_files))
+
+    failed = results.count(False)
+    print(f"\nConverted {len(results) - failed} of {len(results)} files" + (f", {failed} failed" if failed else ""))
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Author: Michal Szymanski <misiektoja-github@rm-rf.ninja>
+v1.0
+
+Script to import lol_monitor CSV files (both old <=v1.7.2 and new >=v1.8 format) into the SQLite match database
+used by lol_monitor (SQLITE_FILE / --sqlite-file).
+
+CSV rows are parsed the same way as by lol_convert_csv_format.py and stored with the lol_monitor database schema.
+CSV files do not keep match IDs, so imported matches are identified by their start time; importing the same file
+again, or a file with matches already saved by lol_monitor, updates the existing rows instead of adding duplicates.
+
+The database is written with the same MatchStore class as used by lol_monitor.py (lol_match_store.py module kept next
+to it), which needs only the Python standard library, so this tool does not need lol_monitor dependencies.
+"""
+
+import re
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from lol_convert_csv_format import iter_converted_rows
+
+# lol_match_store.py lives next to lol_monitor.py, one directory up (unless installed with lol_monitor package)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from lol_match_store import MatchRecord, MatchStore
+
+
+# Units used by lol_monitor's display_time() in the Duration column
+DURATION_UNITS = {
+    'year': 31556952,
+    'month': 2629746,
+    'week': 604800,
+    'day': 86400,
+    'hour': 3600,
+    'minute': 60,
+    'second': 1,
+}
+
+
+# Returns value or None if it is not available
+def na_to_none(value):
+    if value is None or value == "" or value == "N/A":
+        return None
+    return value
+
+
+# Parses timestamp string like "2024-04-21 15:08:45" (local time) to epoch seconds
+def parse_timestamp(value):
+    value = na_to_none(value)
+    if value is None:
+        return 0
+    return int(datetime.fromisoformat(str(value)).timestamp())
+
+
+# Parses duration string like "1 hour, 5 minutes" to seconds
+def parse_duration(value):
+    if not isinstance(value, str):
+        return 0
+    return sum(int(count) * DURATION_UNITS[unit] for count, unit in re.findall(r"(\d+)\s*(year|month|week|day|hour|minute|second)", value))
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+# Extracts names wrapped in single quotes from team members blob string
+def extract_names(value):
+    if not isinstance(value, str):
+        return []
+    return [m.strip() for m in re.findall(r"'([^']+)'", value)]
+
+
+# Builds lol_monitor match record from CSV row converted to the new format
+def row_to_record(row, riot_id) -> MatchRecord:
+    start_ts = parse_timestamp(row['Match Start'])
+    stop_ts = parse_timestamp(row['Match Stop'])
+    duration = parse_duration(row['Duration']) or max(0, stop_ts - start_ts)
+
+    return {
+        "match_id": None,
+        "riot_id": riot_id,
+        "start_ts": start_ts,
+        "stop_ts": stop_ts,
+        "duration": duration,
+        "game_mode": na_to_none(row['Game Mode']),
+        "victory": {"Yes": True, "No": False}.get(row['Victory']),
+        "kills": parse_int(row['Kills']),
+        "deaths": parse_int(row['Deaths']),
+        "assists": parse_int(row['Assists']),
+        "champion": na_to_none(row['Champion']),
+        "level": parse_int(row['Level']),
+        "role": na_to_none(row['Role']),
+        "lane": na_to_none(row['Lane']),
+        "team1": extract_names(row['Team 1']),
+        "team2": extract_names(row['Team 2']),
+    }
+
+
+# Imports all rows of the CSV file in a single transaction, returns number of imported rows
+def import_csv_file(store, input_file, riot_id):
+    count = 0
+    connection = store.connect()
+    with connection:
+        for row in iter_converted_rows(input_file):
+            record = row_to_record(row, riot_id)
+            if not record["start_ts"]:
+                print(f"Warning: Skipping row without match start time in '{input_file}'")
+                continue
+            store.upsert(record)
+            count += 1
+    return count
+
+
+# Guesses Riot ID name from CSV file name like lol_games_<riot_id_name>.csv
+def guess_riot_id(input_file):
+    stem = Path(input_file).stem
+    for prefix in ('lol_games_', 'lol_monitor_'):
+        if stem.startswith(prefix) and len(stem) > len(prefix):
+            return stem[len(prefix):]
+    return stem
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Import lol_monitor CSV files into SQLite match database',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Rows are stored per Riot ID name, which is taken from --riot-id or guessed from the file name
+(lol_games_<riot_id_name>.csv -> <riot_id_name>).
+
+Importing the same file again updates existing rows instead of adding duplicates.
+        """
+    )
+    parser.add_argument('input_files', nargs='+', help='Input CSV file(s) to import')
+    parser.add_argument('-o', '--db', dest='db_file', required=True, help='SQLite database file (created if it does not exist)')
+    parser.add_argument('--riot-id', dest='riot_id', default=None, help='Riot ID name the matches belong to (default: guessed from file name)')
+
+    args = parser.parse_args()
+
+    store = MatchStore()
+    store.configure(str(Path(args.db_file).expanduser()))
+
+    exit_code = 0
+    try:
+        for input_file in args.input_files:
+            if not Path(input_file).exists():
+                print(f"Error: Input file '{input_file}' does not exist.")
+                exit_code = 1
+                continue
+
+            riot_id = args.riot_id or guess_riot_id(input_file)
+            try:
+                count = import_csv_file(store, input_file, riot_id)
+            except Exception as e:
+                print(f"Error importing '{input_file}': {e}")
+                exit_code = 1
+                continue
+
+            print(f"Successfully imported {count} rows from '{input_file}' as '{riot_id}' to '{args.db_file}'")
+    finally:
+        store.close()
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()